@@ -0,0 +1,42 @@
+from frappe.utils import getdate
+
+
+def encode_columns(rows, fields, base_date, dictionary_fields=(), date_fields=()):
+    """Encode query rows (tuples in fields order) as parallel arrays, one per field.
+
+    dictionary_fields are sent as indexes into dictionaries[field], so each
+    distinct machine, order, style... is written once. date_fields are sent
+    as integer day offsets from base_date.
+
+    Returns {columnar, count, base_date, columns, dictionaries}.
+    """
+    base = getdate(base_date)
+    columns = {}
+    dictionaries = {}
+    field_values = zip(*rows, strict=True) if rows else [()] * len(fields)
+    for field, values in zip(fields, field_values, strict=True):
+        if field in date_fields:
+            values = _day_offsets(values, base)
+        elif field in dictionary_fields:
+            dictionaries[field], values = _dictionary_encode(values)
+        columns[field] = list(values)
+
+    return {
+        "columnar": 1,
+        "count": len(rows),
+        "base_date": str(base),
+        "columns": columns,
+        "dictionaries": dictionaries,
+    }
+
+
+def _dictionary_encode(values):
+    dictionary = list(dict.fromkeys(values))
+    index = {value: i for i, value in enumerate(dictionary)}
+    return dictionary, list(map(index.__getitem__, values))
+
+
+def _day_offsets(values, base):
+    # Boards hold many rows per day, so each distinct date is converted once
+    offsets = {value: (getdate(value) - base).days if value else None for value in set(values)}
+    return list(map(offsets.__getitem__, values))
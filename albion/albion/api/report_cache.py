@@ -0,0 +1,103 @@
+import hashlib
+import json
+
+import frappe
+from frappe.utils import getdate
+
+REPORT_CACHE_PREFIX = "albion:report:"
+# Bumped on every write that can change a report; part of every result key
+GENERATION_KEY = "albion:report_generation"
+STATS_KEY = "albion:report_cache_stats"
+# Results of older generations are never read again, so they only need to expire
+REPORT_CACHE_TTL = 6 * 60 * 60
+
+
+def cached_report(endpoint, fn, **filters):
+    """Return fn(**filters), cached per endpoint, filter set and generation.
+
+    Filters are normalised for the key (empty values dropped, dates as
+    YYYY-MM-DD), so equivalent requests from different users share a result.
+    Any write to Machine Operation, Shift Allocation, Shift, Machine or Order
+    Tracking bumps the generation, so a cached result is never older than the
+    plan or the recorded output.
+    """
+    key = f"{REPORT_CACHE_PREFIX}{endpoint}:{get_report_generation()}:{_filter_hash(filters)}"
+    result = frappe.cache.get_value(key)
+    if result is not None:
+        _count(endpoint, "hits")
+        return result
+
+    _count(endpoint, "misses")
+    result = fn(**filters)
+    frappe.cache.set_value(key, result, expires_in_sec=REPORT_CACHE_TTL)
+    return result
+
+
+def get_report_generation():
+    return int(frappe.cache.get(frappe.cache.make_key(GENERATION_KEY)) or 0)
+
+
+def bump_report_generation():
+    """Invalidate every cached report result once the current transaction commits.
+
+    Bumping inside the transaction would let a concurrent request read the
+    rows as they were before it and cache them under the new generation.
+    Repeated calls in one transaction queue a single bump.
+    """
+    if frappe.flags.report_generation_bump_queued:
+        return
+    frappe.flags.report_generation_bump_queued = True
+    frappe.db.after_commit.add(_bump_generation)
+    frappe.db.after_rollback.add(_clear_queued_bump)
+
+
+def _bump_generation():
+    _clear_queued_bump()
+    frappe.cache.incr(frappe.cache.make_key(GENERATION_KEY))
+
+
+def _clear_queued_bump():
+    frappe.flags.report_generation_bump_queued = False
+
+
+@frappe.whitelist()
+def get_report_cache_stats():
+    """Hit and miss counts per endpoint since the counters were last reset."""
+    frappe.only_for("System Manager")
+    counts = {
+        field.decode() if isinstance(field, bytes) else field: int(value)
+        for field, value in (frappe.cache.hgetall(frappe.cache.make_key(STATS_KEY)) or {}).items()
+    }
+    endpoints = {}
+    for field, value in counts.items():
+        endpoint, kind = field.rsplit(":", 1)
+        endpoints.setdefault(endpoint, {"hits": 0, "misses": 0})[kind] = value
+    for stats in endpoints.values():
+        requests = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] * 100 / requests, 1) if requests else 0
+    return {"generation": get_report_generation(), "endpoints": endpoints}
+
+
+@frappe.whitelist()
+def reset_report_cache_stats():
+    frappe.only_for("System Manager")
+    frappe.cache.delete(frappe.cache.make_key(STATS_KEY))
+
+
+def _count(endpoint, kind):
+    frappe.cache.hincrby(frappe.cache.make_key(STATS_KEY), f"{endpoint}:{kind}", 1)
+
+
+def _filter_hash(filters):
+    normalised = {}
+    for name, value in filters.items():
+        if value is None or value == "" or value == []:
+            continue
+        if name.endswith("_date"):
+            value = str(getdate(value))
+        elif not isinstance(value, list | dict):
+            # "500" from a query string and 500 from JSON are the same filter
+            value = str(value)
+        normalised[name] = value
+    payload = json.dumps(normalised, sort_keys=True, default=str)
+    return hashlib.md5(payload.encode()).hexdigest()
@@ -0,0 +1,94 @@
+import csv
+import os
+import shutil
+import tempfile
+
+import frappe
+from frappe import _
+from frappe.utils import nowdate
+from werkzeug.wrappers import Response
+from werkzeug.wsgi import wrap_file
+
+# file_format -> (extension, mimetype)
+EXPORT_FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "Excel": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+}
+
+
+def export_rows(title, columns, rows, file_format="CSV", save_as_file=False):
+    """Write report rows to a CSV or XLSX file and hand it back.
+
+    columns: [(key, label)] in output order
+    rows: any iterable of dicts, typically a generator reading keyset pages
+
+    Rows are written to a temporary file as they arrive (openpyxl in
+    write-only mode for Excel), so only one page is ever held in memory.
+    Returns a streaming download response, or {name, file_url} of a private
+    File with save_as_file.
+    """
+    if file_format not in EXPORT_FORMATS:
+        frappe.throw(_("Unknown export format: {0}").format(file_format))
+    extension, mimetype = EXPORT_FORMATS[file_format]
+
+    fd, path = tempfile.mkstemp(suffix=f".{extension}")
+    os.close(fd)
+    try:
+        writer = _write_xlsx if extension == "xlsx" else _write_csv
+        writer(path, title, columns, rows)
+    except Exception:
+        os.remove(path)
+        raise
+
+    filename = f"{frappe.scrub(title)}_{nowdate()}.{extension}"
+    if save_as_file:
+        return _save_private_file(path, filename)
+    return _download_response(path, filename, mimetype)
+
+
+def _write_csv(path, title, columns, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow([_(label) for _key, label in columns])
+        for row in rows:
+            writer.writerow([row.get(key) for key, _label in columns])
+
+
+def _write_xlsx(path, title, columns, rows):
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title[:31])
+    sheet.append([_(label) for _key, label in columns])
+    for row in rows:
+        sheet.append([row.get(key) for key, _label in columns])
+    workbook.save(path)
+
+
+def _save_private_file(path, filename):
+    # Move the finished file into place instead of reading it back into memory
+    filename = f"{frappe.generate_hash(length=8)}_{filename}"
+    target = frappe.get_site_path("private", "files", filename)
+    shutil.move(path, target)
+    file_doc = frappe.get_doc({
+        "doctype": "File",
+        "file_name": filename,
+        "file_url": f"/private/files/{filename}",
+        "file_size": os.path.getsize(target),
+        "is_private": 1,
+    })
+    file_doc.insert(ignore_permissions=True)
+    return {"name": file_doc.name, "file_url": file_doc.file_url}
+
+
+def _download_response(path, filename, mimetype):
+    fileobj = open(path, "rb")
+    # The open handle keeps the data readable until the response is sent
+    os.remove(path)
+    response = Response(
+        wrap_file(frappe.local.request.environ, fileobj),
+        mimetype=mimetype,
+        direct_passthrough=True,
+    )
+    response.headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
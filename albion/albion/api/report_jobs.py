@@ -0,0 +1,98 @@
+import frappe
+from frappe import _
+
+JOB_CACHE_PREFIX = "albion:report_job:"
+RESULT_CACHE_PREFIX = "albion:report_job_result:"
+# Realtime event carrying {job, status, progress, file_url?, error?}
+JOB_EVENT = "albion_report_job"
+JOB_TIMEOUT = 60 * 60
+# Job state and results are kept for a day after the job was queued
+JOB_TTL_SECONDS = 24 * 60 * 60
+
+
+def enqueue_report(method, **filters):
+    """Run a report function on the long queue instead of inside the request.
+
+    method: dotted path of a report function that takes the filters plus a
+    `progress(done, total)` callback. Returns {"job": name}; poll it with
+    get_report_job or listen for JOB_EVENT.
+    """
+    job = frappe.generate_hash(length=12)
+    _save_state(job, {"status": "Queued", "progress": 0, "method": method, "user": frappe.session.user})
+    frappe.enqueue(
+        "albion.albion.api.report_jobs.run_report_job",
+        queue="long",
+        timeout=JOB_TIMEOUT,
+        job=job,
+        report_method=method,
+        filters=filters,
+    )
+    return {"job": job}
+
+
+def run_report_job(job, report_method, filters):
+    state = _get_state(job)
+    progress = JobProgress(job, state)
+    progress.update("Running", 0)
+    try:
+        result = frappe.get_attr(report_method)(**filters, progress=progress)
+    except Exception as e:
+        frappe.log_error(title="Albion Report Job Failed")
+        state["error"] = str(e)
+        progress.update("Failed", state["progress"])
+        return
+
+    if isinstance(result, dict) and result.get("file_url"):
+        # Exports are already stored as a private File
+        state["file_url"] = result["file_url"]
+    else:
+        frappe.cache.set_value(RESULT_CACHE_PREFIX + job, result, expires_in_sec=JOB_TTL_SECONDS)
+    progress.update("Completed", 100)
+
+
+@frappe.whitelist()
+def get_report_job(job):
+    """Status of a report job: {job, status, progress, error?, file_url?, result?}.
+    result is only included once the job has completed.
+    """
+    state = _get_state(job)
+    if state["user"] != frappe.session.user and "System Manager" not in frappe.get_roles():
+        frappe.throw(_("Not permitted"), frappe.PermissionError)
+
+    response = {"job": job, **{k: v for k, v in state.items() if k not in ("method", "user")}}
+    if state["status"] == "Completed" and not state.get("file_url"):
+        response["result"] = frappe.cache.get_value(RESULT_CACHE_PREFIX + job)
+    return response
+
+
+class JobProgress:
+    """Progress callback handed to report functions; publishes whole-percent changes only."""
+
+    def __init__(self, job, state):
+        self.job = job
+        self.state = state
+
+    def __call__(self, done, total):
+        percent = min(99, int(done * 100 / total)) if total else 0
+        if percent != self.state["progress"]:
+            self.update(self.state["status"], percent)
+
+    def update(self, status, percent):
+        self.state.update(status=status, progress=percent)
+        _save_state(self.job, self.state)
+        frappe.publish_realtime(
+            JOB_EVENT,
+            {"job": self.job, **{k: v for k, v in self.state.items() if k not in ("method", "user")}},
+            user=self.state["user"],
+        )
+
+
+def _get_state(job):
+    state = frappe.cache.get_value(JOB_CACHE_PREFIX + job)
+    if not state:
+        frappe.throw(_("Report job {0} not found or expired").format(job), frappe.DoesNotExistError)
+    return state
+
+
+def _save_state(job, state):
+    frappe.cache.set_value(JOB_CACHE_PREFIX + job, state, expires_in_sec=JOB_TTL_SECONDS)
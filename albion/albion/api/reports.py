@@ -1,100 +1,262 @@
 import frappe
+import numpy as np
 from frappe import _
-from datetime import date, timedelta
+from frappe.utils import add_days, cint, date_diff, getdate, today
 
-from albion.albion.page.capacity_planning.capacity_planning import (
-    _get_best_calendar_for_date,
-    _get_calendar_data,
-)
+from albion.albion.api.report_cache import cached_report
+from albion.albion.api.report_export import export_rows
+from albion.albion.api.report_jobs import enqueue_report
+from albion.albion.page.capacity_planning.capacity_grid import CapacityGrid
+
+
+# Grouping key of each production report mode as (column, SQL expression).
+# Rows are grouped, ordered and paged on the key; missing values are keyed
+# as "" so the key always compares, and sent back as None.
+PRODUCTION_KEYS = {
+    "style": (("style", "IFNULL(dp.style, '')"),),
+    "machine": (("machine_id", "m.machine_id"),),
+    None: (
+        ("machine_id", "m.machine_id"),
+        ("order", "IFNULL(dp.`order`, '')"),
+        ("style", "IFNULL(dp.style, '')"),
+        ("process_name", "IFNULL(dp.process_name, '')"),
+        ("colour", "IFNULL(dp.colour, '')"),
+        ("size", "IFNULL(dp.size, '')"),
+    ),
+}
+# Columns each mode returns next to its key
+PRODUCTION_VALUES = {
+    "style": ("SUM(dp.quantity) AS total_quantity",),
+    "machine": ("m.machine_name", "SUM(dp.quantity) AS total_quantity"),
+    None: ("m.machine_name", "SUM(dp.quantity) AS total_quantity", "SUM(dp.allocated_minutes) AS total_minutes"),
+}
+# Export columns as (column, label)
+PRODUCTION_COLUMNS = {
+    "style": (("style", "Style"), ("total_quantity", "Quantity")),
+    "machine": (("machine_id", "Machine"), ("machine_name", "Machine Name"), ("total_quantity", "Quantity")),
+    None: (
+        ("machine_id", "Machine"),
+        ("machine_name", "Machine Name"),
+        ("order", "Order"),
+        ("style", "Style"),
+        ("process_name", "Process"),
+        ("colour", "Colour"),
+        ("size", "Size"),
+        ("total_quantity", "Quantity"),
+        ("total_minutes", "Minutes"),
+    ),
+}
+EXPORT_PAGE_LENGTH = 5000
+
+# Availability bucket -> key of a date's bucket
+AVAILABILITY_BUCKETS = {
+    "day": lambda d: str(d),
+    "week": lambda d: "{}-W{:02d}".format(*d.isocalendar()[:2]),
+    "month": lambda d: d.strftime("%Y-%m"),
+}
+AVAILABILITY_GROUPS = ("machine", "machine_frame", "plant")
 
 
 @frappe.whitelist()
-def get_production_report(start_date, end_date, machine=None, style=None, process=None, order=None, group_by=None):
-    """Aggregated production data from Machine Operation for a date range.
+def get_production_report(start_date, end_date, machine=None, style=None, process=None, order=None,
+                          group_by=None, page_length=None, after=None, run_async=0):
+    """Aggregated production data for a date range, read from the Daily Production rollup.
 
-    Groups by machine, order, style, process, colour, size and returns
+    Groups by machine, order, style, process, colour and size and returns
     SUM(quantity) and SUM(allocated_minutes).
 
     Optional group_by: "style" or "machine" for coarser aggregation.
+
+    With page_length, one page is returned as {rows, next_cursor}, ordered by
+    the grouping key; pass next_cursor back as `after` for the following page
+    (it is None on the last one). Totals come from get_production_totals.
+
+    Results are cached per filter set until the plan changes (see report_cache).
+    With run_async the report is built on the long queue and {job} is returned
+    instead (see report_jobs).
+    """
+    filters = dict(
+        start_date=start_date, end_date=end_date, machine=machine, style=style, process=process,
+        order=order, group_by=group_by, page_length=page_length, after=after,
+    )
+    if cint(run_async):
+        return enqueue_report("albion.albion.api.reports._get_production_report", **filters)
+    return cached_report("get_production_report", _get_production_report, **filters)
+
+
+def _get_production_report(start_date, end_date, machine=None, style=None, process=None, order=None,
+                           group_by=None, page_length=None, after=None, progress=None):
+    filters = _production_filters(start_date, end_date, machine, style, process, order)
+    group_by = _production_group(group_by)
+    if not cint(page_length):
+        if progress:
+            return list(iter_production_rows(filters, group_by, progress=progress))
+        return _production_rows(filters, group_by)
+
+    page_length = cint(page_length)
+    rows = _production_rows(filters, group_by, after=frappe.parse_json(after), limit=page_length + 1)
+    next_cursor = None
+    if len(rows) > page_length:
+        rows = rows[:page_length]
+        next_cursor = _production_cursor(rows[-1], group_by)
+    return {"rows": rows, "next_cursor": next_cursor}
+
+
+@frappe.whitelist()
+def get_production_totals(start_date, end_date, machine=None, style=None, process=None, order=None,
+                          group_by=None):
+    """Totals for a production report in one aggregate query:
+    {total_quantity, total_minutes, machines, rows}, rows being the number of report rows.
+    Cached like get_production_report.
+    """
+    return cached_report(
+        "get_production_totals", _get_production_totals,
+        start_date=start_date, end_date=end_date, machine=machine, style=style, process=process,
+        order=order, group_by=group_by,
+    )
+
+
+def _get_production_totals(start_date, end_date, machine=None, style=None, process=None, order=None,
+                           group_by=None):
+    filters = _production_filters(start_date, end_date, machine, style, process, order)
+    return _production_totals(filters, _production_group(group_by))
+
+
+def _production_totals(filters, group_by):
+    conditions, params = filters
+    key = ", ".join(expr for _column, expr in PRODUCTION_KEYS[group_by])
+    totals = frappe.db.sql(
+        f"""
+        SELECT
+            IFNULL(SUM(dp.quantity), 0) AS total_quantity,
+            IFNULL(SUM(dp.allocated_minutes), 0) AS total_minutes,
+            COUNT(DISTINCT dp.machine) AS machines,
+            COUNT(DISTINCT {key}) AS `rows`
+        FROM `tabDaily Production` dp
+        JOIN `tabMachine` m ON m.name = dp.machine
+        WHERE {" AND ".join(conditions)}
+        """,
+        params,
+        as_dict=True,
+    )
+    return totals[0]
+
+
+@frappe.whitelist()
+def export_production_report(start_date, end_date, machine=None, style=None, process=None, order=None,
+                             group_by=None, file_format="CSV", save_as_file=0, run_async=0):
+    """Export a production report as CSV or Excel, reading it page by page.
+
+    The file is streamed back as a download, or kept as a private File with
+    save_as_file (returns {name, file_url}). Memory stays flat however many
+    rows the report has. With run_async the export is written on the long
+    queue as a private File and {job} is returned.
+    """
+    filters = dict(
+        start_date=start_date, end_date=end_date, machine=machine, style=style, process=process,
+        order=order, group_by=group_by, file_format=file_format,
+    )
+    if cint(run_async):
+        return enqueue_report("albion.albion.api.reports._export_production_report", **filters, save_as_file=1)
+    return _export_production_report(**filters, save_as_file=save_as_file)
+
+
+def _export_production_report(start_date, end_date, machine=None, style=None, process=None, order=None,
+                              group_by=None, file_format="CSV", save_as_file=0, progress=None):
+    filters = _production_filters(start_date, end_date, machine, style, process, order)
+    group_by = _production_group(group_by)
+    return export_rows(
+        _("Production Report"),
+        PRODUCTION_COLUMNS[group_by],
+        iter_production_rows(filters, group_by, progress=progress),
+        file_format=file_format,
+        save_as_file=cint(save_as_file),
+    )
+
+
+def iter_production_rows(filters, group_by, page_length=EXPORT_PAGE_LENGTH, progress=None):
+    """Yield every report row, one keyset page in memory at a time.
+    progress: optional progress(done, total) callback, called after each page
     """
-    conditions = ["mo.operation_date BETWEEN %(start_date)s AND %(end_date)s"]
+    total = _production_totals(filters, group_by)["rows"] if progress else 0
+    done = 0
+    after = None
+    while True:
+        rows = _production_rows(filters, group_by, after=after, limit=page_length)
+        yield from rows
+        done += len(rows)
+        if progress:
+            progress(done, total)
+        if len(rows) < page_length:
+            return
+        after = _production_cursor(rows[-1], group_by)
+
+
+def _production_filters(start_date, end_date, machine=None, style=None, process=None, order=None):
+    conditions = ["dp.operation_date BETWEEN %(start_date)s AND %(end_date)s"]
     params = {"start_date": start_date, "end_date": end_date}
 
     if machine:
-        conditions.append("mo.machine = %(machine)s")
+        conditions.append("dp.machine = %(machine)s")
         params["machine"] = machine
     if style:
-        conditions.append("mo.style = %(style)s")
+        conditions.append("dp.style = %(style)s")
         params["style"] = style
     if process:
-        conditions.append("mo.process_name = %(process)s")
+        conditions.append("dp.process_name = %(process)s")
         params["process"] = process
     if order:
-        conditions.append("mo.`order` = %(order)s")
+        conditions.append("dp.`order` = %(order)s")
         params["order"] = order
+    return conditions, params
 
-    where = " AND ".join(conditions)
-
-    if group_by == "style":
-        rows = frappe.db.sql(
-            f"""
-            SELECT
-                mo.style,
-                SUM(mo.quantity) AS total_quantity
-            FROM `tabMachine Operation` mo
-            JOIN `tabMachine` m ON m.name = mo.machine
-            WHERE {where}
-            GROUP BY mo.style
-            ORDER BY mo.style
-            """,
-            params,
-            as_dict=True,
-        )
-    elif group_by == "machine":
-        rows = frappe.db.sql(
-            f"""
-            SELECT
-                m.machine_id,
-                m.machine_name,
-                SUM(mo.quantity) AS total_quantity
-            FROM `tabMachine Operation` mo
-            JOIN `tabMachine` m ON m.name = mo.machine
-            WHERE {where}
-            GROUP BY m.machine_id, m.machine_name
-            ORDER BY m.machine_id
-            """,
-            params,
-            as_dict=True,
-        )
-    else:
-        rows = frappe.db.sql(
-            f"""
-            SELECT
-                m.machine_id,
-                m.machine_name,
-                mo.`order`,
-                mo.style,
-                mo.process_name,
-                mo.colour,
-                mo.size,
-                SUM(mo.quantity) AS total_quantity,
-                SUM(mo.allocated_minutes) AS total_minutes
-            FROM `tabMachine Operation` mo
-            JOIN `tabMachine` m ON m.name = mo.machine
-            WHERE {where}
-            GROUP BY m.machine_id, m.machine_name, mo.`order`, mo.style,
-                     mo.process_name, mo.colour, mo.size
-            ORDER BY m.machine_id, mo.`order`, mo.style
-            """,
-            params,
-            as_dict=True,
-        )
 
+def _production_group(group_by):
+    group_by = group_by or None
+    if group_by not in PRODUCTION_KEYS:
+        frappe.throw(_("Unknown group_by: {0}").format(group_by))
+    return group_by
+
+
+def _production_rows(filters, group_by, after=None, limit=None):
+    conditions, params = list(filters[0]), dict(filters[1])
+    key = PRODUCTION_KEYS[group_by]
+    key_exprs = [expr for _column, expr in key]
+    if after:
+        if len(after) != len(key):
+            frappe.throw(_("Invalid report cursor"))
+        placeholders = ", ".join(f"%(after_{i})s" for i in range(len(key)))
+        conditions.append(f"({', '.join(key_exprs)}) > ({placeholders})")
+        params.update({f"after_{i}": value for i, value in enumerate(after)})
+
+    group = [*key_exprs, "m.machine_name"] if "m.machine_name" in PRODUCTION_VALUES[group_by] else key_exprs
+    rows = frappe.db.sql(
+        f"""
+        SELECT
+            {", ".join(f"{expr} AS `{column}`" for column, expr in key)},
+            {", ".join(PRODUCTION_VALUES[group_by])}
+        FROM `tabDaily Production` dp
+        JOIN `tabMachine` m ON m.name = dp.machine
+        WHERE {" AND ".join(conditions)}
+        GROUP BY {", ".join(group)}
+        ORDER BY {", ".join(key_exprs)}
+        {f"LIMIT {cint(limit)}" if limit else ""}
+        """,
+        params,
+        as_dict=True,
+    )
+    for row in rows:
+        for column, _expr in key:
+            row[column] = row[column] or None
     return rows
 
 
+def _production_cursor(row, group_by):
+    return [row[column] if row[column] is not None else "" for column, _expr in PRODUCTION_KEYS[group_by]]
+
+
 @frappe.whitelist()
-def get_machine_availability(start_date, end_date):
+def get_machine_availability(start_date, end_date, bucket=None, group=None, columnar=0, run_async=0):
     """Per-machine, per-date capacity vs used minutes.
 
     Returns:
@@ -103,101 +265,331 @@ def get_machine_availability(start_date, end_date):
             dates: [str],
             availability: { machine_id: { date_str: {capacity, used, available} } }
         }
+
+    With bucket ("day", "week" for ISO weeks, "month") or group ("machine",
+    "machine_frame", "plant"), the minutes are summed on the server instead and
+    returned as arrays, one row per group and one column per bucket:
+        {
+            buckets: [{key, start_date, end_date}],
+            groups: [{key, label}],
+            capacity: [[int]], used: [[float]], available: [[int]]
+        }
+    available sums each day's free minutes, so an overloaded day does not
+    cancel free time elsewhere in its bucket.
+
+    With columnar (per-day, per-machine only) the cells are sent as matrices:
+        {
+            columnar: 1, base_date: str, days: int,
+            machines: [{machine_id, machine_name}],
+            capacity: [[int]], used: [[float]], available: [[int]]
+        }
+
+    Results are cached per filter set until the plan or a calendar changes.
+    With run_async the result is built on the long queue and {job} is returned.
     """
+    filters = dict(start_date=start_date, end_date=end_date, bucket=bucket, group=group, columnar=cint(columnar))
+    if cint(run_async):
+        return enqueue_report("albion.albion.api.reports._get_machine_availability", **filters)
+    return cached_report("get_machine_availability", _get_machine_availability, **filters)
+
+
+def _get_machine_availability(start_date, end_date, bucket=None, group=None, columnar=0, progress=None):
     machines = frappe.get_all(
         "Machine",
-        fields=["name", "machine_id", "machine_name"],
+        fields=["name", "machine_id", "machine_name", "machine_frame"],
         order_by="machine_id",
     )
 
-    # Build date list
-    d = _parse_date(start_date)
-    end = _parse_date(end_date)
-    dates = []
-    while d <= end:
-        dates.append(str(d))
-        d += timedelta(days=1)
-
-    # Pre-fetch used minutes: machine × date
-    used_map = {}
-    if dates:
-        rows = frappe.db.sql(
-            """
-            SELECT machine, operation_date, SUM(allocated_minutes) AS used
-            FROM `tabMachine Operation`
-            WHERE operation_date BETWEEN %(start)s AND %(end)s
-            GROUP BY machine, operation_date
-            """,
-            {"start": start_date, "end": end_date},
-            as_dict=True,
-        )
-        for r in rows:
-            used_map.setdefault(r.machine, {})[str(r.operation_date)] = r.used or 0
-
-    # Build availability grid
+    # Read the Machine Day ledger when it covers the window, else compute live
+    machine_names = [m.name for m in machines]
+    grid = CapacityGrid.from_ledger(start_date, end_date, machine_names) or CapacityGrid(
+        start_date, end_date, machines=machine_names
+    )
+    if progress:
+        progress(1, 2)
+    capacity = grid.report_capacity
+    used = grid.used
+    available = np.maximum(0, capacity - used)
+
+    if bucket or group:
+        return _bucket_availability(machines, grid.dates, capacity, used, available, bucket or "day", group or "machine")
+
+    if columnar:
+        # Row i of each matrix is machines[i], column j is base_date + j days
+        return {
+            "columnar": 1,
+            "base_date": str(getdate(start_date)),
+            "days": len(grid.dates),
+            "machines": [{"machine_id": m.machine_id, "machine_name": m.machine_name} for m in machines],
+            "capacity": capacity.tolist(),
+            "used": used.tolist(),
+            "available": available.tolist(),
+        }
+
+    # Only the final JSON shape is built per cell
+    capacity, used, available = capacity.tolist(), used.tolist(), available.tolist()
     availability = {}
-    for m in machines:
-        mid = m.machine_id
-        availability[mid] = {}
-        for date_str in dates:
-            capacity = _get_date_capacity(date_str, m.name)
-            used = used_map.get(m.name, {}).get(date_str, 0)
-            # Off day with actual allocations → get real capacity
-            if capacity == 0 and used > 0:
-                capacity = _get_date_capacity(date_str, m.name, skip_weekday_check=True)
-            availability[mid][date_str] = {
-                "capacity": capacity,
-                "used": used,
-                "available": max(0, capacity - used),
-            }
+    for i, m in enumerate(machines):
+        availability[m.machine_id] = {
+            date_str: {"capacity": c, "used": u, "available": a}
+            for date_str, c, u, a in zip(grid.dates, capacity[i], used[i], available[i], strict=True)
+        }
 
     return {
         "machines": [{"machine_id": m.machine_id, "machine_name": m.machine_name} for m in machines],
-        "dates": dates,
+        "dates": grid.dates,
         "availability": availability,
     }
 
 
-# ---------------------------------------------------------------------------
-# Helpers
-# ---------------------------------------------------------------------------
+def _bucket_availability(machines, dates, capacity, used, available, bucket, group):
+    if bucket not in AVAILABILITY_BUCKETS:
+        frappe.throw(_("Unknown bucket: {0}").format(bucket))
+    if group not in AVAILABILITY_GROUPS:
+        frappe.throw(_("Unknown group: {0}").format(group))
 
-DAY_NAMES = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+    keys, starts, ends = _date_buckets(dates, bucket)
 
+    groups, machine_groups = {}, []
+    for m in machines:
+        if group == "machine":
+            key, label = m.machine_id, m.machine_name or m.machine_id
+        elif group == "machine_frame":
+            key, label = m.machine_frame or "", m.machine_frame or _("No Frame")
+        else:
+            key, label = "plant", _("All Machines")
+        groups.setdefault(key, label)
+        machine_groups.append(key)
+    group_index = {key: i for i, key in enumerate(groups)}
+    rows = np.array([group_index[key] for key in machine_groups], dtype=np.int64)
 
-def _parse_date(val):
-    if isinstance(val, date):
-        return val
-    return date.fromisoformat(str(val))
+    def total(values):
+        out = np.zeros((len(groups), len(starts)), dtype=np.float64)
+        if len(rows) and starts:
+            np.add.at(out, rows, np.add.reduceat(values, starts, axis=1))
+        return out
+
+    return {
+        "bucket": bucket,
+        "group": group,
+        "buckets": [
+            {"key": keys[start], "start_date": dates[start], "end_date": dates[end - 1]}
+            for start, end in zip(starts, ends, strict=True)
+        ],
+        "groups": [{"key": key, "label": label} for key, label in groups.items()],
+        "capacity": total(capacity).astype(np.int64).tolist(),
+        "used": np.round(total(used), 1).tolist(),
+        "available": total(available).astype(np.int64).tolist(),
+    }
 
 
-def _get_date_capacity(date_str, machine_name, skip_weekday_check=False):
-    """Resolve the effective capacity in minutes for a machine on a given date."""
-    cal_name, _source = _get_best_calendar_for_date(date_str, machine_name)
-    if not cal_name:
-        return 0
+def _date_buckets(dates, bucket):
+    """Bucket keys of consecutive dates, plus where each bucket's run starts and ends."""
+    # Dates are consecutive, so each bucket is one run of columns
+    keys = [AVAILABILITY_BUCKETS[bucket](getdate(d)) for d in dates]
+    starts = [i for i, key in enumerate(keys) if i == 0 or key != keys[i - 1]]
+    ends = [*starts[1:], len(keys)]
+    return keys, starts, ends
 
-    cal = _get_calendar_data(cal_name)
 
-    # Check if it's a working day (unless explicitly skipped)
-    if not skip_weekday_check:
-        d = _parse_date(date_str)
-        day_flag = DAY_NAMES[d.weekday()]
-        if not cal.get(day_flag):
-            return 0  # off day
+@frappe.whitelist()
+def get_variance_report(start_date, end_date, bucket=None, order=None, style=None, process=None,
+                        as_of=None, behind_only=0):
+    """Planned (allocated) vs actual (Order Tracking) quantity per order line and date bucket.
 
-    base = cal.get("total_duration_minutes") or 0
+    Planned is the quantity allocated to the last process of each style in the
+    order, read from the Daily Production rollup; pass process to compare that
+    process instead. Actual is the Order Tracking quantity by completion_date.
+    Only open orders (submitted and not Closed, as in the re-plan) are included
+    unless order is given.
 
-    # Apply alterations for this date + machine
-    for alt in cal.get("alterations") or []:
-        if alt["date"] != date_str:
-            continue
-        # Machine-specific alteration
-        if alt.get("machine") and alt["machine"] != machine_name:
+    Returns:
+        {
+            bucket, as_of,
+            buckets: [{key, start_date, end_date}],
+            lines: [{
+                order, style, colour, size,
+                planned_qty, planned_minutes, actual_qty, variance,
+                planned: [int], actual: [int],
+                planned_to_date, actual_to_date, behind
+            }],
+            totals: {lines, behind, planned_qty, actual_qty}
+        }
+    planned and actual hold one value per bucket. planned_to_date and
+    actual_to_date count everything up to as_of (today by default, at most
+    end_date), work before start_date included; a line is behind when less
+    has been completed by then than was planned.
+
+    Results are cached per filter set until the plan or tracking changes.
+    """
+    return cached_report(
+        "get_variance_report", _get_variance_report,
+        start_date=start_date, end_date=end_date, bucket=bucket or "day", order=order, style=style,
+        process=process, as_of=str(min(getdate(as_of or today()), getdate(end_date))),
+        behind_only=cint(behind_only),
+    )
+
+
+def _get_variance_report(start_date, end_date, bucket, order=None, style=None, process=None, as_of=None,
+                         behind_only=0):
+    if bucket not in AVAILABILITY_BUCKETS:
+        frappe.throw(_("Unknown bucket: {0}").format(bucket))
+    start_date, end_date = getdate(start_date), getdate(end_date)
+    dates = [str(add_days(start_date, i)) for i in range(date_diff(end_date, start_date) + 1)]
+    keys, starts, ends = _date_buckets(dates, bucket)
+    bucket_of = {date: column for column, (start, end) in enumerate(zip(starts, ends, strict=True)) for date in dates[start:end]}
+
+    params = {"start_date": start_date, "end_date": end_date, "as_of": getdate(as_of), "order": order, "style": style}
+    planned = _variance_planned(params, process)
+    actual = _variance_actual(params)
+
+    # One line per order/style/colour/size seen on either side
+    line_keys = sorted(
+        {(r.order, r.style, r.colour, r.size) for r in planned + actual},
+        key=lambda key: tuple(value or "" for value in key),
+    )
+    line_index = {key: i for i, key in enumerate(line_keys)}
+
+    def line_totals(rows, field):
+        lines = np.array([line_index[(r.order, r.style, r.colour, r.size)] for r in rows], dtype=np.int64)
+        out = np.zeros(len(line_keys), dtype=np.float64)
+        if len(rows):
+            np.add.at(out, lines, np.array([r[field] or 0 for r in rows], dtype=np.float64))
+        return out
+
+    def bucket_totals(rows, field):
+        # Rows before start_date have no bucket
+        rows = [r for r in rows if r.bucket_date is not None]
+        lines = np.array([line_index[(r.order, r.style, r.colour, r.size)] for r in rows], dtype=np.int64)
+        columns = np.array([bucket_of[str(r.bucket_date)] for r in rows], dtype=np.int64)
+        out = np.zeros((len(line_keys), len(starts)), dtype=np.float64)
+        if len(rows):
+            np.add.at(out, (lines, columns), np.array([r[field] or 0 for r in rows], dtype=np.float64))
+        return out
+
+    planned_qty = bucket_totals(planned, "qty")
+    planned_minutes = bucket_totals(planned, "minutes")
+    actual_qty = bucket_totals(actual, "qty")
+    planned_to_date = line_totals(planned, "qty_to_date")
+    actual_to_date = line_totals(actual, "qty_to_date")
+    behind = planned_to_date > actual_to_date
+
+    planned_qty = planned_qty.astype(np.int64)
+    actual_qty = actual_qty.astype(np.int64)
+    planned_sums = planned_qty.sum(axis=1).tolist()
+    actual_sums = actual_qty.sum(axis=1).tolist()
+    minute_sums = np.round(planned_minutes.sum(axis=1), 1).tolist()
+    planned_qty, actual_qty = planned_qty.tolist(), actual_qty.tolist()
+    planned_to_date = planned_to_date.astype(np.int64).tolist()
+    actual_to_date = actual_to_date.astype(np.int64).tolist()
+    behind = behind.tolist()
+
+    lines = []
+    for i, (line_order, line_style, colour, size) in enumerate(line_keys):
+        if cint(behind_only) and not behind[i]:
             continue
-        if alt["alteration_type"] == "Overtime":
-            base += alt.get("minutes") or 0
-        elif alt["alteration_type"] == "Undertime":
-            base -= alt.get("minutes") or 0
+        lines.append({
+            "order": line_order,
+            "style": line_style,
+            "colour": colour or None,
+            "size": size or None,
+            "planned_qty": planned_sums[i],
+            "planned_minutes": minute_sums[i],
+            "actual_qty": actual_sums[i],
+            "variance": actual_sums[i] - planned_sums[i],
+            "planned": planned_qty[i],
+            "actual": actual_qty[i],
+            "planned_to_date": planned_to_date[i],
+            "actual_to_date": actual_to_date[i],
+            "behind": behind[i],
+        })
 
-    return max(0, base)
+    return {
+        "bucket": bucket,
+        "as_of": str(params["as_of"]),
+        "buckets": [
+            {"key": keys[start], "start_date": dates[start], "end_date": dates[end - 1]}
+            for start, end in zip(starts, ends, strict=True)
+        ],
+        "lines": lines,
+        "totals": {
+            "lines": len(line_keys),
+            "behind": sum(behind),
+            "planned_qty": sum(planned_sums),
+            "actual_qty": sum(actual_sums),
+        },
+    }
+
+
+def _variance_conditions(alias, params):
+    conditions = ["o.docstatus = 1"]
+    if params["order"]:
+        conditions.append(f"{alias}.`order` = %(order)s")
+    else:
+        conditions.append("IFNULL(o.status, '') != 'Closed'")
+    if params["style"]:
+        conditions.append(f"{alias}.style = %(style)s")
+    return conditions
+
+
+def _variance_planned(params, process=None):
+    """Allocated quantity and minutes per line and day; days before start_date are grouped as one
+    row with bucket_date NULL, kept for the to-date totals."""
+    conditions = ["dp.operation_date <= %(end_date)s", *_variance_conditions("dp", params)]
+    if process:
+        conditions.append("dp.process_name = %(process)s")
+        process_join = ""
+    else:
+        # A line's finished quantity is what its style's last process produces
+        process_join = """
+        JOIN `tabOrder Process` op ON op.parent = dp.`order` AND op.parenttype = 'Order'
+            AND op.style = dp.style AND op.process_name = dp.process_name
+            AND op.idx = (
+                SELECT MAX(last.idx) FROM `tabOrder Process` last
+                WHERE last.parent = op.parent AND last.parenttype = 'Order' AND last.style = op.style
+            )
+        """
+    return frappe.db.sql(
+        f"""
+        SELECT
+            dp.`order` AS `order`, dp.style AS style,
+            IFNULL(dp.colour, '') AS colour, IFNULL(dp.size, '') AS size,
+            CASE WHEN dp.operation_date >= %(start_date)s THEN dp.operation_date END AS bucket_date,
+            SUM(dp.quantity) AS qty,
+            SUM(dp.allocated_minutes) AS minutes,
+            SUM(CASE WHEN dp.operation_date <= %(as_of)s THEN dp.quantity ELSE 0 END) AS qty_to_date
+        FROM `tabDaily Production` dp
+        JOIN `tabOrder` o ON o.name = dp.`order`
+        {process_join}
+        WHERE {" AND ".join(conditions)}
+        GROUP BY dp.`order`, dp.style, IFNULL(dp.colour, ''), IFNULL(dp.size, ''), bucket_date
+        """,
+        {**params, "process": process},
+        as_dict=True,
+    )
+
+
+def _variance_actual(params):
+    """Completed quantity per line and day, grouped like _variance_planned. Tracking rows
+    without a completion_date only count towards the to-date totals."""
+    conditions = [
+        "(ot.completion_date IS NULL OR ot.completion_date <= %(end_date)s)",
+        *_variance_conditions("ot", params),
+    ]
+    return frappe.db.sql(
+        f"""
+        SELECT
+            ot.`order` AS `order`, ot.style AS style,
+            IFNULL(ot.colour, '') AS colour, IFNULL(ot.size, '') AS size,
+            CASE WHEN ot.completion_date >= %(start_date)s THEN ot.completion_date END AS bucket_date,
+            SUM(ot.quantity) AS qty,
+            SUM(CASE WHEN ot.completion_date IS NULL OR ot.completion_date <= %(as_of)s
+                THEN ot.quantity ELSE 0 END) AS qty_to_date
+        FROM `tabOrder Tracking` ot
+        JOIN `tabOrder` o ON o.name = ot.`order`
+        WHERE {" AND ".join(conditions)}
+        GROUP BY ot.`order`, ot.style, IFNULL(ot.colour, ''), IFNULL(ot.size, ''), bucket_date
+        """,
+        params,
+        as_dict=True,
+    )
@@ -0,0 +1,49 @@
+# Copyright (c) 2026, Essdee and Contributors
+# See license.txt
+
+from datetime import date
+
+from frappe.tests.utils import FrappeTestCase
+
+from albion.albion.api.columnar import encode_columns
+
+FIELDS = ("name", "machine_id", "colour", "operation_date", "quantity")
+ROWS = [
+	("MO-1", "M-2", "Red", date(2032, 3, 3), 5),
+	("MO-2", "M-1", None, "2032-03-01", 2),
+	("MO-3", "M-2", "Red", date(2032, 3, 1), 0),
+	("MO-4", "M-1", None, None, 1),
+]
+
+
+class TestEncodeColumns(FrappeTestCase):
+	def test_columns(self):
+		payload = encode_columns(
+			ROWS,
+			FIELDS,
+			"2032-03-01",
+			dictionary_fields=("machine_id", "colour"),
+			date_fields=("operation_date",),
+		)
+		self.assertEqual((payload["columnar"], payload["count"], payload["base_date"]), (1, 4, "2032-03-01"))
+		self.assertEqual(
+			payload["columns"],
+			{
+				"name": ["MO-1", "MO-2", "MO-3", "MO-4"],
+				"machine_id": [0, 1, 0, 1],
+				"colour": [0, 1, 0, 1],
+				"operation_date": [2, 0, 0, None],
+				"quantity": [5, 2, 0, 1],
+			},
+		)
+		# Dictionaries keep first-seen order, missing values included
+		self.assertEqual(payload["dictionaries"], {"machine_id": ["M-2", "M-1"], "colour": ["Red", None]})
+
+	def test_no_rows(self):
+		payload = encode_columns([], FIELDS, date(2032, 3, 1), dictionary_fields=("machine_id",))
+		self.assertEqual(payload["count"], 0)
+		self.assertEqual(payload["columns"], {field: [] for field in FIELDS})
+		self.assertEqual(payload["dictionaries"], {"machine_id": []})
+
+	def test_rows_must_match_fields(self):
+		self.assertRaises(ValueError, encode_columns, [("MO-1", "M-1")], FIELDS, "2032-03-01")
@@ -0,0 +1,48 @@
+# Copyright (c) 2026, Essdee and Contributors
+# See license.txt
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import getdate
+
+from albion.albion.api.report_cache import bump_report_generation, cached_report, get_report_generation
+
+
+class TestReportCache(FrappeTestCase):
+	def setUp(self):
+		# Results of earlier runs are still cached under the current generation
+		self.endpoint = f"test-{frappe.generate_hash(length=8)}"
+		self.calls = 0
+
+	def report(self, **filters):
+		self.calls += 1
+		return self.calls
+
+	def test_equivalent_filters_share_a_result(self):
+		self.assertEqual(cached_report(self.endpoint, self.report, start_date="2030-01-01", machine=None), 1)
+		self.assertEqual(cached_report(self.endpoint, self.report, start_date=getdate("2030-01-01")), 1)
+		self.assertEqual(cached_report(self.endpoint, self.report, start_date="2030-01-02"), 2)
+
+	def test_generation_moves_on_commit_only(self):
+		cached_report(self.endpoint, self.report, start_date="2030-01-01")
+		generation = get_report_generation()
+
+		bump_report_generation()
+		bump_report_generation()
+		self.assertEqual(get_report_generation(), generation)
+		self.assertEqual(cached_report(self.endpoint, self.report, start_date="2030-01-01"), 1)
+
+		frappe.db.after_commit.run()
+		self.assertEqual(get_report_generation(), generation + 1)
+		self.assertEqual(cached_report(self.endpoint, self.report, start_date="2030-01-01"), 2)
+
+	def test_rollback_drops_the_bump(self):
+		generation = get_report_generation()
+		bump_report_generation()
+		frappe.db.rollback()
+		self.assertEqual(get_report_generation(), generation)
+
+		# The next transaction can queue a bump again
+		bump_report_generation()
+		frappe.db.after_commit.run()
+		self.assertEqual(get_report_generation(), generation + 1)
@@ -0,0 +1,70 @@
+# Copyright (c) 2026, Essdee and Contributors
+# See license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from albion.albion.api import reports
+from albion.albion.api.report_jobs import enqueue_report, get_report_job
+
+MODULE = "albion.albion.api.test_report_jobs"
+
+
+def count_to(total, progress=None):
+	"""A report that reports progress on every row."""
+	rows = []
+	for i in range(total):
+		rows.append(i)
+		progress(i + 1, total)
+	return rows
+
+
+def broken_report(progress=None):
+	raise ValueError("no data")
+
+
+def run_inline(method, queue=None, timeout=None, **kwargs):
+	"""Stand-in for frappe.enqueue that runs the job before returning."""
+	frappe.get_attr(method)(**kwargs)
+
+
+class TestReportJobs(FrappeTestCase):
+	"""frappe.enqueue is patched to run each job inline, so it finishes before the call returns."""
+
+	def setUp(self):
+		enqueue = patch("frappe.enqueue", side_effect=run_inline)
+		self.enqueue = enqueue.start()
+		self.addCleanup(enqueue.stop)
+
+	def tearDown(self):
+		frappe.set_user("Administrator")
+
+	def test_job_completes_with_result(self):
+		job = enqueue_report(f"{MODULE}.count_to", total=4)["job"]
+		state = get_report_job(job)
+		self.assertEqual(state["status"], "Completed")
+		self.assertEqual(state["progress"], 100)
+		self.assertEqual(state["result"], [0, 1, 2, 3])
+		self.assertNotIn("method", state)
+		self.assertEqual(self.enqueue.call_args.kwargs["queue"], "long")
+
+	def test_failed_job_keeps_error(self):
+		job = enqueue_report(f"{MODULE}.broken_report")["job"]
+		state = get_report_job(job)
+		self.assertEqual(state["status"], "Failed")
+		self.assertEqual(state["error"], "no data")
+		self.assertNotIn("result", state)
+
+	def test_async_report_matches_sync(self):
+		start, end = "2030-01-01", "2030-01-07"
+		job = reports.get_machine_availability(start, end, run_async=1)["job"]
+		state = get_report_job(job)
+		self.assertEqual(state["status"], "Completed")
+		self.assertEqual(state["result"], reports._get_machine_availability(start, end))
+
+	def test_job_is_private_to_its_owner(self):
+		job = enqueue_report(f"{MODULE}.count_to", total=1)["job"]
+		frappe.set_user("Guest")
+		self.assertRaises(frappe.PermissionError, get_report_job, job)
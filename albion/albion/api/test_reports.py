@@ -0,0 +1,151 @@
+# Copyright (c) 2026, Essdee and Contributors
+# See license.txt
+
+import json
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from albion.albion.api.reports import (
+	_get_machine_availability,
+	_get_production_report,
+	_production_filters,
+	_production_group,
+	iter_production_rows,
+)
+from albion.albion.page.capacity_planning.test_calendar_resolver import make_calendars
+from albion.albion.page.capacity_planning.test_capacity_grid import make_operation as make_allocation
+
+START, END = "2033-06-01", "2033-06-30"
+
+
+def make_operation(machine, date, order, style, process, colour=None, size=None, quantity=1):
+	return frappe.get_doc({
+		"doctype": "Machine Operation",
+		"machine": machine,
+		"operation_date": date,
+		"order": order,
+		"style": style,
+		"process_name": process,
+		"colour": colour,
+		"size": size,
+		"quantity": quantity,
+		"allocated_minutes": quantity * 10,
+	}).insert(ignore_links=True)
+
+
+def pages(group_by, page_length):
+	rows, after = [], None
+	while True:
+		page = _get_production_report(
+			START, END, group_by=group_by, page_length=page_length, after=json.dumps(after) if after else None
+		)
+		rows += page["rows"]
+		after = page["next_cursor"]
+		if not after:
+			return rows
+
+
+class TestProductionReport(FrappeTestCase):
+	@classmethod
+	def setUpClass(cls):
+		super().setUpClass()
+		for machine in ("RP-M1", "RP-M2"):
+			frappe.get_doc({
+				"doctype": "Machine",
+				"machine_id": machine,
+				"machine_name": f"{machine} Name",
+				"machine_frame": "RP-F",
+			}).insert(ignore_links=True)
+		make_operation("RP-M1", "2033-06-01", "RP-O1", "RP-S1", "RP-P1", "RP-C1", "RP-L")
+		make_operation("RP-M1", "2033-06-01", "RP-O1", "RP-S1", "RP-P1")
+		make_operation("RP-M1", "2033-06-02", "RP-O1", None, "RP-P1", quantity=2)
+		make_operation("RP-M1", "2033-06-02", "RP-O1", None, "RP-P2", "RP-C1")
+		make_operation("RP-M2", "2033-06-03", "RP-O2", "RP-S2", "RP-P1")
+		make_operation("RP-M2", "2033-06-03", "RP-O1", "RP-S1", "RP-P1", "RP-C2", quantity=3)
+		make_operation("RP-M2", "2033-06-04", "RP-O1", "RP-S1", "RP-P1", "RP-C2", quantity=4)
+
+	def test_rows_group_missing_values_as_none(self):
+		rows = _get_production_report(START, END)
+		self.assertEqual(len(rows), 6)
+		keys = [(r.machine_id, r.style, r.process_name, r.colour, r.total_quantity) for r in rows]
+		self.assertIn(("RP-M1", None, "RP-P1", None, 2), keys)
+		self.assertIn(("RP-M2", "RP-C2", 7), [(r.machine_id, r.colour, r.total_quantity) for r in rows])
+		self.assertEqual(
+			[(r.style, r.total_quantity) for r in _get_production_report(START, END, group_by="style")],
+			[(None, 3), ("RP-S1", 9), ("RP-S2", 1)],
+		)
+
+	def test_pages_concatenate_to_the_full_report(self):
+		for group_by in (None, "style", "machine"):
+			full = _get_production_report(START, END, group_by=group_by)
+			for page_length in (1, 2, 4):
+				self.assertEqual(pages(group_by, page_length), full, (group_by, page_length))
+
+			filters, key = _production_filters(START, END), _production_group(group_by)
+			rows = iter_production_rows(filters, key, page_length=1)
+			self.assertEqual(list(rows), full)
+
+	def test_last_page_has_no_cursor(self):
+		page = _get_production_report(START, END, group_by="machine", page_length=2)
+		self.assertEqual(page["next_cursor"], None)
+		# A cursor from another grouping does not fit the key
+		after = json.dumps(["RP-M1"])
+		self.assertRaises(
+			frappe.ValidationError, _get_production_report, START, END, page_length=2, after=after
+		)
+
+
+WEEKS = ("2032-04-26", "2032-05-09")
+
+
+def by_group(result, *fields):
+	"""{group key: (values of each field)} of a bucketed availability result."""
+	return {group["key"]: tuple(result[f][i] for f in fields) for i, group in enumerate(result["groups"])}
+
+
+class TestMachineAvailability(FrappeTestCase):
+	"""Two AV-F machines on the 480 minute default calendar over ISO weeks 18 and 19 of 2032."""
+
+	@classmethod
+	def setUpClass(cls):
+		super().setUpClass()
+		make_calendars()
+		for machine in ("AV-M1", "AV-M2"):
+			frappe.get_doc({"doctype": "Machine", "machine_id": machine, "machine_frame": "AV-F"}).insert(
+				ignore_links=True
+			)
+		# An overloaded day does not take free minutes from the rest of its week
+		make_allocation("AV-M1", "2032-04-27", 600)
+		make_allocation("AV-M2", "2032-05-04", 100)
+
+	def test_weeks_per_machine(self):
+		result = _get_machine_availability(*WEEKS, bucket="week")
+		self.assertEqual(
+			result["buckets"],
+			[
+				{"key": "2032-W18", "start_date": "2032-04-26", "end_date": "2032-05-02"},
+				{"key": "2032-W19", "start_date": "2032-05-03", "end_date": "2032-05-09"},
+			],
+		)
+		groups = by_group(result, "capacity", "used", "available")
+		self.assertEqual(groups["AV-M1"], ([3360, 3360], [600, 0], [2880, 3360]))
+		self.assertEqual(groups["AV-M2"], ([3360, 3360], [0, 100], [3360, 3260]))
+
+	def test_months_per_frame(self):
+		result = _get_machine_availability(*WEEKS, bucket="month", group="machine_frame")
+		self.assertEqual([b["key"] for b in result["buckets"]], ["2032-04", "2032-05"])
+		groups = by_group(result, "capacity", "used", "available")
+		self.assertEqual(groups["AV-F"], ([4800, 8640], [600, 100], [4320, 8540]))
+
+	def test_plant_sums_every_machine(self):
+		machines = _get_machine_availability(*WEEKS, bucket="day")
+		plant = _get_machine_availability(*WEEKS, bucket="day", group="plant")
+		self.assertEqual(plant["groups"], [{"key": "plant", "label": "All Machines"}])
+		self.assertEqual(len(plant["buckets"]), 14)
+		totals = [sum(column) for column in zip(*machines["capacity"], strict=True)]
+		self.assertEqual(plant["capacity"], [totals])
+
+	def test_unknown_bucket_or_group(self):
+		self.assertRaises(frappe.ValidationError, _get_machine_availability, *WEEKS, bucket="year")
+		self.assertRaises(frappe.ValidationError, _get_machine_availability, *WEEKS, group="line")
@@ -0,0 +1,130 @@
+# Copyright (c) 2026, Essdee and contributors
+# For license information, please see license.txt
+
+import hashlib
+
+import frappe
+from frappe.model.document import Document
+from frappe.utils import cint, flt, getdate, now
+
+from albion.albion.api.report_cache import bump_report_generation
+
+BATCH_SIZE = 500
+# Grain of the rollup, in Machine Operation column names
+ROLLUP_KEY = ("operation_date", "machine", "order", "style", "process_name", "colour", "size")
+
+
+class DailyProduction(Document):
+    pass
+
+
+def on_doctype_update():
+    frappe.db.add_index("Daily Production", ["operation_date", "machine"], "operation_date_machine_index")
+    frappe.db.add_index("Daily Production", ["`order`", "style"], "order_style_index")
+
+
+def production_name(key):
+    """Row name for a ROLLUP_KEY tuple, so upserts can hit the primary key."""
+    return hashlib.md5("\x1f".join(str(value or "") for value in key).encode()).hexdigest()
+
+
+def production_key(row):
+    """ROLLUP_KEY tuple of a Machine Operation row or dict, with the date as a string."""
+    return tuple(
+        str(getdate(row.get(field))) if field == "operation_date" else row.get(field) or None
+        for field in ROLLUP_KEY
+    )
+
+
+def add_production_rows(deltas, rows, sign=1):
+    """Accumulate Machine Operation rows into deltas {key: [quantity, minutes]}."""
+    for row in rows:
+        if not row.get("machine") or not row.get("operation_date"):
+            continue
+        delta = deltas.setdefault(production_key(row), [0, 0.0])
+        delta[0] += sign * cint(row.get("quantity"))
+        delta[1] += sign * flt(row.get("allocated_minutes"))
+    return deltas
+
+
+def apply_production_deltas(deltas):
+    """Add quantities and minutes to the rollup: deltas is {key: (quantity, minutes)}.
+    Rows that drop to zero are removed so the table only holds days with work.
+    """
+    items = [(key, delta) for key, delta in deltas.items() if delta[0] or delta[1]]
+    if not items:
+        return
+
+    timestamp = now()
+    user = frappe.session.user
+    for start in range(0, len(items), BATCH_SIZE):
+        chunk = items[start:start + BATCH_SIZE]
+        names = [production_name(key) for key, _delta in chunk]
+        values = []
+        for name, (key, (quantity, minutes)) in zip(names, chunk, strict=True):
+            values.extend((name, timestamp, timestamp, user, user, *key, quantity, minutes))
+        placeholders = ", ".join(["(%s, %s, %s, %s, %s, 0, 0, %s, %s, %s, %s, %s, %s, %s, %s, %s)"] * len(chunk))
+        frappe.db.sql(
+            f"""
+            INSERT INTO `tabDaily Production`
+                (name, creation, modified, modified_by, owner, docstatus, idx,
+                 operation_date, machine, `order`, style, process_name, colour, size,
+                 quantity, allocated_minutes)
+            VALUES {placeholders}
+            ON DUPLICATE KEY UPDATE
+                quantity = quantity + VALUES(quantity),
+                allocated_minutes = allocated_minutes + VALUES(allocated_minutes),
+                modified = VALUES(modified),
+                modified_by = VALUES(modified_by)
+            """,
+            values,
+        )
+        frappe.db.sql(
+            """
+            DELETE FROM `tabDaily Production`
+            WHERE name IN %(names)s AND quantity = 0 AND ABS(allocated_minutes) < 0.001
+            """,
+            {"names": tuple(names)},
+        )
+
+
+def update_production(doc):
+    """Move a Machine Operation's quantity and minutes from its previous key to its current one."""
+    deltas = {}
+    before = doc.get_doc_before_save()
+    if before:
+        add_production_rows(deltas, [before], -1)
+    apply_production_deltas(add_production_rows(deltas, [doc]))
+
+
+@frappe.whitelist()
+def rebuild_daily_production(start_date=None, end_date=None):
+    """Rebuild the rollup from Machine Operation, for a date range or everything.
+    bench --site <site> execute albion.albion.doctype.daily_production.daily_production.rebuild_daily_production
+    """
+    frappe.only_for("System Manager")
+    conditions = []
+    params = {}
+    if start_date:
+        conditions.append("operation_date >= %(start_date)s")
+        params["start_date"] = getdate(start_date)
+    if end_date:
+        conditions.append("operation_date <= %(end_date)s")
+        params["end_date"] = getdate(end_date)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    frappe.db.sql(f"DELETE FROM `tabDaily Production` {where}", params)
+    rows = frappe.db.sql(
+        f"""
+        SELECT operation_date, machine, `order`, style, process_name, colour, size,
+            SUM(quantity) AS quantity, SUM(allocated_minutes) AS allocated_minutes
+        FROM `tabMachine Operation`
+        {where}
+        GROUP BY operation_date, machine, `order`, style, process_name, colour, size
+        """,
+        params,
+        as_dict=True,
+    )
+    apply_production_deltas(add_production_rows({}, rows))
+    bump_report_generation()
+    return len(rows)
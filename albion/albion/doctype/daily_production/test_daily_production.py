@@ -0,0 +1,70 @@
+# Copyright (c) 2026, Essdee and Contributors
+# See license.txt
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from albion.albion.doctype.daily_production.daily_production import rebuild_daily_production
+from albion.albion.page.capacity_planning.allocation_store import save_changes
+from albion.albion.page.capacity_planning.test_calendar_resolver import make_calendars
+from albion.albion.page.capacity_planning.test_capacity_grid import make_operation
+
+
+def production(date, machine="CR-M2"):
+	"""(quantity, minutes) rows of the rollup for a machine-day."""
+	return [
+		(row.quantity, row.allocated_minutes)
+		for row in frappe.get_all(
+			"Daily Production",
+			filters={"machine": machine, "operation_date": date},
+			fields=["quantity", "allocated_minutes"],
+		)
+	]
+
+
+class TestDailyProduction(FrappeTestCase):
+	@classmethod
+	def setUpClass(cls):
+		super().setUpClass()
+		make_calendars()
+
+	def test_operations_roll_up_by_key(self):
+		first = make_operation("CR-M2", "2032-03-15", 100, quantity=2)
+		make_operation("CR-M2", "2032-03-15", 50, quantity=1)
+		self.assertEqual(production("2032-03-15"), [(3, 150)])
+
+		first.operation_date = "2032-03-16"
+		first.save(ignore_permissions=True)
+		self.assertEqual(production("2032-03-15"), [(1, 50)])
+		self.assertEqual(production("2032-03-16"), [(2, 100)])
+
+		# Rows that drop to zero are removed
+		first.delete()
+		self.assertEqual(production("2032-03-16"), [])
+
+	def test_bulk_saves_update_rollup(self):
+		upsert = {
+			"machine_id": "CR-M2",
+			"order": "DP-O1",
+			"style": "DP-S",
+			"process": "DP-P",
+			"quantity": 4,
+			"operation_date": "2032-03-17",
+			"allocated_minutes": 200,
+		}
+		(name,) = save_changes(upserts=[upsert])["saved"]
+		self.assertEqual(production("2032-03-17"), [(4, 200)])
+
+		save_changes(upserts=[{**upsert, "name": name, "operation_date": "2032-03-18"}])
+		self.assertEqual(production("2032-03-17"), [])
+		self.assertEqual(production("2032-03-18"), [(4, 200)])
+
+		save_changes(deletes=[name])
+		self.assertEqual(production("2032-03-18"), [])
+
+	def test_rebuild_matches_operations(self):
+		make_operation("CR-M2", "2032-03-19", 30, quantity=3)
+		frappe.db.delete("Daily Production", {"operation_date": "2032-03-19"})
+
+		rebuild_daily_production("2032-03-19", "2032-03-19")
+		self.assertEqual(production("2032-03-19"), [(3, 30)])
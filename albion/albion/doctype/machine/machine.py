@@ -4,6 +4,15 @@
 # import frappe
 from frappe.model.document import Document
 
+from albion.albion.api.report_cache import bump_report_generation
+from albion.albion.page.capacity_planning.allocation_store import clear_machine_frame_cache
+
 
 class Machine(Document):
-    pass
\ No newline at end of file
+    def on_update(self):
+        clear_machine_frame_cache()
+        bump_report_generation()
+
+    def on_trash(self):
+        clear_machine_frame_cache()
+        bump_report_generation()
@@ -0,0 +1,133 @@
+# Copyright (c) 2026, Essdee and contributors
+# For license information, please see license.txt
+
+import frappe
+import numpy as np
+from frappe.model.document import Document
+from frappe.utils import add_days, getdate, now, nowdate
+
+from albion.albion.page.capacity_planning.capacity_grid import CapacityGrid
+
+BATCH_SIZE = 500
+# Window built by rebuild_machine_days when no dates are given
+REBUILD_DAYS_BACK = 90
+REBUILD_DAYS_AHEAD = 365
+
+
+class MachineDay(Document):
+    pass
+
+
+def on_doctype_update():
+    frappe.db.add_unique("Machine Day", ["machine", "date"], constraint_name="unique_machine_date")
+
+
+@frappe.whitelist()
+def rebuild_machine_days(start_date=None, end_date=None):
+    """Rebuild the ledger for a window (default: 90 days back to a year ahead).
+    bench --site <site> execute albion.albion.doctype.machine_day.machine_day.rebuild_machine_days
+    """
+    frappe.only_for("System Manager")
+    start_date = start_date or add_days(nowdate(), -REBUILD_DAYS_BACK)
+    end_date = end_date or add_days(nowdate(), REBUILD_DAYS_AHEAD)
+    return refresh_machine_days(start_date, end_date)
+
+
+def refresh_machine_days(start_date, end_date, machines=None, cells=None):
+    """Recompute Machine Day rows for a machine x date box.
+    machines: Machine names (default: all)
+    cells: optional (machine, date_str) pairs inside the box to limit the rows written
+    Returns the number of rows written.
+    """
+    grid = CapacityGrid(start_date, end_date, machines=machines)
+    if not grid.machines or not grid.dates:
+        return 0
+
+    if cells is None:
+        rows, cols = np.indices(grid.capacity.shape).reshape(2, -1)
+        frappe.db.sql(
+            """
+            DELETE FROM `tabMachine Day`
+            WHERE `date` BETWEEN %(start)s AND %(end)s AND machine IN %(machines)s
+            """,
+            {"start": grid.start_date, "end": grid.end_date, "machines": tuple(grid.machines)},
+        )
+    else:
+        pairs = [
+            (grid.machine_index[m], grid.date_index[d])
+            for m, d in cells
+            if m in grid.machine_index and d in grid.date_index
+        ]
+        if not pairs:
+            return 0
+        rows, cols = (np.array(axis) for axis in zip(*pairs, strict=True))
+        names = [f"{grid.machines[r]}-{grid.dates[c]}" for r, c in pairs]
+        for start in range(0, len(names), BATCH_SIZE):
+            frappe.db.delete("Machine Day", {"name": ["in", names[start:start + BATCH_SIZE]]})
+
+    timestamp = now()
+    user = frappe.session.user
+    values = [
+        (f"{grid.machines[r]}-{grid.dates[c]}", timestamp, timestamp, user, user, 0, 0,
+         grid.machines[r], grid.dates[c], capacity, used, int(not working))
+        for r, c, capacity, used, working in zip(
+            rows.tolist(),
+            cols.tolist(),
+            grid.raw_capacity[rows, cols].tolist(),
+            grid.used[rows, cols].tolist(),
+            grid.working[rows, cols].tolist(),
+            strict=True,
+        )
+    ]
+    frappe.db.bulk_insert(
+        "Machine Day",
+        ["name", "creation", "modified", "modified_by", "owner", "docstatus", "idx",
+         "machine", "date", "capacity_minutes", "used_minutes", "is_off_day"],
+        values,
+    )
+    return len(values)
+
+
+def refresh_cells(cells):
+    """Refresh the ledger for changed (machine, date) pairs, e.g. after Machine Operation writes."""
+    cells = {(m, str(getdate(d))) for m, d in cells if m and d}
+    if not cells:
+        return 0
+    dates = [d for _m, d in cells]
+    return refresh_machine_days(min(dates), max(dates), machines={m for m, _d in cells}, cells=cells)
+
+
+def refresh_for_calendar(doc):
+    """Refresh the ledger rows a Shift Allocation covers, before and after the change.
+
+    Only dates already in the ledger are refreshed; rebuild_machine_days extends it.
+    A machine calendar touches that machine, a general or default one every machine.
+    """
+    versions = [doc]
+    before = doc.get_doc_before_save()
+    if before:
+        versions.append(before)
+
+    for version in versions:
+        if version.is_default:
+            refresh_calendar_range(None, None)
+        else:
+            refresh_calendar_range(version.start_date, version.end_date, version.machine)
+
+
+def refresh_calendar_range(start_date, end_date, machines=None):
+    """Refresh ledger rows for a calendar change, clipped to the dates the ledger holds.
+    start_date/end_date: None for the whole ledger span (default calendar changes)
+    machines: a Machine name or list of them (default: all)
+    """
+    span = frappe.db.sql("SELECT MIN(`date`), MAX(`date`) FROM `tabMachine Day`")[0]
+    if not span[0]:
+        return
+
+    start = max(getdate(start_date), getdate(span[0])) if start_date else getdate(span[0])
+    end = min(getdate(end_date), getdate(span[1])) if end_date else getdate(span[1])
+    if start > end:
+        return
+    if isinstance(machines, str):
+        machines = [machines]
+    refresh_machine_days(start, end, machines=machines or None)
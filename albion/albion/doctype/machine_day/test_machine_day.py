@@ -0,0 +1,52 @@
+# Copyright (c) 2026, Essdee and Contributors
+# See license.txt
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from albion.albion.page.capacity_planning.test_calendar_resolver import make_calendar, make_calendars
+from albion.albion.page.capacity_planning.test_capacity_grid import make_operation
+
+
+def ledger(machine, date):
+	return frappe.db.get_value(
+		"Machine Day",
+		{"machine": machine, "date": date},
+		["capacity_minutes", "used_minutes", "is_off_day"],
+		as_dict=True,
+	)
+
+
+class TestMachineDay(FrappeTestCase):
+	"""CR-M2 has 420 minutes Monday to Saturday in March 2032 (see make_calendars)."""
+
+	@classmethod
+	def setUpClass(cls):
+		super().setUpClass()
+		make_calendars()
+
+	def test_operation_writes_refresh_their_cells(self):
+		operation = make_operation("CR-M2", "2032-03-15", 100)
+		make_operation("CR-M2", "2032-03-15", 50)
+		self.assertEqual(ledger("CR-M2", "2032-03-15"), {"capacity_minutes": 420, "used_minutes": 150, "is_off_day": 0})
+
+		# Moving a row refreshes the day it left and the day it went to
+		operation.operation_date = "2032-03-16"
+		operation.save(ignore_permissions=True)
+		self.assertEqual(ledger("CR-M2", "2032-03-15").used_minutes, 50)
+		self.assertEqual(ledger("CR-M2", "2032-03-16").used_minutes, 100)
+
+		operation.delete()
+		self.assertEqual(ledger("CR-M2", "2032-03-16").used_minutes, 0)
+
+	def test_off_day_keeps_calendar_minutes(self):
+		# 2032-03-21 is a Sunday, off on the general range
+		make_operation("CR-M2", "2032-03-21", 30)
+		self.assertEqual(ledger("CR-M2", "2032-03-21"), {"capacity_minutes": 420, "used_minutes": 30, "is_off_day": 1})
+
+	def test_calendar_change_refreshes_ledger(self):
+		make_operation("CR-M2", "2032-03-17", 30)
+		make_operation("CR-M1", "2032-03-17", 30)
+		make_calendar("2032-03-17", "2032-03-17", 240, machine="CR-M2")
+		self.assertEqual(ledger("CR-M2", "2032-03-17").capacity_minutes, 240)
+		self.assertEqual(ledger("CR-M1", "2032-03-17").capacity_minutes, 420)
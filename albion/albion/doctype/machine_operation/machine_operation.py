@@ -1,9 +1,46 @@
 # Copyright (c) 2026, Essdee and contributors
 # For license information, please see license.txt
 
-# import frappe
+import frappe
 from frappe.model.document import Document
 
+from albion.albion.api.report_cache import bump_report_generation
+from albion.albion.doctype.daily_production.daily_production import (
+	add_production_rows,
+	apply_production_deltas,
+	update_production,
+)
+from albion.albion.doctype.machine_day.machine_day import refresh_cells
+from albion.albion.doctype.machine_operation_tombstone.machine_operation_tombstone import record_deletions
+
 
 class MachineOperation(Document):
-	pass
+	def on_update(self):
+		cells = {(self.machine, self.operation_date)}
+		before = self.get_doc_before_save()
+		if before:
+			cells.add((before.machine, before.operation_date))
+		refresh_cells(cells)
+		update_production(self)
+		bump_report_generation()
+
+	def on_trash(self):
+		record_deletions([{"name": self.name, "machine": self.machine, "operation_date": self.operation_date}])
+		apply_production_deltas(add_production_rows({}, [self], -1))
+		bump_report_generation()
+
+	def after_delete(self):
+		refresh_cells({(self.machine, self.operation_date)})
+
+
+def on_doctype_update():
+	# Date windows with or without a machine filter, and the board's UNIQUE_KEY lookups.
+	# colour and size are left out: seven varchar(140) columns pass InnoDB's 3072 byte
+	# key limit, and the five leading ones already narrow a lookup to a few rows.
+	frappe.db.add_index("Machine Operation", ["operation_date", "machine"], "operation_date_machine_index")
+	frappe.db.add_index(
+		"Machine Operation",
+		["machine", "operation_date", "`order`", "style", "process_name"],
+		"allocation_key_index",
+	)
+	frappe.db.add_index("Machine Operation", ["`order`", "process_name"], "order_process_index")
@@ -0,0 +1,36 @@
+# Copyright (c) 2026, Essdee and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+from frappe.query_builder import Interval
+from frappe.query_builder.functions import Now
+from frappe.utils import now
+
+# Tombstones older than this are cleared; clients with an older cursor resync in full
+TOMBSTONE_RETENTION_DAYS = 7
+
+
+class MachineOperationTombstone(Document):
+    @staticmethod
+    def clear_old_logs(days=TOMBSTONE_RETENTION_DAYS):
+        table = frappe.qb.DocType("Machine Operation Tombstone")
+        frappe.db.delete(table, filters=(table.modified < (Now() - Interval(days=days))))
+
+
+def record_deletions(rows):
+    """Record deleted Machine Operations ({name, machine, operation_date}) for delta sync."""
+    if not rows:
+        return
+    timestamp = now()
+    user = frappe.session.user
+    frappe.db.bulk_insert(
+        "Machine Operation Tombstone",
+        ["name", "creation", "modified", "modified_by", "owner", "docstatus", "idx",
+         "machine_operation", "machine", "operation_date"],
+        [
+            (frappe.generate_hash(length=10), timestamp, timestamp, user, user, 0, 0,
+             row["name"], row["machine"], row["operation_date"])
+            for row in rows
+        ],
+    )
@@ -4,6 +4,9 @@
 import frappe
 from frappe.model.document import Document
 
+from albion.albion.api.report_cache import bump_report_generation
+from albion.albion.doctype.order_completion.order_completion import get_completion
+
 
 class Order(Document):
 	def validate(self):
@@ -96,6 +99,8 @@ def close_order(order_name):
         frappe.throw("Order is already closed.")
     doc.status = "Closed"
     doc.save()
+    # The variance report only covers open orders
+    bump_report_generation()
     return doc.status
 
 
@@ -108,20 +113,15 @@ def reopen_order(order_name):
         frappe.throw("Order is not closed.")
     doc.status = "Open"
     doc.save()
+    bump_report_generation()
     return doc.status
 
 
 @frappe.whitelist()
 def get_order_completion(order):
     """Aggregated completed qty from Order Tracking, grouped by style+colour+size."""
-    rows = frappe.get_all(
-        "Order Tracking",
-        filters={"order": order},
-        fields=["style", "colour", "size", "sum(quantity) as completed_qty"],
-        group_by="style, colour, size",
-    )
     result = {}
-    for r in rows:
+    for r in get_completion([order]):
         result.setdefault(r.style, {}).setdefault(r.colour or "", {})[r.size or ""] = r.completed_qty
     return result
 
@@ -0,0 +1,93 @@
+# Copyright (c) 2026, Essdee and contributors
+# For license information, please see license.txt
+
+import hashlib
+
+import frappe
+from frappe.model.document import Document
+from frappe.utils import cint, now
+
+BATCH_SIZE = 500
+
+
+class OrderCompletion(Document):
+    pass
+
+
+def completion_name(order, style, colour, size):
+    """Row name for a (order, style, colour, size) key, so upserts can hit the primary key."""
+    key = "\x1f".join(value or "" for value in (order, style, colour, size))
+    return hashlib.md5(key.encode()).hexdigest()
+
+
+def apply_completion_deltas(deltas):
+    """Add quantities to the rollup: deltas is {(order, style, colour, size): qty}."""
+    deltas = {key: qty for key, qty in deltas.items() if key[0] and qty}
+    if not deltas:
+        return
+
+    timestamp = now()
+    user = frappe.session.user
+    items = list(deltas.items())
+    for start in range(0, len(items), BATCH_SIZE):
+        chunk = items[start:start + BATCH_SIZE]
+        values = []
+        for (order, style, colour, size), qty in chunk:
+            values.extend((
+                completion_name(order, style, colour, size), timestamp, timestamp, user, user,
+                order, style or None, colour or None, size or None, qty,
+            ))
+        placeholders = ", ".join(["(%s, %s, %s, %s, %s, 0, 0, %s, %s, %s, %s, %s)"] * len(chunk))
+        frappe.db.sql(
+            f"""
+            INSERT INTO `tabOrder Completion`
+                (name, creation, modified, modified_by, owner, docstatus, idx,
+                 `order`, style, colour, size, completed_qty)
+            VALUES {placeholders}
+            ON DUPLICATE KEY UPDATE
+                completed_qty = completed_qty + VALUES(completed_qty),
+                modified = VALUES(modified),
+                modified_by = VALUES(modified_by)
+            """,
+            values,
+        )
+
+
+def update_completion(doc):
+    """Move an Order Tracking row's quantity from its previous key to its current one."""
+    deltas = {}
+    before = doc.get_doc_before_save()
+    for version, sign in ((before, -1), (doc, 1)):
+        if version is None:
+            continue
+        key = (version.order, version.style, version.colour, version.size)
+        deltas[key] = deltas.get(key, 0) + sign * cint(version.quantity)
+    apply_completion_deltas(deltas)
+
+
+def get_completion(orders=None):
+    """Completed qty rows {order, style, colour, size, completed_qty}, optionally for some orders."""
+    filters = {"completed_qty": ["!=", 0]}
+    if orders:
+        filters["order"] = ["in", list(orders)]
+    return frappe.get_all(
+        "Order Completion",
+        filters=filters,
+        fields=["order", "style", "colour", "size", "completed_qty"],
+    )
+
+
+@frappe.whitelist()
+def rebuild_order_completion():
+    """Rebuild the rollup from Order Tracking.
+    bench --site <site> execute albion.albion.doctype.order_completion.order_completion.rebuild_order_completion
+    """
+    frappe.only_for("System Manager")
+    frappe.db.delete("Order Completion")
+    rows = frappe.get_all(
+        "Order Tracking",
+        fields=["order", "style", "colour", "size", "sum(quantity) as completed_qty"],
+        group_by="`order`, `style`, `colour`, `size`",
+    )
+    apply_completion_deltas({(r.order, r.style, r.colour, r.size): cint(r.completed_qty) for r in rows})
+    return len(rows)
@@ -0,0 +1,73 @@
+# Copyright (c) 2026, Essdee and Contributors
+# See license.txt
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from albion.albion.doctype.order_completion.order_completion import (
+	apply_completion_deltas,
+	get_completion,
+	rebuild_order_completion,
+)
+
+ORDER = "OC-O1"
+
+
+def completed(colour="OC-C1"):
+	return frappe.db.get_value(
+		"Order Completion", {"order": ORDER, "style": "OC-S", "colour": colour, "size": "OC-L"}, "completed_qty"
+	)
+
+
+def make_tracking(quantity, colour="OC-C1"):
+	return frappe.get_doc({
+		"doctype": "Order Tracking",
+		"order": ORDER,
+		"style": "OC-S",
+		"colour": colour,
+		"size": "OC-L",
+		"quantity": quantity,
+		"knitter": "OC-K",
+		"completion_date": "2032-03-15",
+	}).insert(ignore_links=True)
+
+
+class TestOrderCompletion(FrappeTestCase):
+	@classmethod
+	def setUpClass(cls):
+		super().setUpClass()
+		# Tracking is only accepted for orders with allocations
+		frappe.get_doc({
+			"doctype": "Machine Operation", "order": ORDER, "quantity": 1, "operation_date": "2032-03-15"
+		}).insert(ignore_links=True)
+
+	def test_deltas_upsert_one_row(self):
+		key = (ORDER, "OC-S", "OC-C9", "OC-L")
+		apply_completion_deltas({key: 5})
+		apply_completion_deltas({key: 3})
+		self.assertEqual(completed("OC-C9"), 8)
+		self.assertEqual(frappe.db.count("Order Completion", {"order": ORDER, "colour": "OC-C9"}), 1)
+
+		apply_completion_deltas({key: -8})
+		self.assertNotIn("OC-C9", [row.colour for row in get_completion([ORDER])])
+
+	def test_tracking_moves_quantity(self):
+		tracking = make_tracking(10)
+		self.assertEqual(completed(), 10)
+
+		tracking.quantity = 4
+		tracking.colour = "OC-C2"
+		tracking.save(ignore_permissions=True)
+		self.assertEqual(completed(), 0)
+		self.assertEqual(completed("OC-C2"), 4)
+
+		tracking.delete()
+		self.assertEqual(completed("OC-C2"), 0)
+
+	def test_rebuild_matches_tracking(self):
+		make_tracking(6, colour="OC-C3")
+		make_tracking(7, colour="OC-C3")
+		frappe.db.set_value("Order Completion", {"order": ORDER, "colour": "OC-C3"}, "completed_qty", 99)
+
+		rebuild_order_completion()
+		self.assertEqual(completed("OC-C3"), 13)
@@ -4,6 +4,9 @@
 import frappe
 from frappe.model.document import Document
 
+from albion.albion.api.report_cache import bump_report_generation
+from albion.albion.doctype.order_completion.order_completion import apply_completion_deltas, update_completion
+
 
 class OrderTracking(Document):
 	def before_validate(self):
@@ -16,3 +19,15 @@ class OrderTracking(Document):
 		if not mo_list:
 			frappe.throw("Order not allocated in Capacity Planning")
 		self.user = frappe.session.user
+
+	def on_update(self):
+		update_completion(self)
+		bump_report_generation()
+
+	def on_trash(self):
+		apply_completion_deltas({(self.order, self.style, self.colour, self.size): -(self.quantity or 0)})
+		bump_report_generation()
+
+
+def on_doctype_update():
+	frappe.db.add_index("Order Tracking", ["`order`", "style", "colour", "size"], "order_style_colour_size_index")
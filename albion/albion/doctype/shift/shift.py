@@ -2,9 +2,21 @@ import frappe
 from frappe.model.document import Document
 from datetime import datetime, timedelta
 
+from albion.albion.api.report_cache import bump_report_generation
+from albion.albion.page.capacity_planning.calendar_cache import clear_calendar_cache
+
 class Shift(Document):
     def validate(self):
         self.calculate_duration()
+
+    def on_update(self):
+        # Calendars copy shift names and durations into their payloads
+        clear_calendar_cache()
+        bump_report_generation()
+
+    def on_trash(self):
+        clear_calendar_cache()
+        bump_report_generation()
     
     def calculate_duration(self):
         if self.start_time and self.end_time:
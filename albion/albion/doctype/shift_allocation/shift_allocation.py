@@ -6,6 +6,10 @@ from frappe import _
 from frappe.model.document import Document
 from frappe.utils import getdate, get_time
 
+from albion.albion.api.report_cache import bump_report_generation
+from albion.albion.doctype.machine_day.machine_day import refresh_for_calendar
+from albion.albion.page.capacity_planning.calendar_cache import clear_calendar_cache
+
 
 class ShiftAllocation(Document):
     def validate(self):
@@ -18,6 +22,17 @@ class ShiftAllocation(Document):
         self.validate_shift_overlaps()
         self.calculate_total_duration()
 
+    def on_update(self):
+        # Shift Alteration rows are saved with their calendar, so this covers them too
+        refresh_for_calendar(self)
+        clear_calendar_cache(self.name)
+        bump_report_generation()
+
+    def after_delete(self):
+        refresh_for_calendar(self)
+        clear_calendar_cache(self.name)
+        bump_report_generation()
+
     def validate_dates(self):
         if self.end_date and self.start_date and getdate(self.end_date) < getdate(self.start_date):
             frappe.throw(_("End Date must be on or after Start Date"))
@@ -108,3 +123,11 @@ class ShiftAllocation(Document):
         for row in self.shifts or []:
             total += row.duration_minutes or 0
         self.total_duration_minutes = total
+
+
+def on_doctype_update():
+    # Window lookups filter on is_default with a date range; overlap checks on machine
+    frappe.db.add_index(
+        "Shift Allocation", ["is_default", "start_date", "end_date", "machine"], "default_window_index"
+    )
+    frappe.db.add_index("Shift Allocation", ["machine", "start_date", "end_date"], "machine_window_index")
@@ -4,12 +4,18 @@
 import frappe
 from frappe.model.document import Document
 
+from albion.albion.page.capacity_planning.order_cache import clear_order_payload_cache
+
 class Style(Document):
     def validate(self):
         self.validate_process_minutes()
         if self.size_range:
             self.fetch_sizes_from_range()
 
+    def on_update(self):
+        # Cached order payloads carry the style's name, code and machine frame
+        clear_order_payload_cache()
+
     def validate_process_minutes(self):
         for row in self.processes or []:
             if not row.minutes:
@@ -0,0 +1,489 @@
+# Copyright (c) 2026, Essdee and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe import _
+from frappe.utils import cint, flt, getdate, now
+
+from albion.albion.api.report_cache import bump_report_generation
+from albion.albion.doctype.daily_production.daily_production import (
+    ROLLUP_KEY,
+    add_production_rows,
+    apply_production_deltas,
+)
+from albion.albion.doctype.machine_day.machine_day import refresh_cells
+from albion.albion.doctype.machine_operation_tombstone.machine_operation_tombstone import record_deletions
+from albion.albion.page.capacity_planning.calendar_resolver import CalendarResolver
+
+# Machine Operation columns written from a board allocation
+WRITE_FIELDS = (
+    "machine", "order", "style", "process_name", "colour", "size",
+    "quantity", "operation_date", "shift", "allocated_minutes", "operator",
+)
+# Columns that identify one allocation when the payload has no name
+UNIQUE_KEY = ("machine", "order", "style", "process_name", "colour", "size", "operation_date")
+
+BATCH_SIZE = 500
+MACHINE_FRAME_CACHE_KEY = "albion:machine_frames"
+# What a save does with machine-days loaded past their capacity
+OVERLOAD_MODES = ("flag", "reject")
+
+
+class AllocationChangeSet:
+    """Inserts, updates and deletes of Machine Operation rows applied as batched SQL.
+
+    Rows are plain dicts keyed by WRITE_FIELDS. Inserted rows get their `name`
+    set by `apply`, so callers can keep references to them. Every (machine, date)
+    cell written, before or after the change, is refreshed in the Machine Day
+    ledger once the SQL has run, the Daily Production rollup gets the net
+    quantity and minutes of the change, and cached report results are dropped.
+    """
+
+    def __init__(self):
+        self.inserts = []
+        self.updates = {}
+        self.deletes = []
+        self.touched = set()
+        self.production = {}
+
+    def insert(self, row):
+        self.inserts.append(row)
+
+    def update(self, name, row):
+        self.updates[name] = row
+
+    def delete(self, name):
+        self.deletes.append(name)
+
+    def apply(self):
+        timestamp = now()
+        user = frappe.session.user
+        self._apply_inserts(timestamp, user)
+        self._apply_updates(timestamp, user)
+        self._apply_deletes()
+        refresh_cells(self.touched)
+        apply_production_deltas(self.production)
+        bump_report_generation()
+
+    def _apply_inserts(self, timestamp, user):
+        if not self.inserts:
+            return
+
+        for row in self.inserts:
+            # Let Frappe pick the name so the naming series stays in step
+            doc = frappe.new_doc("Machine Operation")
+            doc.update(row)
+            doc.set_new_name()
+            row["name"] = doc.name
+            self.touched.add((row["machine"], row["operation_date"]))
+        add_production_rows(self.production, self.inserts)
+
+        fields = ["name", "creation", "modified", "modified_by", "owner", "docstatus", "idx", *WRITE_FIELDS]
+        values = [
+            (row["name"], timestamp, timestamp, user, user, 0, 0, *(row.get(f) for f in WRITE_FIELDS))
+            for row in self.inserts
+        ]
+        frappe.db.bulk_insert("Machine Operation", fields, values)
+
+    def _apply_updates(self, timestamp, user):
+        names = list(self.updates)
+        for start in range(0, len(names), BATCH_SIZE):
+            chunk = names[start:start + BATCH_SIZE]
+            add_production_rows(self.production, self._touch_rows(chunk), -1)
+            add_production_rows(self.production, (self.updates[n] for n in chunk))
+            self.touched.update((self.updates[n]["machine"], self.updates[n]["operation_date"]) for n in chunk)
+            assignments = []
+            params = []
+            for field in WRITE_FIELDS:
+                cases = " ".join(["WHEN %s THEN %s"] * len(chunk))
+                assignments.append(f"`{field}` = CASE `name` {cases} END")
+                for name in chunk:
+                    params.extend((name, self.updates[name].get(field)))
+            placeholders = ", ".join(["%s"] * len(chunk))
+            frappe.db.sql(
+                f"""
+                UPDATE `tabMachine Operation`
+                SET {", ".join(assignments)}, `modified` = %s, `modified_by` = %s
+                WHERE `name` IN ({placeholders})
+                """,
+                (*params, timestamp, user, *chunk),
+            )
+
+    def _apply_deletes(self):
+        for start in range(0, len(self.deletes), BATCH_SIZE):
+            chunk = self.deletes[start:start + BATCH_SIZE]
+            rows = self._touch_rows(chunk)
+            record_deletions(rows)
+            add_production_rows(self.production, rows, -1)
+            frappe.db.delete("Machine Operation", {"name": ["in", chunk]})
+
+    def _touch_rows(self, names):
+        """Mark the current cells of existing rows as touched and return those rows."""
+        rows = frappe.get_all(
+            "Machine Operation",
+            filters={"name": ["in", names]},
+            fields=["name", *ROLLUP_KEY, "quantity", "allocated_minutes"],
+        )
+        self.touched.update((r.machine, r.operation_date) for r in rows)
+        return rows
+
+
+def resolve_machines(machine_ids):
+    """Map machine_id -> Machine name in one query."""
+    machine_ids = [m for m in set(machine_ids) if m]
+    if not machine_ids:
+        return {}
+    rows = frappe.get_all(
+        "Machine",
+        filters={"machine_id": ["in", machine_ids]},
+        fields=["name", "machine_id"],
+    )
+    return {r.machine_id: r.name for r in rows}
+
+
+def compatible_machines(machine_frame=None):
+    """Machine names that can run a style with this machine frame, as the board allows them.
+    Machines without a frame take any style, and a style without a frame runs anywhere.
+    """
+    or_filters = None
+    if machine_frame:
+        or_filters = [["machine_frame", "=", machine_frame], ["machine_frame", "is", "not set"]]
+    return frappe.get_all("Machine", or_filters=or_filters, order_by="machine_id", pluck="name")
+
+
+def get_machine_frames():
+    """Machine name -> machine frame ("" when unset), cached until a Machine changes."""
+    return frappe.cache.get_value(
+        MACHINE_FRAME_CACHE_KEY,
+        generator=lambda: {
+            m.name: m.machine_frame or ""
+            for m in frappe.get_all("Machine", fields=["name", "machine_frame"])
+        },
+    )
+
+
+def clear_machine_frame_cache():
+    frappe.cache.delete_value(MACHINE_FRAME_CACHE_KEY)
+
+
+def load_existing(names=(), dates=(), start_date=None, end_date=None, machines=None):
+    """Load Machine Operation rows by name, by date, or in a date range with one query.
+    machines: optional Machine names that the date and range conditions are limited to
+    """
+    conditions = []
+    params = {}
+    machine_clause = ""
+    if machines:
+        machine_clause = " AND machine IN %(machines)s"
+        params["machines"] = tuple(machines)
+    if start_date and end_date:
+        conditions.append(f"(operation_date BETWEEN %(start_date)s AND %(end_date)s{machine_clause})")
+        params.update(start_date=start_date, end_date=end_date)
+    if dates:
+        conditions.append(f"(operation_date IN %(dates)s{machine_clause})")
+        params["dates"] = tuple(dates)
+    if names:
+        conditions.append("name IN %(names)s")
+        params["names"] = tuple(names)
+    if not conditions:
+        return {}
+
+    rows = frappe.db.sql(
+        f"""
+        SELECT name, {", ".join(f"`{f}`" for f in WRITE_FIELDS)}
+        FROM `tabMachine Operation`
+        WHERE {" OR ".join(conditions)}
+        """,
+        params,
+        as_dict=True,
+    )
+    for row in rows:
+        row.operation_date = str(row.operation_date)
+    return {row.name: row for row in rows}
+
+
+def to_row(alloc, machine_name):
+    """Convert a board allocation into Machine Operation column values."""
+    return {
+        "machine": machine_name,
+        "order": alloc.get("order"),
+        "style": alloc.get("style"),
+        "process_name": alloc.get("process"),
+        "colour": alloc.get("colour") or None,
+        "size": alloc.get("size") or None,
+        "quantity": cint(alloc.get("quantity")),
+        "operation_date": str(getdate(alloc.get("operation_date"))),
+        "shift": alloc.get("shift") or None,
+        "allocated_minutes": flt(alloc.get("allocated_minutes")),
+        "operator": frappe.session.user,
+    }
+
+
+def unique_key(row):
+    return tuple(row.get(f) or None for f in UNIQUE_KEY)
+
+
+def is_changed(existing, row):
+    for field in WRITE_FIELDS:
+        if field == "operator":
+            continue
+        old, new = existing.get(field), row.get(field)
+        if field == "quantity":
+            old, new = cint(old), cint(new)
+        elif field == "allocated_minutes":
+            old, new = flt(old), flt(new)
+        else:
+            old, new = old or None, new or None
+        if old != new:
+            return True
+    return False
+
+
+def validate_allocations(allocations, machine_map):
+    """Return per-row errors: [{row, machine_id, message}]. Rows are 1-based."""
+    errors = []
+    for idx, alloc in enumerate(allocations, 1):
+        machine_id = alloc.get("machine_id")
+        if machine_id not in machine_map:
+            errors.append({"row": idx, "machine_id": machine_id, "message": _("Machine not found")})
+        elif not alloc.get("operation_date"):
+            errors.append({"row": idx, "machine_id": machine_id, "message": _("Operation Date is missing")})
+    return errors
+
+
+def raise_allocation_errors(errors):
+    messages = [
+        _("Row {0} ({1}): {2}").format(e["row"], e["machine_id"] or "-", e["message"]) for e in errors
+    ]
+    frappe.log_error(title="Capacity Planning Save Errors", message="\n".join(messages))
+    frappe.throw(messages, title=_("Some allocations failed to save"), as_list=True)
+
+
+def check_changes(allocations, saved, changes, existing, overload="flag"):
+    """Validate a planned change set against machine frames and capacity before it is written.
+
+    Only rows the change set inserts or updates are checked for frame
+    compatibility, so older rows never block a save. The final minutes of
+    every machine-day the change set adds work to are compared with that
+    day's capacity, read from the Machine Day ledger for just those cells.
+    Frame errors always abort the save; overloads abort it with
+    overload="reject" and are reported as a warning otherwise.
+    """
+    if overload not in OVERLOAD_MODES:
+        frappe.throw(_("Overload must be one of {0}").format(", ".join(OVERLOAD_MODES)))
+
+    inserted = {id(row) for row in changes.inserts}
+    payload = []
+    for idx, (alloc, row) in enumerate(zip(allocations, saved, strict=True), 1):
+        if row.get("name") in changes.updates:
+            payload.append((idx, alloc, changes.updates[row["name"]]))
+        elif id(row) in inserted:
+            payload.append((idx, alloc, row))
+
+    errors = _frame_errors(payload)
+    if errors:
+        raise_allocation_errors(errors)
+
+    overloads = _overloaded_cells(changes, existing)
+    if not overloads:
+        return
+
+    rows_by_cell = {}
+    for idx, alloc, row in payload:
+        rows_by_cell.setdefault((row["machine"], row["operation_date"]), (idx, alloc.get("machine_id")))
+    errors = []
+    for machine, date, used, capacity in overloads:
+        idx, machine_id = rows_by_cell.get((machine, date), ("-", machine))
+        errors.append({
+            "row": idx,
+            "machine_id": machine_id,
+            "message": _("{0} of {1} minutes allocated on {2}").format(used, capacity, date),
+        })
+    if overload == "reject":
+        raise_allocation_errors(errors)
+    frappe.msgprint(
+        [_("Row {0} ({1}): {2}").format(e["row"], e["machine_id"] or "-", e["message"]) for e in errors],
+        title=_("Overloaded machine days"),
+        indicator="orange",
+        as_list=True,
+    )
+
+
+def _frame_errors(payload):
+    if not payload:
+        return []
+    frames = get_machine_frames()
+    styles = {
+        s.name: s.machine_frame or ""
+        for s in frappe.get_all(
+            "Style",
+            filters={"name": ["in", list({row["style"] for _idx, _alloc, row in payload if row["style"]})]},
+            fields=["name", "machine_frame"],
+        )
+    }
+    errors = []
+    for idx, alloc, row in payload:
+        style_frame = styles.get(row["style"], "")
+        machine_frame = frames.get(row["machine"], "")
+        # Same rule as the board: either side without a frame is compatible
+        if style_frame and machine_frame and style_frame != machine_frame:
+            errors.append({
+                "row": idx,
+                "machine_id": alloc.get("machine_id"),
+                "message": _("Style {0} needs machine frame {1}, machine has {2}").format(
+                    row["style"], style_frame, machine_frame
+                ),
+            })
+    return errors
+
+
+def _overloaded_cells(changes, existing):
+    """Return [(machine, date, used, capacity)] for cells the change set adds work to
+    that end up loaded past their capacity."""
+    cells = {(row["machine"], row["operation_date"]) for row in changes.inserts}
+    cells.update((row["machine"], row["operation_date"]) for row in changes.updates.values())
+    if not cells:
+        return []
+
+    # Final minutes of those cells once the change set is applied
+    deleted = set(changes.deletes)
+    final = {name: row for name, row in existing.items() if name not in deleted}
+    final.update(changes.updates)
+    used = dict.fromkeys(cells, 0.0)
+    for row in [*final.values(), *changes.inserts]:
+        cell = (row["machine"], row["operation_date"])
+        if cell in used:
+            used[cell] += flt(row["allocated_minutes"])
+
+    capacity = _cell_capacity(cells)
+    return [
+        (machine, date, round(used[(machine, date)], 1), capacity[(machine, date)])
+        for machine, date in sorted(cells)
+        if used[(machine, date)] > capacity[(machine, date)]
+    ]
+
+
+def _cell_capacity(cells):
+    """Capacity of (machine, date) cells, counted like the availability report counts
+    days with work: the calendar's minutes even on its off weekdays. Read from the
+    Machine Day ledger; only cells it lacks are resolved from the calendars.
+    """
+    rows = frappe.db.sql(
+        """
+        SELECT machine, `date`, capacity_minutes
+        FROM `tabMachine Day`
+        WHERE machine IN %(machines)s AND `date` IN %(dates)s
+        """,
+        {"machines": tuple({m for m, _d in cells}), "dates": tuple({d for _m, d in cells})},
+        as_dict=True,
+    )
+    capacity = {(row.machine, str(row.date)): row.capacity_minutes or 0 for row in rows}
+
+    missing = [cell for cell in cells if cell not in capacity]
+    if missing:
+        dates = [date for _machine, date in missing]
+        resolver = CalendarResolver(min(dates), max(dates))
+        for machine, date in missing:
+            capacity[(machine, date)] = resolver.get_capacity(date, machine, skip_weekday_check=True)
+    return capacity
+
+
+def save_full(allocations, start_date=None, end_date=None, overload="flag"):
+    """Diff a full board payload against the database and apply it in bulk.
+
+    Matches each allocation to an existing row by name, then by UNIQUE_KEY,
+    otherwise inserts it. With a date range, rows in the range that the
+    payload no longer contains are deleted. The plan goes through
+    `check_changes` before anything is written. Returns the saved names in
+    payload order.
+    """
+    machine_map = resolve_machines(a.get("machine_id") for a in allocations)
+    errors = validate_allocations(allocations, machine_map)
+    if errors:
+        raise_allocation_errors(errors)
+
+    existing = load_existing(
+        names=[a["name"] for a in allocations if a.get("name")],
+        dates={str(getdate(a["operation_date"])) for a in allocations},
+        start_date=start_date,
+        end_date=end_date,
+    )
+
+    changes = AllocationChangeSet()
+    saved = _plan_upserts(allocations, machine_map, existing, changes)
+
+    if start_date and end_date:
+        start, end = str(getdate(start_date)), str(getdate(end_date))
+        keep = {row.get("name") for row in saved}
+        for name, row in existing.items():
+            if start <= row.operation_date <= end and name not in keep:
+                changes.delete(name)
+
+    check_changes(allocations, saved, changes, existing, overload)
+    changes.apply()
+    return [row["name"] for row in saved]
+
+
+def save_changes(upserts=None, deletes=None, overload="flag"):
+    """Apply an explicit change set without touching anything else on the board.
+
+    upserts are matched like in `save_full`, but existing rows are only loaded
+    for the machines and dates they touch, and nothing outside `deletes` is
+    removed. Names in `deletes` that no longer exist are ignored. The plan is
+    checked with `check_changes` like in `save_full`.
+    Returns {"saved": [...], "deleted": [...]}.
+    """
+    upserts = upserts or []
+    deletes = [name for name in deletes or [] if name]
+
+    machine_map = resolve_machines(a.get("machine_id") for a in upserts)
+    errors = validate_allocations(upserts, machine_map)
+    if errors:
+        raise_allocation_errors(errors)
+
+    existing = load_existing(
+        names=[a["name"] for a in upserts if a.get("name")] + deletes,
+        dates={str(getdate(a["operation_date"])) for a in upserts},
+        machines=set(machine_map.values()),
+    )
+    to_delete = [name for name in dict.fromkeys(deletes) if name in existing]
+    remaining = {name: row for name, row in existing.items() if name not in set(to_delete)}
+
+    changes = AllocationChangeSet()
+    saved = _plan_upserts(upserts, machine_map, remaining, changes)
+    for name in to_delete:
+        changes.delete(name)
+
+    check_changes(upserts, saved, changes, existing, overload)
+    changes.apply()
+    return {"saved": [row["name"] for row in saved], "deleted": to_delete}
+
+
+def _plan_upserts(allocations, machine_map, existing, changes):
+    """Queue inserts/updates for allocations and return their target rows in order.
+    Rows the payload names are matched by name only, so a row moved to another key
+    never takes in an unnamed allocation at the key it left.
+    """
+    claimed = {alloc.get("name") for alloc in allocations if alloc.get("name") in existing}
+    by_key = {unique_key(row): row for name, row in existing.items() if name not in claimed}
+    saved = []
+    for alloc in allocations:
+        row = to_row(alloc, machine_map[alloc["machine_id"]])
+        target = existing.get(alloc.get("name")) or by_key.get(unique_key(row))
+
+        if target is None:
+            changes.insert(row)
+            by_key[unique_key(row)] = row
+            saved.append(row)
+            continue
+
+        if target.get("name") in existing:
+            if target.get("name") in changes.updates or is_changed(target, row):
+                changes.update(target["name"], row)
+        else:
+            # Same key as a row inserted earlier in this payload
+            target.update(row)
+        if target.get("name") not in claimed:
+            by_key[unique_key(row)] = target
+        saved.append(target)
+    return saved
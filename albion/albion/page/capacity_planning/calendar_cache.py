@@ -0,0 +1,107 @@
+# Copyright (c) 2026, Essdee and contributors
+# For license information, please see license.txt
+
+from functools import partial
+
+import frappe
+
+from albion.albion.page.capacity_planning.calendar_resolver import CALENDAR_FIELDS, load_calendars
+
+# Hash of calendar name -> {"modified", "calendar"}
+CALENDAR_CACHE_KEY = "albion:shift_allocation_calendar"
+# Hash of "start|end" -> {"calendars": [[name, modified], ...], "default": [name, modified]}
+WINDOW_CACHE_KEY = "albion:shift_allocation_window"
+
+
+def get_window_calendars(start_date, end_date):
+    """Return (calendars, default_calendar) for a window, as get_shift_allocations sends them.
+
+    The window index and each serialized calendar are cached separately: a
+    calendar payload is reused by every window it overlaps for as long as its
+    `modified` matches the index.
+    """
+    index = _get_window_index(start_date, end_date)
+    entries = list(index["calendars"])
+    if index["default"]:
+        entries.append(index["default"])
+
+    payloads = get_calendars(entries)
+    calendars = [payloads[name] for name, _modified in index["calendars"] if name in payloads]
+    default_calendar = payloads.get(index["default"][0]) if index["default"] else None
+    return calendars, default_calendar
+
+
+def get_calendars(entries):
+    """Return {name: calendar} for [name, modified] pairs, loading only stale or missing ones."""
+    payloads = {}
+    missing = []
+    for name, modified in entries:
+        cached = frappe.cache.hget(CALENDAR_CACHE_KEY, name)
+        if cached and cached["modified"] == modified:
+            payloads[name] = cached["calendar"]
+        else:
+            missing.append(name)
+
+    if missing:
+        rows = frappe.get_all(
+            "Shift Allocation",
+            filters={"name": ["in", missing]},
+            fields=[*CALENDAR_FIELDS, "modified"],
+        )
+        loaded = load_calendars(rows)
+        for row in rows:
+            payloads[row.name] = loaded[row.name]
+            frappe.cache.hset(
+                CALENDAR_CACHE_KEY, row.name, {"modified": str(row.modified), "calendar": loaded[row.name]}
+            )
+    return payloads
+
+
+def clear_calendar_cache(calendar=None):
+    """Drop every window index, and one calendar's payload (or all of them), once the
+    current transaction commits. Clearing earlier lets another worker rebuild a
+    window index from the old rows and keep serving it.
+    """
+    frappe.db.after_commit.add(partial(drop_calendar_cache, calendar))
+
+
+def clear_window_cache():
+    """Drop every window index once the current transaction commits, e.g. after new
+    calendars are written in bulk.
+    """
+    frappe.db.after_commit.add(drop_window_cache)
+
+
+def drop_calendar_cache(calendar=None):
+    """Drop every window index, and one calendar's payload (or all of them), right away."""
+    drop_window_cache()
+    if calendar:
+        frappe.cache.hdel(CALENDAR_CACHE_KEY, calendar)
+    else:
+        frappe.cache.delete_value(CALENDAR_CACHE_KEY)
+
+
+def drop_window_cache():
+    frappe.cache.delete_value(WINDOW_CACHE_KEY)
+
+
+def _get_window_index(start_date, end_date):
+    key = f"{start_date}|{end_date}"
+    index = frappe.cache.hget(WINDOW_CACHE_KEY, key)
+    if index is not None:
+        return index
+
+    rows = frappe.get_all(
+        "Shift Allocation",
+        filters={"start_date": ["<=", end_date], "end_date": [">=", start_date]},
+        fields=["name", "modified"],
+        order_by="start_date",
+    )
+    default = frappe.db.get_value("Shift Allocation", {"is_default": 1}, ["name", "modified"], as_dict=True)
+
+    index = {
+        "calendars": [[row.name, str(row.modified)] for row in rows],
+        "default": [default.name, str(default.modified)] if default else None,
+    }
+    frappe.cache.hset(WINDOW_CACHE_KEY, key, index)
+    return index
@@ -0,0 +1,187 @@
+# Copyright (c) 2026, Essdee and contributors
+# For license information, please see license.txt
+
+import frappe
+import numpy as np
+from frappe import _
+from frappe.utils import get_time, getdate, now
+
+from albion.albion.api.report_cache import bump_report_generation
+from albion.albion.doctype.machine_day.machine_day import refresh_calendar_range
+from albion.albion.page.capacity_planning.calendar_cache import clear_window_cache
+from albion.albion.page.capacity_planning.calendar_resolver import DAY_NAMES
+from albion.albion.page.capacity_planning.capacity_grid import CapacityGrid
+
+
+class ShiftPattern:
+    """Roll one shift list and weekday mask out over a date range in bulk.
+
+    Writes one range calendar per machine, or one general calendar when no
+    machines are given, instead of a single-day calendar per date. Shifts and
+    machine overlaps are validated once for the whole pattern and the rows
+    are written with bulk inserts, so the pattern lands in one transaction.
+    """
+
+    def __init__(self, start_date, end_date, shifts, machines=None, weekdays=None):
+        self.start_date = getdate(start_date)
+        self.end_date = getdate(end_date)
+        self.shift_names = list(dict.fromkeys(shifts or []))
+        self.machines = list(dict.fromkeys(m for m in machines or [] if m))
+        self.weekdays = DAY_NAMES if weekdays is None else [d.lower() for d in weekdays]
+
+    def apply(self):
+        """Write the calendars and return {calendars, deltas}.
+        deltas: {machine: {date: minutes}} capacity change for every cell that moved
+        """
+        self.validate()
+
+        # A general calendar can change any machine's capacity
+        machines = self.machines or None
+        before = CapacityGrid(self.start_date, self.end_date, machines=machines)
+        calendars = self._insert_calendars(before.resolver)
+
+        refresh_calendar_range(self.start_date, self.end_date, machines)
+        clear_window_cache()
+        bump_report_generation()
+
+        after = CapacityGrid(self.start_date, self.end_date, machines=before.machines)
+        return {"calendars": calendars, "deltas": self._deltas(before, after)}
+
+    # ------------------------------------------------------------------
+    # Validation
+    # ------------------------------------------------------------------
+
+    def validate(self):
+        if self.end_date < self.start_date:
+            frappe.throw(_("End Date must be on or after Start Date"))
+        if not self.shift_names:
+            frappe.throw(_("Please select at least one shift"))
+        unknown_days = set(self.weekdays) - set(DAY_NAMES)
+        if unknown_days:
+            frappe.throw(_("Unknown weekdays: {0}").format(", ".join(sorted(unknown_days))))
+
+        self.shifts = self._load_shifts()
+        self._validate_shift_overlaps()
+        if self.machines:
+            self._validate_machines()
+
+    def _load_shifts(self):
+        rows = frappe.get_all(
+            "Shift",
+            filters={"name": ["in", self.shift_names]},
+            fields=["name", "shift_name", "start_time", "end_time", "duration_minutes"],
+        )
+        by_name = {row.name: row for row in rows}
+        missing = [name for name in self.shift_names if name not in by_name]
+        if missing:
+            frappe.throw(_("Shift not found: {0}").format(", ".join(missing)))
+        return [by_name[name] for name in self.shift_names]
+
+    def _validate_shift_overlaps(self):
+        # Same rule as ShiftAllocation.validate_shift_overlaps
+        for i, a in enumerate(self.shifts):
+            for b in self.shifts[i + 1:]:
+                if get_time(a.start_time) < get_time(b.end_time) and get_time(b.start_time) < get_time(a.end_time):
+                    frappe.throw(_("Shift {0} overlaps with Shift {1}").format(a.name, b.name))
+
+    def _validate_machines(self):
+        known = set(frappe.get_all("Machine", filters={"name": ["in", self.machines]}, pluck="name"))
+        missing = [m for m in self.machines if m not in known]
+        if missing:
+            frappe.throw(_("Machine not found: {0}").format(", ".join(missing)))
+
+        # Machine calendars may not overlap, so any existing one blocks the pattern
+        overlaps = frappe.get_all(
+            "Shift Allocation",
+            filters={
+                "machine": ["in", self.machines],
+                "start_date": ["<=", self.end_date],
+                "end_date": [">=", self.start_date],
+                "is_default": 0,
+            },
+            fields=["name", "machine", "start_date", "end_date"],
+            order_by="machine, start_date",
+        )
+        if overlaps:
+            frappe.throw(
+                [
+                    _("Shift Allocation {0} already covers machine {1} from {2} to {3}").format(
+                        row.name, row.machine, row.start_date, row.end_date
+                    )
+                    for row in overlaps
+                ],
+                title=_("Overlapping machine calendars"),
+                as_list=True,
+            )
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    def _insert_calendars(self, resolver):
+        timestamp = now()
+        user = frappe.session.user
+        total_minutes = sum(row.duration_minutes or 0 for row in self.shifts)
+        # Alterations always come from the general calendar, so a general
+        # pattern carries over the ones it would otherwise hide.
+        alterations = [] if self.machines else self._covered_alterations(resolver)
+
+        parents, shift_rows, alteration_rows = [], [], []
+        for machine in self.machines or [None]:
+            doc = frappe.new_doc("Shift Allocation")
+            doc.set_new_name()
+            parents.append((
+                doc.name, timestamp, timestamp, user, user, 0, 0,
+                0, machine, self.start_date, self.end_date, total_minutes,
+                *(int(day in self.weekdays) for day in DAY_NAMES),
+            ))
+            for idx, shift in enumerate(self.shifts, 1):
+                shift_rows.append((
+                    frappe.generate_hash(length=10), timestamp, timestamp, user, user, 0, idx,
+                    doc.name, "Shift Allocation", "shifts",
+                    shift.name, shift.shift_name, shift.duration_minutes or 0,
+                ))
+            for idx, alt in enumerate(alterations, 1):
+                alteration_rows.append((
+                    frappe.generate_hash(length=10), timestamp, timestamp, user, user, 0, idx,
+                    doc.name, "Shift Allocation", "alterations",
+                    alt["date"], alt["alteration_type"], alt["minutes"], alt["machine"], alt["reason"],
+                ))
+
+        common = ["name", "creation", "modified", "modified_by", "owner", "docstatus", "idx"]
+        child = [*common, "parent", "parenttype", "parentfield"]
+        frappe.db.bulk_insert(
+            "Shift Allocation",
+            [*common, "is_default", "machine", "start_date", "end_date", "total_duration_minutes", *DAY_NAMES],
+            parents,
+        )
+        frappe.db.bulk_insert(
+            "Shift Allocation Item", [*child, "shift", "shift_name", "duration_minutes"], shift_rows
+        )
+        if alteration_rows:
+            frappe.db.bulk_insert(
+                "Shift Alteration",
+                [*child, "date", "alteration_type", "minutes", "machine", "reason"],
+                alteration_rows,
+            )
+        return [row[0] for row in parents]
+
+    def _covered_alterations(self, resolver):
+        alterations = []
+        for cal in resolver.calendars.values():
+            for alt in cal["alterations"]:
+                date_str = alt["date"]
+                if not str(self.start_date) <= date_str <= str(self.end_date):
+                    continue
+                general, _source = resolver.resolve(date_str)
+                if general is cal:
+                    alterations.append(alt)
+        return sorted(alterations, key=lambda alt: alt["date"])
+
+    @staticmethod
+    def _deltas(before, after):
+        delta = after.capacity - before.capacity
+        result = {}
+        for row, col in zip(*np.nonzero(delta), strict=True):
+            result.setdefault(before.machines[row], {})[before.dates[col]] = int(delta[row, col])
+        return result
@@ -0,0 +1,235 @@
+# Copyright (c) 2026, Essdee and contributors
+# For license information, please see license.txt
+
+from datetime import timedelta
+
+import frappe
+from frappe.utils import getdate
+
+DAY_NAMES = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+CALENDAR_FIELDS = [
+    "name", "start_date", "end_date", "is_default", "machine", "total_duration_minutes",
+    "sunday", "monday", "tuesday", "wednesday", "thursday", "friday", "saturday",
+]
+
+
+class CalendarResolver:
+    """In-memory Shift Allocation lookups for a date window.
+
+    Every calendar overlapping [start_date, end_date], plus the default one, is
+    loaded with its shifts and alterations in four queries. Lookups for any
+    (date, machine) inside the window are then answered from per-day indexes
+    using the same priority as the desk:
+      1. Machine-specific single-day
+      2. General single-day
+      3. Machine-specific range
+      4. General range
+      5. Default
+    """
+
+    def __init__(self, start_date, end_date=None):
+        self.start_date = getdate(start_date)
+        self.end_date = getdate(end_date or start_date)
+
+        self.calendars = {}
+        self.default = None
+
+        self._machine_single = {}
+        self._general_single = {}
+        self._machine_range = {}
+        self._general_range = {}
+        self._alteration_deltas = {}
+
+        self._load()
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def resolve(self, date, machine=None):
+        """Return (calendar, source) for a date, where source is 'single', 'range' or 'default'."""
+        date_str = str(getdate(date))
+
+        if machine:
+            cal = self._machine_single.get((machine, date_str))
+            if cal:
+                return cal, "single"
+
+        cal = self._general_single.get(date_str)
+        if cal:
+            return cal, "single"
+
+        if machine:
+            cal = self._machine_range.get((machine, date_str))
+            if cal:
+                return cal, "range"
+
+        cal = self._general_range.get(date_str)
+        if cal:
+            return cal, "range"
+
+        if self.default:
+            return self.default, "default"
+
+        return None, None
+
+    def get_calendar_name(self, date, machine=None):
+        """Return (calendar_name, source), mirroring `_get_best_calendar_for_date`."""
+        cal, source = self.resolve(date, machine)
+        return (cal["name"], source) if cal else (None, None)
+
+    def get_alteration_delta(self, date, machine=None):
+        """Net Add/Reduce minutes for a date from the general calendar's alterations.
+
+        Alterations only live on general calendars, so day-level rows always apply
+        and machine-level rows apply to their own machine.
+        """
+        date_str = str(getdate(date))
+        cal, _source = self.resolve(date_str)
+        if not cal:
+            return 0
+
+        deltas = self._alteration_deltas.get((cal["name"], date_str))
+        if not deltas:
+            return 0
+
+        delta = deltas.get(None, 0)
+        if machine:
+            delta += deltas.get(machine, 0)
+        return delta
+
+    def get_capacity(self, date, machine=None, skip_weekday_check=False):
+        """Effective capacity in minutes for a machine on a date."""
+        date_obj = getdate(date)
+        cal, _source = self.resolve(date_obj, machine)
+        if not cal:
+            return 0
+
+        if not skip_weekday_check and not cal.get(DAY_NAMES[date_obj.weekday()]):
+            return 0
+
+        base = cal.get("total_duration_minutes") or 0
+        return max(0, base + self.get_alteration_delta(date_obj, machine))
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    def _load(self):
+        rows = frappe.get_all(
+            "Shift Allocation",
+            filters={
+                "start_date": ["<=", self.end_date],
+                "end_date": [">=", self.start_date],
+                "is_default": 0,
+            },
+            fields=CALENDAR_FIELDS,
+            order_by="modified desc",
+        )
+        rows += frappe.get_all(
+            "Shift Allocation",
+            filters={"is_default": 1},
+            fields=CALENDAR_FIELDS,
+            order_by="modified desc",
+            limit=1,
+        )
+
+        self.calendars = load_calendars(rows)
+
+        for cal in self.calendars.values():
+            for alt in cal["alterations"]:
+                minutes = alt["minutes"] or 0
+                if alt["alteration_type"] != "Add":
+                    minutes = -minutes
+                deltas = self._alteration_deltas.setdefault((cal["name"], alt["date"]), {})
+                deltas[alt["machine"] or None] = deltas.get(alt["machine"] or None, 0) + minutes
+
+            if cal["is_default"]:
+                self.default = cal
+            else:
+                self._index_calendar(cal)
+
+    def _index_calendar(self, cal):
+        # Rows arrive newest first, so setdefault keeps the same winner
+        # frappe.db.get_value would have picked.
+        cal_start = getdate(cal["start_date"])
+        cal_end = getdate(cal["end_date"])
+        is_single = cal_start == cal_end
+        machine = cal["machine"]
+
+        if machine:
+            index = self._machine_single if is_single else self._machine_range
+        else:
+            index = self._general_single if is_single else self._general_range
+
+        day = max(cal_start, self.start_date)
+        last = min(cal_end, self.end_date)
+        while day <= last:
+            key = (machine, str(day)) if machine else str(day)
+            index.setdefault(key, cal)
+            day += timedelta(days=1)
+
+
+def load_calendars(rows):
+    """Serialize Shift Allocation rows (CALENDAR_FIELDS) with their shifts and alterations.
+
+    Children for every calendar are read in two queries. Returns {name: calendar}
+    in the order of `rows`.
+    """
+    calendars = {row.name: _serialize_calendar(row) for row in rows}
+    if not calendars:
+        return calendars
+
+    names = list(calendars)
+    shifts = frappe.get_all(
+        "Shift Allocation Item",
+        filters={"parenttype": "Shift Allocation", "parent": ["in", names]},
+        fields=["parent", "shift", "shift_name", "duration_minutes"],
+        order_by="idx",
+    )
+    for row in shifts:
+        calendars[row.parent]["shifts"].append({
+            "shift": row.shift,
+            "shift_name": row.shift_name,
+            "duration_minutes": row.duration_minutes or 0,
+        })
+
+    alterations = frappe.get_all(
+        "Shift Alteration",
+        filters={"parenttype": "Shift Allocation", "parent": ["in", names]},
+        fields=["name", "parent", "date", "alteration_type", "minutes", "machine", "reason"],
+        order_by="idx",
+    )
+    for row in alterations:
+        calendars[row.parent]["alterations"].append({
+            "name": row.name,
+            "parent": row.parent,
+            "date": str(row.date),
+            "alteration_type": row.alteration_type,
+            "minutes": row.minutes,
+            "machine": row.machine,
+            "reason": row.reason,
+        })
+    return calendars
+
+
+def _serialize_calendar(row):
+    """Shape a Shift Allocation row the way the capacity planning page expects."""
+    return {
+        "name": row.name,
+        "start_date": str(row.start_date),
+        "end_date": str(row.end_date),
+        "is_default": row.is_default,
+        "machine": row.machine or None,
+        "total_duration_minutes": row.total_duration_minutes or 0,
+        "shifts": [],
+        "alterations": [],
+        "sunday": row.sunday,
+        "monday": row.monday,
+        "tuesday": row.tuesday,
+        "wednesday": row.wednesday,
+        "thursday": row.thursday,
+        "friday": row.friday,
+        "saturday": row.saturday,
+    }
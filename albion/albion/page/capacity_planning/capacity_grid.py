@@ -0,0 +1,226 @@
+# Copyright (c) 2026, Essdee and contributors
+# For license information, please see license.txt
+
+from datetime import timedelta
+
+import frappe
+import numpy as np
+from frappe.utils import getdate
+
+from albion.albion.page.capacity_planning.calendar_resolver import DAY_NAMES, CalendarResolver
+
+
+class CapacityGrid:
+    """Dense machine x date capacity and usage arrays for a window.
+
+    Rows follow `machines` (Machine names), columns follow `dates`. Calendars
+    come from a single CalendarResolver load and usage from one grouped
+    Machine Operation query; every cell is then filled with array operations
+    rather than per-cell lookups.
+
+    Arrays:
+      capacity      effective minutes on working days, 0 on off days
+      raw_capacity  effective minutes ignoring the weekday flags
+      working       whether the resolved calendar works on that weekday
+      used          allocated Machine Operation minutes
+      allocations   number of Machine Operation rows per cell
+    """
+
+    def __init__(self, start_date, end_date, machines=None, resolver=None, fill=True):
+        self.start_date = getdate(start_date)
+        self.end_date = getdate(end_date)
+
+        if machines is None:
+            machines = frappe.get_all("Machine", order_by="machine_id", pluck="name")
+        self.machines = list(machines)
+        self.machine_index = {m: i for i, m in enumerate(self.machines)}
+
+        days = max(0, (self.end_date - self.start_date).days + 1)
+        self.dates = [str(self.start_date + timedelta(days=i)) for i in range(days)]
+        self.date_index = {d: i for i, d in enumerate(self.dates)}
+
+        shape = (len(self.machines), len(self.dates))
+        self.capacity = np.zeros(shape, dtype=np.int64)
+        self.raw_capacity = np.zeros(shape, dtype=np.int64)
+        self.working = np.zeros(shape, dtype=bool)
+        self.used = np.zeros(shape, dtype=np.float64)
+        self.allocations = np.zeros(shape, dtype=np.int64)
+
+        self.resolver = resolver
+        if fill:
+            self.resolver = resolver or CalendarResolver(self.start_date, self.end_date)
+            if self.machines and self.dates:
+                self._fill_capacity()
+                self._fill_used()
+
+    @classmethod
+    def from_ledger(cls, start_date, end_date, machines=None):
+        """Read the grid from Machine Day rows with one range scan.
+
+        Returns None unless the ledger has a row for every machine and date,
+        so callers can fall back to computing the grid live.
+        """
+        grid = cls(start_date, end_date, machines=machines, fill=False)
+        if not grid.machines or not grid.dates:
+            return grid
+
+        rows = frappe.db.sql(
+            """
+            SELECT machine, `date`, capacity_minutes, used_minutes, is_off_day
+            FROM `tabMachine Day`
+            WHERE `date` BETWEEN %(start)s AND %(end)s
+            """,
+            {"start": grid.start_date, "end": grid.end_date},
+            as_dict=True,
+        )
+        rows = [r for r in rows if r.machine in grid.machine_index]
+        if len(rows) != len(grid.machines) * len(grid.dates):
+            return None
+
+        cells = (
+            np.array([grid.machine_index[r.machine] for r in rows]),
+            np.array([grid.date_index[str(r.date)] for r in rows]),
+        )
+        grid.raw_capacity[cells] = [r.capacity_minutes or 0 for r in rows]
+        grid.working[cells] = [not r.is_off_day for r in rows]
+        grid.used[cells] = [r.used_minutes or 0 for r in rows]
+        grid.capacity = np.where(grid.working, grid.raw_capacity, 0)
+        return grid
+
+    @property
+    def report_capacity(self):
+        """Capacity as the availability report shows it: off days with work use the raw capacity."""
+        return np.where((self.capacity == 0) & (self.used > 0), self.raw_capacity, self.capacity)
+
+    @property
+    def available(self):
+        return np.maximum(0, self.capacity - self.used)
+
+    # ------------------------------------------------------------------
+    # Filling
+    # ------------------------------------------------------------------
+
+    def _fill_capacity(self):
+        calendars = list(self.resolver.calendars.values())
+        cal_index = {cal["name"]: i for i, cal in enumerate(calendars)}
+        # Extra trailing row stands in for "no calendar" (0 minutes, never working)
+        missing = len(calendars)
+
+        totals = np.array(
+            [cal["total_duration_minutes"] or 0 for cal in calendars] + [0], dtype=np.int64
+        )
+        weekday_mask = np.array(
+            [[bool(cal.get(day)) for day in DAY_NAMES] for cal in calendars] + [[False] * 7],
+            dtype=bool,
+        )
+
+        n_dates = len(self.dates)
+        general_range = np.full(n_dates, -1, dtype=np.int64)
+        general_single = np.full(n_dates, -1, dtype=np.int64)
+        machine_range = []
+        machine_single = []
+
+        # Resolver keeps calendars newest first; paint oldest first so the
+        # newest one wins where calendars of the same kind overlap.
+        for cal in reversed(calendars):
+            if cal["is_default"]:
+                continue
+            cols = self._date_slice(cal["start_date"], cal["end_date"])
+            if cols is None:
+                continue
+            is_single = cal["start_date"] == cal["end_date"]
+            idx = cal_index[cal["name"]]
+            if cal["machine"]:
+                row = self.machine_index.get(cal["machine"])
+                if row is not None:
+                    (machine_single if is_single else machine_range).append((row, cols, idx))
+            else:
+                (general_single if is_single else general_range)[cols] = idx
+
+        default = cal_index[self.resolver.default["name"]] if self.resolver.default else missing
+        general = np.where(general_single >= 0, general_single,
+                           np.where(general_range >= 0, general_range, default))
+
+        # Layer the priorities from lowest to highest:
+        # general range/default < machine range < general single < machine single
+        grid = np.broadcast_to(np.where(general_range >= 0, general_range, default),
+                               (len(self.machines), n_dates)).copy()
+        for row, cols, idx in machine_range:
+            grid[row, cols] = idx
+        single_cols = general_single >= 0
+        grid[:, single_cols] = general_single[single_cols]
+        for row, cols, idx in machine_single:
+            grid[row, cols] = idx
+
+        weekdays = np.array([getdate(d).weekday() for d in self.dates], dtype=np.int64)
+        base = totals[grid]
+        working = weekday_mask[grid, weekdays[np.newaxis, :]]
+
+        delta = self._alteration_deltas(calendars, cal_index, general)
+
+        self.working = working
+        self.raw_capacity = np.maximum(0, base + delta)
+        self.capacity = np.where(working, self.raw_capacity, 0)
+
+    def _alteration_deltas(self, calendars, cal_index, general):
+        """Scatter-add Add/Reduce minutes from each date's general calendar."""
+        delta = np.zeros((len(self.machines), len(self.dates)), dtype=np.int64)
+
+        day_cols, day_minutes = [], []
+        machine_rows, machine_cols, machine_minutes = [], [], []
+        for cal in calendars:
+            idx = cal_index[cal["name"]]
+            for alt in cal["alterations"]:
+                col = self.date_index.get(alt["date"])
+                if col is None or general[col] != idx:
+                    continue
+                minutes = alt["minutes"] or 0
+                if alt["alteration_type"] != "Add":
+                    minutes = -minutes
+                if not alt["machine"]:
+                    day_cols.append(col)
+                    day_minutes.append(minutes)
+                elif alt["machine"] in self.machine_index:
+                    machine_rows.append(self.machine_index[alt["machine"]])
+                    machine_cols.append(col)
+                    machine_minutes.append(minutes)
+
+        if day_cols:
+            day_delta = np.zeros(len(self.dates), dtype=np.int64)
+            np.add.at(day_delta, np.array(day_cols), np.array(day_minutes, dtype=np.int64))
+            delta += day_delta[np.newaxis, :]
+        if machine_rows:
+            np.add.at(
+                delta,
+                (np.array(machine_rows), np.array(machine_cols)),
+                np.array(machine_minutes, dtype=np.int64),
+            )
+        return delta
+
+    def _fill_used(self):
+        rows = frappe.db.sql(
+            """
+            SELECT machine, operation_date, SUM(allocated_minutes) AS used, COUNT(*) AS allocations
+            FROM `tabMachine Operation`
+            WHERE operation_date BETWEEN %(start)s AND %(end)s
+            GROUP BY machine, operation_date
+            """,
+            {"start": self.start_date, "end": self.end_date},
+            as_dict=True,
+        )
+        rows = [r for r in rows if r.machine in self.machine_index]
+        if not rows:
+            return
+        cells = (
+            np.array([self.machine_index[r.machine] for r in rows]),
+            np.array([self.date_index[str(r.operation_date)] for r in rows]),
+        )
+        np.add.at(self.used, cells, np.array([r.used or 0 for r in rows], dtype=np.float64))
+        np.add.at(self.allocations, cells, np.array([r.allocations for r in rows], dtype=np.int64))
+
+    def _date_slice(self, start, end):
+        first = max(getdate(start), self.start_date)
+        last = min(getdate(end), self.end_date)
+        if first > last:
+            return None
+        return slice((first - self.start_date).days, (last - self.start_date).days + 1)
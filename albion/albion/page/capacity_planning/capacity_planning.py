@@ -3,137 +3,53 @@
 
 import frappe
 from frappe import _
+from frappe.utils import add_days, add_to_date, cint, get_datetime, getdate, now_datetime
+
+from albion.albion.api.columnar import encode_columns
+from albion.albion.doctype.machine_operation_tombstone.machine_operation_tombstone import (
+    TOMBSTONE_RETENTION_DAYS,
+)
+from albion.albion.doctype.order_completion.order_completion import get_completion
+from albion.albion.page.capacity_planning import allocation_store
+from albion.albion.page.capacity_planning.calendar_cache import get_window_calendars
+from albion.albion.page.capacity_planning.calendar_pattern import ShiftPattern
+from albion.albion.page.capacity_planning.calendar_resolver import CalendarResolver
+from albion.albion.page.capacity_planning.order_cache import get_order_payloads
+from albion.albion.page.capacity_planning.promise import quote_completion
+from albion.albion.page.capacity_planning.reflow import TimelineReflow
+from albion.albion.page.capacity_planning.replan import GlobalReplanner
+from albion.albion.page.capacity_planning.scenario import Scenario, compare_scenarios
+from albion.albion.page.capacity_planning.scheduler import AutoScheduler
 
 
 @frappe.whitelist()
 def get_order_data(order_name):
     """Fetch order data with item details including process minutes"""
-    order = frappe.get_doc("Order", order_name)
-
-    # Get order details
-    order_details = []
-    if order.order_details:
-        for detail in order.order_details:
-            order_details.append({
-                "style": detail.style,
-                "colour": detail.colour,
-                "size": detail.size,
-                "quantity": detail.quantity
-            })
-
-    # Build process map from Order's snapshot
-    process_map = {}
-    for op in order.order_processes or []:
-        process_map.setdefault(op.style, []).append({
-            "process_name": op.process_name,
-            "minutes": op.minutes,
-        })
+    payload = get_order_payloads([order_name]).get(order_name)
+    if not payload:
+        frappe.throw(_("Order {0} not found").format(order_name), frappe.DoesNotExistError)
+    return payload
 
-    # Get styles with their process details
-    items = []
-    if order.styles:
-        for item in order.styles:
-            style_doc = frappe.get_doc("Style", item.style)
-            processes = process_map.get(item.style, [])
-
-            items.append({
-                "style": item.style,
-                "style_name": style_doc.style_name,
-                "style_doc": {
-                    "style_code": style_doc.style_code,
-                    "style_name": style_doc.style_name,
-                    "machine_frame": style_doc.machine_frame,
-                    "processes": processes
-                }
-            })
 
-    return {
-        "name": order.name,
-        "order_date": order.order_date,
-        "delivery_date": order.delivery_date,
-        "docstatus": order.docstatus,
-        "items": items,
-        "order_details": order_details
-    }
+@frappe.whitelist()
+def get_orders_data(order_names):
+    """Fetch get_order_data payloads for several orders in one request.
+    Returns a list in the order of order_names, skipping unknown orders.
+    """
+    payloads = get_order_payloads(frappe.parse_json(order_names) or [])
+    return list(payloads.values())
 
 
 @frappe.whitelist()
 def get_shift_allocations(start_date, end_date):
     """Get shift allocations for date range and default allocation"""
-    calendar_names = frappe.get_all(
-        "Shift Allocation",
-        filters={
-            "start_date": ["<=", end_date],
-            "end_date": [">=", start_date]
-        },
-        fields=["name"],
-        order_by="start_date"
-    )
-
-    calendars = []
-    for cal in calendar_names:
-        calendars.append(_get_calendar_data(cal.name))
-
-    # Get default calendar (always fetched regardless of date range)
-    default_calendar = None
-    default_name = frappe.db.get_value("Shift Allocation", {"is_default": 1}, "name")
-    if default_name:
-        # Check if already in list
-        existing = next((c for c in calendars if c["name"] == default_name), None)
-        if existing:
-            default_calendar = existing
-        else:
-            default_calendar = _get_calendar_data(default_name)
-
+    calendars, default_calendar = get_window_calendars(start_date, end_date)
     return {
         "calendars": calendars,
         "default_calendar": default_calendar
     }
 
 
-def _get_calendar_data(calendar_name):
-    """Get full calendar data including shifts and alterations"""
-    doc = frappe.get_doc("Shift Allocation", calendar_name)
-
-    shifts = []
-    for row in doc.shifts or []:
-        shifts.append({
-            "shift": row.shift,
-            "shift_name": row.shift_name,
-            "duration_minutes": row.duration_minutes or 0
-        })
-
-    alterations = []
-    for row in doc.alterations or []:
-        alterations.append({
-            "name": row.name,
-            "parent": doc.name,
-            "date": str(row.date),
-            "alteration_type": row.alteration_type,
-            "minutes": row.minutes,
-            "machine": row.machine,
-            "reason": row.reason
-        })
-
-    return {
-        "name": doc.name,
-        "start_date": str(doc.start_date),
-        "end_date": str(doc.end_date),
-        "is_default": doc.is_default,
-        "machine": doc.machine or None,
-        "total_duration_minutes": doc.total_duration_minutes or 0,
-        "shifts": shifts,
-        "alterations": alterations,
-        "sunday": doc.sunday,
-        "monday": doc.monday,
-        "tuesday": doc.tuesday,
-        "wednesday": doc.wednesday,
-        "thursday": doc.thursday,
-        "friday": doc.friday,
-        "saturday": doc.saturday,
-    }
-
-
 def _get_best_calendar_for_date(date, machine=None):
     """Find the best Shift Allocation for a date, optionally for a specific machine.
     Priority:
@@ -143,61 +59,9 @@ def _get_best_calendar_for_date(date, machine=None):
       4. General range
       5. Default
     Returns (calendar_name, source) where source is 'single', 'range', or 'default'.
+    For more than one lookup, build a CalendarResolver for the window instead.
     """
-    if machine:
-        # 1. Machine-specific single-day
-        machine_single = frappe.db.get_value(
-            "Shift Allocation",
-            {"start_date": date, "end_date": date, "is_default": 0, "machine": machine},
-            "name"
-        )
-        if machine_single:
-            return machine_single, "single"
-
-    # 2. General single-day (no machine)
-    general_single = frappe.db.get_value(
-        "Shift Allocation",
-        {"start_date": date, "end_date": date, "is_default": 0, "machine": ["is", "not set"]},
-        "name"
-    )
-    if general_single:
-        return general_single, "single"
-
-    if machine:
-        # 3. Machine-specific range
-        machine_range = frappe.db.get_value(
-            "Shift Allocation",
-            {
-                "start_date": ["<=", date],
-                "end_date": [">=", date],
-                "is_default": 0,
-                "machine": machine
-            },
-            "name"
-        )
-        if machine_range:
-            return machine_range, "range"
-
-    # 4. General range (no machine)
-    general_range = frappe.db.get_value(
-        "Shift Allocation",
-        {
-            "start_date": ["<=", date],
-            "end_date": [">=", date],
-            "is_default": 0,
-            "machine": ["is", "not set"]
-        },
-        "name"
-    )
-    if general_range:
-        return general_range, "range"
-
-    # 5. Default calendar
-    default_name = frappe.db.get_value("Shift Allocation", {"is_default": 1}, "name")
-    if default_name:
-        return default_name, "default"
-
-    return None, None
+    return CalendarResolver(date).get_calendar_name(date, machine)
 
 
 @frappe.whitelist()
@@ -228,7 +92,9 @@ def update_date_shift(date, shifts, machine=None):
     if not machine:
         machine = None
 
-    cal_name, source = _get_best_calendar_for_date(date, machine)
+    date_str = str(getdate(date))
+    resolver = CalendarResolver(date_str)
+    cal, source = resolver.resolve(date_str, machine)
 
     # Build shift rows and compute total minutes
     shift_rows = []
@@ -244,18 +110,15 @@ def update_date_shift(date, shifts, machine=None):
 
     # For old_minutes: resolve from the calendar this machine was previously using
     if machine:
-        # What did this machine use before? Its own calendar or the general one?
-        old_cal_name, _ = _get_best_calendar_for_date(date, machine)
-        old_doc = frappe.get_doc("Shift Allocation", old_cal_name) if old_cal_name else None
-        old_minutes = old_doc.total_duration_minutes if old_doc else 0
+        old_minutes = cal["total_duration_minutes"] if cal else 0
     else:
         old_minutes = 0  # will be set below per branch
 
-    if source == "single" and cal_name:
-        doc = frappe.get_doc("Shift Allocation", cal_name)
+    if source == "single" and cal:
         # Only update if this calendar matches the same machine context
-        is_same_machine = (doc.machine or None) == machine
+        is_same_machine = cal["machine"] == machine
         if is_same_machine:
+            doc = frappe.get_doc("Shift Allocation", cal["name"])
             if not machine:
                 old_minutes = doc.total_duration_minutes or 0
             doc.shifts = []
@@ -266,16 +129,12 @@ def update_date_shift(date, shifts, machine=None):
             return {"old_minutes": old_minutes, "new_minutes": doc.total_duration_minutes}
 
     # Create a new single-day calendar
-    # For general calendars, get source from general resolution
+    # For machine calendars, working day flags come from the general resolution
     if machine:
-        source_doc = None
-        # Get the general calendar for working day flags
-        gen_cal_name, _ = _get_best_calendar_for_date(date, None)
-        if gen_cal_name:
-            source_doc = frappe.get_doc("Shift Allocation", gen_cal_name)
+        source_cal, _source = resolver.resolve(date_str)
     else:
-        source_doc = frappe.get_doc("Shift Allocation", cal_name) if cal_name else None
-        old_minutes = source_doc.total_duration_minutes if source_doc else 0
+        source_cal = cal
+        old_minutes = source_cal["total_duration_minutes"] if source_cal else 0
 
     new_cal = frappe.new_doc("Shift Allocation")
     new_cal.start_date = date
@@ -284,24 +143,24 @@ def update_date_shift(date, shifts, machine=None):
     new_cal.machine = machine
 
     # Copy working day flags from source
-    if source_doc:
+    if source_cal:
         for day in ("sunday", "monday", "tuesday", "wednesday", "thursday", "friday", "saturday"):
-            setattr(new_cal, day, getattr(source_doc, day, 0))
+            setattr(new_cal, day, source_cal.get(day) or 0)
 
     for row in shift_rows:
         new_cal.append("shifts", row)
     new_cal.total_duration_minutes = total_minutes
 
     # Copy alterations only for general calendars (machine-specific calendars have no alterations)
-    if not machine and source_doc and source_doc.alterations:
-        for alt in source_doc.alterations:
-            if str(alt.date) == str(date):
+    if not machine and source_cal:
+        for alt in source_cal["alterations"]:
+            if alt["date"] == date_str:
                 new_cal.append("alterations", {
-                    "date": alt.date,
-                    "alteration_type": alt.alteration_type,
-                    "minutes": alt.minutes,
-                    "machine": alt.machine,
-                    "reason": alt.reason
+                    "date": alt["date"],
+                    "alteration_type": alt["alteration_type"],
+                    "minutes": alt["minutes"],
+                    "machine": alt["machine"],
+                    "reason": alt["reason"]
                 })
 
     new_cal.insert(ignore_permissions=True)
@@ -309,15 +168,37 @@ def update_date_shift(date, shifts, machine=None):
 
 
 @frappe.whitelist()
-def add_shift_alteration(date, alteration_type, minutes, machine=None, reason=None):
-    """Add a shift alteration to the calendar covering the given date"""
+def apply_shift_pattern(start_date, end_date, shifts, machines=None, weekdays=None):
+    """Apply a shift list to a date range in bulk with one range calendar per machine.
+    shifts: JSON list of Shift record names
+    machines: optional JSON list of Machine names (default: a general calendar)
+    weekdays: optional JSON list of working day names, e.g. ["monday", "tuesday"] (default: every day)
+    Returns {"calendars": [...], "deltas": {machine: {date: minutes}}} with the capacity change per cell.
+    """
+    pattern = ShiftPattern(
+        start_date,
+        end_date,
+        frappe.parse_json(shifts),
+        machines=frappe.parse_json(machines) if machines else None,
+        weekdays=frappe.parse_json(weekdays) if weekdays else None,
+    )
+    return pattern.apply()
+
+
+@frappe.whitelist()
+def add_shift_alteration(date, alteration_type, minutes, machine=None, reason=None, reflow=0):
+    """Add a shift alteration to the calendar covering the given date
+    reflow: re-place the affected machines' allocations from this date forward (see reflow_allocations)
+    """
     minutes = int(minutes)
+    timeline = _alteration_reflow(date, machine) if cint(reflow) else None
 
-    cal_name, source = _get_best_calendar_for_date(date)
+    resolver = CalendarResolver(date)
+    cal, source = resolver.resolve(date)
 
-    if cal_name and source in ("single", "range"):
+    if cal and source in ("single", "range"):
         # Calendar exists — append alteration
-        doc = frappe.get_doc("Shift Allocation", cal_name)
+        doc = frappe.get_doc("Shift Allocation", cal["name"])
         doc.append("alterations", {
             "date": date,
             "alteration_type": alteration_type,
@@ -326,29 +207,28 @@ def add_shift_alteration(date, alteration_type, minutes, machine=None, reason=No
             "reason": reason
         })
         doc.save(ignore_permissions=True)
-        return {"calendar": doc.name}
+        return _with_reflow({"calendar": doc.name}, timeline)
 
     # No range/single calendar — create a single-day calendar from default
-    default_name = frappe.db.get_value("Shift Allocation", {"is_default": 1}, "name")
-    if not default_name:
+    default_cal = resolver.default
+    if not default_cal:
         frappe.throw(_("No Shift Allocation covers this date and no default calendar exists"))
 
-    default_doc = frappe.get_doc("Shift Allocation", default_name)
     new_cal = frappe.new_doc("Shift Allocation")
     new_cal.start_date = date
     new_cal.end_date = date
     new_cal.is_default = 0
 
     for day in ("sunday", "monday", "tuesday", "wednesday", "thursday", "friday", "saturday"):
-        setattr(new_cal, day, getattr(default_doc, day, 0))
+        setattr(new_cal, day, default_cal.get(day) or 0)
 
-    for shift_row in default_doc.shifts:
+    for shift_row in default_cal["shifts"]:
         new_cal.append("shifts", {
-            "shift": shift_row.shift,
-            "shift_name": shift_row.shift_name,
-            "duration_minutes": shift_row.duration_minutes
+            "shift": shift_row["shift"],
+            "shift_name": shift_row["shift_name"],
+            "duration_minutes": shift_row["duration_minutes"]
         })
-    new_cal.total_duration_minutes = default_doc.total_duration_minutes
+    new_cal.total_duration_minutes = default_cal["total_duration_minutes"]
 
     new_cal.append("alterations", {
         "date": date,
@@ -359,18 +239,26 @@ def add_shift_alteration(date, alteration_type, minutes, machine=None, reason=No
     })
 
     new_cal.insert(ignore_permissions=True)
-    return {"calendar": new_cal.name}
+    return _with_reflow({"calendar": new_cal.name}, timeline)
 
 
 @frappe.whitelist()
-def update_shift_alteration(alteration_name, alteration_type, minutes, reason=None):
-    """Update an existing shift alteration child row"""
+def update_shift_alteration(alteration_name, alteration_type, minutes, reason=None, reflow=0):
+    """Update an existing shift alteration child row
+    reflow: re-place the affected machines' allocations from the alteration date forward
+    """
     minutes = int(minutes)
 
     # Find the parent Shift Allocation containing this child row
-    parent_name = frappe.db.get_value("Shift Alteration", alteration_name, "parent")
-    if not parent_name:
+    alteration = frappe.db.get_value(
+        "Shift Alteration", alteration_name, ["parent", "date", "machine"], as_dict=True
+    )
+    if not alteration:
         frappe.throw(_("Shift alteration not found: {0}").format(alteration_name))
+    parent_name = alteration.parent
+    timeline = None
+    if cint(reflow):
+        timeline = _alteration_reflow(alteration.date, alteration.machine)
 
     doc = frappe.get_doc("Shift Allocation", parent_name)
     for row in doc.alterations or []:
@@ -383,7 +271,7 @@ def update_shift_alteration(alteration_name, alteration_type, minutes, reason=No
         frappe.throw(_("Alteration row not found in calendar"))
 
     doc.save(ignore_permissions=True)
-    return {"calendar": doc.name}
+    return _with_reflow({"calendar": doc.name}, timeline)
 
 
 @frappe.whitelist()
@@ -405,187 +293,266 @@ def delete_shift_alteration(alteration_name, parent_calendar):
 
 
 @frappe.whitelist()
-def get_existing_allocations(order, process):
+def reflow_allocations(from_date, machines=None):
+    """Re-place allocations from a date forward on the current capacity.
+    Overloaded days spill forward and chained work closes up behind freed days;
+    use it after capacity changes made outside the board (API, bulk patterns).
+    machines: JSON list of Machine names to reflow
+    Returns {updated, inserted, deleted, unplaced}.
+    """
+    machines = frappe.parse_json(machines) if machines else None
+    return TimelineReflow(from_date, machines).apply()
+
+
+def _alteration_reflow(date, machine=None):
+    """TimelineReflow for the machines an alteration can move work on, or None when there are none.
+    A machine alteration only touches its machine. A day-level one touches the machines with work
+    on that day or in the week after it, which covers any work chained across the altered day.
+    """
+    if machine:
+        machines = [machine]
+    else:
+        machines = frappe.get_all(
+            "Machine Operation",
+            filters={"operation_date": ["between", [date, add_days(date, 6)]]},
+            pluck="machine",
+            distinct=True,
+        )
+    return TimelineReflow(date, machines) if machines else None
+
+
+def _with_reflow(response, timeline):
+    if timeline:
+        response["reflow"] = timeline.apply()
+    return response
+
+
+# Response key -> SQL column for Machine Operation allocation queries
+ALLOCATION_COLUMNS = {
+    "name": "mo.name",
+    "machine_id": "m.machine_id",
+    "operation_date": "mo.operation_date",
+    "shift": "mo.shift",
+    "order": "mo.`order`",
+    "style": "mo.style",
+    "process": "mo.process_name",
+    "colour": "mo.colour",
+    "size": "mo.size",
+    "quantity": "mo.quantity",
+    "allocated_minutes": "mo.allocated_minutes",
+}
+# Sent as indexes into a per-response dictionary in the columnar format
+DICTIONARY_COLUMNS = ("machine_id", "shift", "order", "style", "process", "colour", "size")
+# Delta sync cursors trail the read by this much, so rows committed late are sent next time
+SYNC_OVERLAP_SECONDS = 5
+
+
+@frappe.whitelist()
+def get_existing_allocations(order, process, machines=None, machine_frames=None, fields=None):
     """Get existing machine allocations for order and process"""
-    logs = frappe.get_all(
-        "Machine Operation",
-        filters={
-            "order": order,
-            "process_name": process
-        },
-        fields=[
-            "name", "machine", "operation_date", "shift",
-            "style", "colour", "size", "quantity", "allocated_minutes"
-        ],
-        order_by="creation"
+    return _query_allocations(
+        ["mo.`order` = %(order)s", "mo.process_name = %(process)s"],
+        {"order": order, "process": process},
+        machines=machines,
+        machine_frames=machine_frames,
+        fields=fields,
+        order_by="mo.creation",
     )
 
-    allocations = []
-    for log in logs:
-        machine = frappe.get_doc("Machine", log.machine)
-        allocations.append({
-            "name": log.name,
-            "machine_id": machine.machine_id,
-            "operation_date": str(log.operation_date),
-            "shift": log.shift,
-            "order": log.order,
-            "style": log.style,
-            "process": process,
-            "colour": log.colour,
-            "size": log.size,
-            "quantity": log.quantity,
-            "allocated_minutes": log.allocated_minutes
-        })
 
-    return allocations
+@frappe.whitelist()
+def get_all_allocations(start_date, end_date, machines=None, machine_frames=None, orders=None, fields=None,
+                        columnar=0):
+    """Get all machine allocations for date range.
+    machines / machine_frames / orders: optional lists to fetch only the visible lanes
+    fields: optional list of response keys to return (name is always included)
+    columnar: return parallel arrays per field instead of a list of dicts, with
+    machine/order/style/... dictionary-encoded and operation_date as a day
+    offset from start_date (see api.columnar.encode_columns)
+    """
+    fields = _allocation_fields(fields)
+    rows = _query_allocations(
+        ["mo.operation_date BETWEEN %(start_date)s AND %(end_date)s"],
+        {"start_date": start_date, "end_date": end_date},
+        machines=machines,
+        machine_frames=machine_frames,
+        orders=orders,
+        fields=fields,
+        as_list=cint(columnar),
+    )
+    if not cint(columnar):
+        return rows
+
+    return encode_columns(
+        rows, fields, start_date, dictionary_fields=DICTIONARY_COLUMNS, date_fields=("operation_date",)
+    )
 
 
 @frappe.whitelist()
-def get_all_allocations(start_date, end_date):
-    """Get all machine allocations for date range"""
-    logs = frappe.get_all(
-        "Machine Operation",
-        filters={
-            "operation_date": ["between", [start_date, end_date]]
-        },
-        fields=[
-            "name", "machine", "operation_date", "shift", "process_name",
-            "style", "colour", "size", "quantity", "allocated_minutes", "order"
-        ]
+def get_allocation_changes(since_cursor=None, start_date=None, end_date=None,
+                           machines=None, machine_frames=None, orders=None):
+    """Get allocations changed since a previous sync.
+    Returns {cursor, full, upserts, deleted}. Pass the returned cursor back on the
+    next call. Without a cursor, or with one older than the tombstone retention,
+    the full range is returned with full=1 and the client should replace its set.
+    deleted lists names removed, or moved outside start_date..end_date, since the cursor.
+    The cursor trails the read by SYNC_OVERLAP_SECONDS, so a row written by a transaction
+    that commits after the read is still sent next time. Changes near the cursor can
+    therefore come twice: apply upserts and deletes by name.
+    """
+    cursor = str(add_to_date(now_datetime(), seconds=-SYNC_OVERLAP_SECONDS))
+    full = not since_cursor or get_datetime(since_cursor) < add_days(get_datetime(cursor), -TOMBSTONE_RETENTION_DAYS)
+
+    if full:
+        upserts = get_all_allocations(start_date, end_date, machines, machine_frames, orders)
+        return {"cursor": cursor, "full": 1, "upserts": upserts, "deleted": []}
+
+    changed = _query_allocations(
+        ["mo.modified > %(since)s"],
+        {"since": since_cursor},
+        machines=machines,
+        machine_frames=machine_frames,
+        orders=orders,
+    )
+    start, end = str(getdate(start_date)), str(getdate(end_date))
+    upserts = [row for row in changed if start <= row.operation_date <= end]
+    deleted = [row.name for row in changed if not start <= row.operation_date <= end]
+
+    deleted += frappe.get_all(
+        "Machine Operation Tombstone",
+        filters={"modified": [">", since_cursor], "operation_date": ["between", [start_date, end_date]]},
+        pluck="machine_operation",
     )
 
-    allocations = []
-    for log in logs:
-        machine = frappe.get_doc("Machine", log.machine)
-        allocations.append({
-            "name": log.name,
-            "machine_id": machine.machine_id,
-            "operation_date": str(log.operation_date),
-            "shift": log.shift,
-            "order": log.order,
-            "style": log.style,
-            "process": log.process_name,
-            "colour": log.colour,
-            "size": log.size,
-            "quantity": log.quantity,
-            "allocated_minutes": log.allocated_minutes
-        })
+    return {"cursor": cursor, "full": 0, "upserts": upserts, "deleted": deleted}
+
 
-    return allocations
+def _allocation_fields(fields):
+    """Response keys to select: the requested ones (all by default) with name first."""
+    fields = frappe.parse_json(fields) if fields else list(ALLOCATION_COLUMNS)
+    unknown = [f for f in fields if f not in ALLOCATION_COLUMNS]
+    if unknown:
+        frappe.throw(_("Unknown allocation fields: {0}").format(", ".join(unknown)))
+    if "name" not in fields:
+        fields = ["name", *fields]
+    return fields
+
+
+def _query_allocations(conditions, params, machines=None, machine_frames=None, orders=None,
+                       fields=None, order_by=None, as_list=False):
+    """Fetch Machine Operation rows joined to Machine in a single query.
+    as_list: return raw tuples in fields order, with dates left as dates
+    """
+    fields = _allocation_fields(fields)
+
+    conditions = list(conditions)
+    for column, key, values in (
+        ("m.machine_id", "machines", machines),
+        ("m.machine_frame", "machine_frames", machine_frames),
+        ("mo.`order`", "orders", orders),
+    ):
+        if values:
+            values = frappe.parse_json(values)
+            if isinstance(values, str):
+                values = [values]
+            conditions.append(f"{column} IN %({key})s")
+            params[key] = tuple(values)
+
+    select = ", ".join(f"{ALLOCATION_COLUMNS[f]} AS `{f}`" for f in fields)
+    order_clause = f"ORDER BY {order_by}" if order_by else ""
+
+    rows = frappe.db.sql(
+        f"""
+        SELECT {select}
+        FROM `tabMachine Operation` mo
+        JOIN `tabMachine` m ON m.name = mo.machine
+        WHERE {" AND ".join(conditions)}
+        {order_clause}
+        """,
+        params,
+        as_dict=not as_list,
+    )
+    if as_list:
+        return rows
+
+    if "operation_date" in fields:
+        for row in rows:
+            row.operation_date = str(row.operation_date)
+
+    return rows
 
 
 @frappe.whitelist()
-def save_allocations(allocations, start_date=None, end_date=None):
-    """Save capacity allocations to Machine Operation"""
+def save_allocations(allocations=None, start_date=None, end_date=None, upserts=None, deletes=None, overload=None):
+    """Save capacity allocations to Machine Operation.
+    Full mode (allocations): existing rows for the payload and range are loaded once,
+    diffed in memory and written with batched inserts/updates/deletes. Rows missing
+    from the payload inside start_date..end_date are deleted. Returns the saved names.
+    Change-set mode (upserts / deletes): only the given rows are inserted, updated or
+    deleted. Returns {"saved": [...], "deleted": [...]}.
+    Any per-row error aborts the save, as does a style placed on a machine of another
+    frame. Machine-days loaded past their capacity are reported as a warning, or abort
+    the save with overload="reject".
+    """
+    overload = overload or "flag"
+    if upserts is not None or deletes is not None:
+        return allocation_store.save_changes(frappe.parse_json(upserts), frappe.parse_json(deletes), overload)
+
     if isinstance(allocations, str):
         import json
         allocations = json.loads(allocations)
 
-    saved = []
-    errors = []
+    return allocation_store.save_full(allocations or [], start_date, end_date, overload)
 
-    for alloc in allocations:
-        try:
-            # Find machine by machine_id
-            machine = frappe.get_all(
-                "Machine",
-                filters={"machine_id": alloc.get("machine_id")},
-                fields=["name"],
-                limit=1
-            )
 
-            if not machine:
-                errors.append(f"Machine not found: {alloc.get('machine_id')}")
-                continue
-
-            machine_name = machine[0].name
-
-            # Check if this is an existing record by name
-            existing_name = alloc.get("name")
-            if existing_name and frappe.db.exists("Machine Operation", existing_name):
-                # Update existing record
-                log = frappe.get_doc("Machine Operation", existing_name)
-                log.machine = machine_name
-                log.order = alloc.get("order")
-                log.style = alloc.get("style")
-                log.process_name = alloc.get("process")
-                log.colour = alloc.get("colour")
-                log.size = alloc.get("size")
-                log.quantity = alloc.get("quantity")
-                log.operation_date = alloc.get("operation_date")
-                log.shift = alloc.get("shift")
-                log.allocated_minutes = alloc.get("allocated_minutes")
-                log.operator = frappe.session.user
-                log.save(ignore_permissions=True)
-                saved.append(log.name)
-            else:
-                # Check for existing record by unique key to prevent duplicates
-                existing = frappe.db.get_value(
-                    "Machine Operation",
-                    {
-                        "machine": machine_name,
-                        "order": alloc.get("order"),
-                        "style": alloc.get("style"),
-                        "process_name": alloc.get("process"),
-                        "colour": alloc.get("colour"),
-                        "size": alloc.get("size"),
-                        "operation_date": alloc.get("operation_date"),
-                    },
-                    "name",
-                )
-
-                if existing:
-                    # Update existing record instead of creating a duplicate
-                    log = frappe.get_doc("Machine Operation", existing)
-                    log.machine = machine_name
-                    log.order = alloc.get("order")
-                    log.style = alloc.get("style")
-                    log.process_name = alloc.get("process")
-                    log.colour = alloc.get("colour")
-                    log.size = alloc.get("size")
-                    log.quantity = alloc.get("quantity")
-                    log.operation_date = alloc.get("operation_date")
-                    log.shift = alloc.get("shift")
-                    log.allocated_minutes = alloc.get("allocated_minutes")
-                    log.operator = frappe.session.user
-                    log.save(ignore_permissions=True)
-                    saved.append(log.name)
-                else:
-                    # Create new Machine Operation
-                    log = frappe.new_doc("Machine Operation")
-                    log.machine = machine_name
-                    log.order = alloc.get("order")
-                    log.style = alloc.get("style")
-                    log.process_name = alloc.get("process")
-                    log.colour = alloc.get("colour")
-                    log.size = alloc.get("size")
-                    log.quantity = alloc.get("quantity")
-                    log.operation_date = alloc.get("operation_date")
-                    log.shift = alloc.get("shift")
-                    log.allocated_minutes = alloc.get("allocated_minutes")
-                    log.operator = frappe.session.user
-                    log.insert(ignore_permissions=True)
-                    saved.append(log.name)
-
-        except Exception as e:
-            errors.append(str(e))
-
-    if errors:
-        frappe.log_error(title="Capacity Planning Save Errors", message="\n".join(errors))
-        frappe.throw(_("Some allocations failed to save. Check error log."))
-
-    # Delete orphaned records not in the saved list
-    if start_date and end_date:
-        all_existing = frappe.get_all(
-            "Machine Operation",
-            filters={"operation_date": ["between", [start_date, end_date]]},
-            fields=["name"]
-        )
-        for rec in all_existing:
-            if rec.name not in saved:
-                frappe.delete_doc("Machine Operation", rec.name, ignore_permissions=True)
+@frappe.whitelist()
+def plan_workload(lines, horizon_days=None, apply=0, overload=None):
+    """Place workload lines onto machines day by day using server-side capacity.
+    lines: JSON list of {order, style, colour, size, process, qty, machine_id, start_date}
+    apply: when set, the planned allocations are also saved like save_allocations
+    change sets, with the same frame and overload checks (see overload there)
+    Returns one plan per line with its allocations and any unplaced remaining_qty.
+    """
+    lines = frappe.parse_json(lines)
+    if not lines:
+        return []
+
+    scheduler = AutoScheduler(lines, horizon_days)
+    plans = scheduler.plan()
+
+    if cint(apply):
+        _save_planned([alloc for plan in plans for alloc in plan["allocations"]], overload)
+
+    return plans
+
+
+@frappe.whitelist()
+def replan_open_orders(start_date=None, horizon_days=None, orders=None, apply=0, overload=None):
+    """Propose allocations for the unallocated quantity of all open submitted Orders.
+    Lines are placed earliest due date first on the compatible machine that finishes
+    them soonest; existing allocations stay where they are.
+    orders: optional JSON list of Order names (default: every open submitted Order)
+    apply: when set, the proposed allocations are also saved like save_allocations
+    change sets, with the same frame and overload checks (see overload there)
+    Returns {allocations, lines, orders, unplaced}: the additions to the current plan,
+    a summary per line, current vs proposed finish per order, and what did not fit.
+    """
+    planner = GlobalReplanner(start_date, horizon_days, frappe.parse_json(orders) if orders else None)
+    result = planner.plan()
+
+    if cint(apply):
+        _save_planned(result["allocations"], overload)
+
+    return result
+
 
-    return saved
+def _save_planned(allocations, overload=None):
+    """Save planned allocations through the change-set path and set their names."""
+    if not allocations:
+        return
+    saved = allocation_store.save_changes(upserts=allocations, overload=overload or "flag")["saved"]
+    for alloc, name in zip(allocations, saved, strict=True):
+        alloc["name"] = name
 
 
 @frappe.whitelist()
@@ -610,6 +577,51 @@ def delete_allocation(allocation_name):
         return {"success": False, "message": str(e)}
 
 
+@frappe.whitelist()
+def available_to_promise(style, process, quantity, start_date, horizon_days=None):
+    """Quote the earliest completion date for a quantity of a style's process.
+    Uses the free capacity of every machine compatible with the style's machine frame
+    from start_date over horizon_days (default 180). Nothing is booked.
+    Returns {completion_date, quantity, remaining_qty, minutes_per_unit, machines: [...]}.
+    """
+    return quote_completion(style, process, quantity, start_date, horizon_days)
+
+
+@frappe.whitelist()
+def create_scenario(start_date, end_date, label=None, machines=None):
+    """Copy the plan and capacity of a window into a what-if scenario.
+    machines: optional JSON list of Machine names (default: all)
+    Returns the scenario's evaluation; its "scenario" key names it for later calls.
+    """
+    scenario = Scenario(start_date, end_date, label=label,
+                        machines=frappe.parse_json(machines) if machines else None)
+    scenario.save()
+    return scenario.evaluate()
+
+
+@frappe.whitelist()
+def update_scenario(scenario, changes):
+    """Apply changes to a scenario's copy of the plan and return its new evaluation.
+    changes: JSON list of {"type": "alteration" | "downtime" | "move" | "reflow", ...}
+    """
+    doc = Scenario.load(scenario)
+    doc.apply_changes(frappe.parse_json(changes) or [])
+    doc.save()
+    return doc.evaluate()
+
+
+@frappe.whitelist()
+def compare_what_if(scenarios, include_live=1):
+    """Evaluate scenarios side by side, with the live plan first unless include_live=0."""
+    return compare_scenarios(frappe.parse_json(scenarios) or [], include_live=cint(include_live))
+
+
+@frappe.whitelist()
+def delete_scenario(scenario):
+    Scenario.load(scenario).delete()
+    return {"success": True}
+
+
 @frappe.whitelist()
 def get_machines():
     """Get all active machines"""
@@ -645,17 +657,8 @@ def get_orders():
 
 
 @frappe.whitelist()
-def get_order_tracking_summary():
-    """Get aggregated completed quantities from Order Tracking, grouped by order+item+colour+size"""
-    data = frappe.get_all(
-        "Order Tracking",
-        fields=[
-            "order",
-            "style",
-            "colour",
-            "size",
-            "sum(quantity) as completed_qty",
-        ],
-        group_by="`order`, `style`, `colour`, `size`",
-    )
-    return data
+def get_order_tracking_summary(orders=None):
+    """Get completed quantities grouped by order+item+colour+size from the Order Completion rollup
+    orders: optional list of Order names to limit the result to
+    """
+    return get_completion(frappe.parse_json(orders) if orders else None)
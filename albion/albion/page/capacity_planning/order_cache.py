@@ -0,0 +1,128 @@
+# Copyright (c) 2026, Essdee and contributors
+# For license information, please see license.txt
+
+import frappe
+
+# Hash of order name -> {"modified", "payload"}, for submitted orders only
+ORDER_CACHE_KEY = "albion:order_planning_payload"
+
+
+def get_order_payloads(order_names):
+    """Return {order_name: payload} in the shape get_order_data sends to the board.
+
+    Submitted orders are served from the cache while their `modified` matches;
+    their process snapshot never changes after submit. Everything else is
+    built from the Order, its child tables and Style in one query each.
+    Unknown names are left out.
+    """
+    order_names = list(dict.fromkeys(n for n in order_names if n))
+    if not order_names:
+        return {}
+
+    orders = frappe.get_all(
+        "Order",
+        filters={"name": ["in", order_names]},
+        fields=["name", "order_date", "delivery_date", "docstatus", "modified"],
+    )
+
+    payloads = {}
+    missing = []
+    for order in orders:
+        cached = frappe.cache.hget(ORDER_CACHE_KEY, order.name) if order.docstatus == 1 else None
+        if cached and cached["modified"] == str(order.modified):
+            payloads[order.name] = cached["payload"]
+        else:
+            missing.append(order)
+
+    if missing:
+        built = _build_payloads(missing)
+        for order in missing:
+            payloads[order.name] = built[order.name]
+            if order.docstatus == 1:
+                frappe.cache.hset(
+                    ORDER_CACHE_KEY, order.name, {"modified": str(order.modified), "payload": built[order.name]}
+                )
+
+    return {name: payloads[name] for name in order_names if name in payloads}
+
+
+def clear_order_payload_cache(order=None):
+    """Drop one order's cached payload, or all of them (e.g. after a Style change)."""
+    if order:
+        frappe.cache.hdel(ORDER_CACHE_KEY, order)
+    else:
+        frappe.cache.delete_value(ORDER_CACHE_KEY)
+
+
+def _build_payloads(orders):
+    names = [order.name for order in orders]
+    child_filters = {"parenttype": "Order", "parent": ["in", names]}
+
+    order_styles = frappe.get_all(
+        "Order Style", filters=child_filters, fields=["parent", "style"], order_by="idx"
+    )
+    order_details = frappe.get_all(
+        "Order Detail",
+        filters=child_filters,
+        fields=["parent", "style", "colour", "size", "quantity"],
+        order_by="idx",
+    )
+    order_processes = frappe.get_all(
+        "Order Process",
+        filters=child_filters,
+        fields=["parent", "style", "process_name", "minutes"],
+        order_by="idx",
+    )
+
+    styles = {}
+    style_names = list({row.style for row in order_styles if row.style})
+    if style_names:
+        for row in frappe.get_all(
+            "Style",
+            filters={"name": ["in", style_names]},
+            fields=["name", "style_code", "style_name", "machine_frame"],
+        ):
+            styles[row.name] = row
+
+    payloads = {
+        order.name: {
+            "name": order.name,
+            "order_date": order.order_date,
+            "delivery_date": order.delivery_date,
+            "docstatus": order.docstatus,
+            "items": [],
+            "order_details": [],
+        }
+        for order in orders
+    }
+
+    for row in order_details:
+        payloads[row.parent]["order_details"].append({
+            "style": row.style,
+            "colour": row.colour,
+            "size": row.size,
+            "quantity": row.quantity
+        })
+
+    # Build process map from each Order's snapshot
+    process_map = {}
+    for row in order_processes:
+        process_map.setdefault((row.parent, row.style), []).append({
+            "process_name": row.process_name,
+            "minutes": row.minutes,
+        })
+
+    for row in order_styles:
+        style = styles.get(row.style) or frappe._dict()
+        payloads[row.parent]["items"].append({
+            "style": row.style,
+            "style_name": style.style_name,
+            "style_doc": {
+                "style_code": style.style_code,
+                "style_name": style.style_name,
+                "machine_frame": style.machine_frame,
+                "processes": process_map.get((row.parent, row.style), [])
+            }
+        })
+
+    return payloads
@@ -0,0 +1,95 @@
+# Copyright (c) 2026, Essdee and contributors
+# For license information, please see license.txt
+
+import frappe
+import numpy as np
+from frappe import _
+from frappe.utils import add_days, cint, flt, getdate
+
+from albion.albion.page.capacity_planning.allocation_store import compatible_machines
+from albion.albion.page.capacity_planning.capacity_grid import CapacityGrid
+from albion.albion.page.capacity_planning.scheduler import DEFAULT_HORIZON_DAYS, MIN_BATCH_SIZE
+
+
+def quote_completion(style, process, quantity, start_date, horizon_days=None):
+    """Earliest completion date for `quantity` units of a style's process.
+
+    Every machine compatible with the style's machine frame works in parallel
+    on its free days (days without allocations, as the board keeps one
+    allocation per machine-day). Units per machine-day come from the free
+    capacity grid; a running total across machines then gives the completion
+    day with one search instead of a day-by-day loop.
+
+    Returns {completion_date, quantity, remaining_qty, minutes_per_unit,
+    machines: [{machine_id, quantity, start_date, end_date, days}]}.
+    completion_date is None when the horizon cannot hold the quantity.
+    """
+    quantity = cint(quantity)
+    if quantity < MIN_BATCH_SIZE:
+        frappe.throw(_("Quantity must be at least {0}").format(MIN_BATCH_SIZE))
+
+    style_row = frappe.db.get_value("Style", style, ["name", "machine_frame"], as_dict=True)
+    if not style_row:
+        frappe.throw(_("Style {0} not found").format(style))
+    minutes_per_unit = flt(frappe.db.get_value(
+        "Style Process", {"parent": style, "parenttype": "Style", "process_name": process}, "minutes"
+    ))
+    if not minutes_per_unit:
+        frappe.throw(_("No process minutes for {0} / {1}").format(style, process))
+
+    result = {
+        "completion_date": None,
+        "quantity": quantity,
+        "remaining_qty": quantity,
+        "minutes_per_unit": minutes_per_unit,
+        "machines": [],
+    }
+
+    machines = compatible_machines(style_row.machine_frame)
+    start = getdate(start_date)
+    end = add_days(start, (cint(horizon_days) or DEFAULT_HORIZON_DAYS) - 1)
+    grid = CapacityGrid.from_ledger(start, end, machines) or CapacityGrid(start, end, machines)
+    if not grid.machines or not grid.dates:
+        return result
+
+    units = free_units(grid, minutes_per_unit)
+    # Units finished by the end of each day, all machines together
+    finished = np.cumsum(units.sum(axis=0))
+    col = int(np.searchsorted(finished, quantity))
+    if col >= len(grid.dates):
+        # Not enough room: book everything the horizon has
+        col = len(grid.dates) - 1
+        quantity = int(finished[-1])
+
+    taken = units[:, :col + 1].copy()
+    # Trim the completion day so the split adds up to the quantity exactly
+    excess = int(taken.sum()) - quantity
+    for row in reversed(range(len(grid.machines))):
+        if excess <= 0:
+            break
+        cut = min(excess, int(taken[row, col]))
+        taken[row, col] -= cut
+        excess -= cut
+
+    for row in np.flatnonzero(taken.sum(axis=1)).tolist():
+        cols = np.flatnonzero(taken[row]).tolist()
+        result["machines"].append({
+            "machine_id": grid.machines[row],
+            "quantity": int(taken[row].sum()),
+            "start_date": grid.dates[cols[0]],
+            "end_date": grid.dates[cols[-1]],
+            "days": [{"date": grid.dates[c], "quantity": int(taken[row, c])} for c in cols],
+        })
+
+    result["remaining_qty"] = result["quantity"] - quantity
+    if not result["remaining_qty"]:
+        result["completion_date"] = grid.dates[col]
+    return result
+
+
+def free_units(grid, minutes_per_unit):
+    """Units each free machine-day can take; 0 where the day is off, full or too short."""
+    occupied = (grid.used > 0) | (grid.allocations > 0)
+    units = np.floor(np.where(occupied, 0, grid.capacity) / minutes_per_unit).astype(np.int64)
+    units[units < MIN_BATCH_SIZE] = 0
+    return units
@@ -0,0 +1,225 @@
+# Copyright (c) 2026, Essdee and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe import _
+from frappe.utils import add_days, cint, flt, getdate
+
+from albion.albion.page.capacity_planning.allocation_store import (
+    WRITE_FIELDS,
+    AllocationChangeSet,
+    is_changed,
+)
+from albion.albion.page.capacity_planning.capacity_grid import CapacityGrid
+from albion.albion.page.capacity_planning.scheduler import DEFAULT_HORIZON_DAYS, MIN_BATCH_SIZE
+
+# Columns that make consecutive allocations one run of the same work
+GROUP_KEY = ("order", "style", "colour", "size", "process_name")
+
+
+class TimelineReflow:
+    """Re-place machine timelines from a date forward after a capacity change.
+
+    Build it before the calendar change is saved and call `apply` after: the
+    constructor snapshots the old capacity, `apply` reads the new one.
+
+    On each machine, consecutive allocations of the same order, style, colour,
+    size and process form a group. Groups keep their order and are placed one
+    after the other on the new capacity, filling each day as far as its
+    minutes allow (one group per machine-day, as on the board). A group that
+    followed its predecessor with no free working day in between stays
+    chained to it, so it moves with it in both directions. Any other group
+    keeps its original start date unless the one before it runs past it.
+    Only rows whose date, quantity or shift change are written. Rows without
+    minutes per unit cannot be re-placed; they keep their days and no other
+    group is placed over them.
+    """
+
+    def __init__(self, from_date, machines=None, operations=None, before=None):
+        """machines: Machine names to reflow, required when reading from the database
+        operations/before: in-memory rows ({name, *WRITE_FIELDS}) and capacity grid to
+        reflow instead of the database, e.g. for a what-if scenario.
+        """
+        self.from_date = getdate(from_date)
+        if operations is None:
+            if not machines:
+                frappe.throw(_("Select the machines to reflow"))
+            operations = self._load_operations(machines)
+        else:
+            operations = self._group_by_machine(operations, machines)
+        self.operations = operations
+        self.machines = sorted(self.operations)
+
+        if before is not None:
+            self.end_date = before.end_date
+            self.before = before
+        else:
+            last = max((row.operation_date for rows in self.operations.values() for row in rows), default=None)
+            self.end_date = add_days(getdate(last or self.from_date), DEFAULT_HORIZON_DAYS)
+            self.before = self._grid() if self.machines else None
+
+    def apply(self):
+        """Write moved allocations and return {updated, inserted, deleted, unplaced}."""
+        changes, unplaced = self.plan()
+        changes.apply()
+        return {
+            "updated": len(changes.updates),
+            "inserted": len(changes.inserts),
+            "deleted": len(changes.deletes),
+            "unplaced": unplaced,
+        }
+
+    def plan(self, after=None):
+        """Queue the moves without writing them. Returns (AllocationChangeSet, unplaced).
+        after: grid with the new capacity (default: read it now)
+        """
+        changes = AllocationChangeSet()
+        unplaced = []
+        if not self.machines:
+            return changes, unplaced
+
+        self.after = after or self._grid()
+        for machine in self.machines:
+            if machine not in self.after.machine_index:
+                continue
+            for group in self._place_groups(machine):
+                self._queue_group(machine, group, changes)
+                if group["remaining"] > 0:
+                    unplaced.append({
+                        "machine": machine,
+                        **{field: group["rows"][0][field] for field in GROUP_KEY},
+                        "quantity": group["remaining"],
+                    })
+        return changes, unplaced
+
+    # ------------------------------------------------------------------
+    # Placement
+    # ------------------------------------------------------------------
+
+    def _place_groups(self, machine):
+        row = self.before.machine_index[machine]
+        before = self.before.capacity[row]
+        after = self.after.capacity[row]
+        n_cols = len(self.after.dates)
+
+        groups = self._group_rows(self.operations[machine])
+        # Days held by groups that cannot be re-placed stay theirs
+        pinned = {
+            self.after.date_index[row.operation_date]
+            for group in groups
+            if group["minutes_per_unit"] <= 0
+            for row in group["rows"]
+            if row.operation_date in self.after.date_index
+        }
+        groups = [group for group in groups if group["minutes_per_unit"] > 0]
+
+        next_col = self.after.date_index.get(str(self.from_date), 0)
+        previous_end = next_col - 1
+        for group in groups:
+            first_col = self.after.date_index[group["rows"][0].operation_date]
+            # Chained when every day between the two groups was off before the change
+            chained = not before[previous_end + 1:first_col].any()
+            previous_end = self.after.date_index[group["rows"][-1].operation_date]
+
+            col = next_col if chained else max(next_col, first_col)
+            start_col = col
+            remaining = group["quantity"]
+            placement = []
+            while remaining >= MIN_BATCH_SIZE and col < n_cols:
+                if col in pinned:
+                    col += 1
+                    continue
+                fit = int(after[col] // group["minutes_per_unit"])
+                if fit >= MIN_BATCH_SIZE:
+                    qty = min(fit, remaining)
+                    placement.append((col, qty))
+                    remaining -= qty
+                col += 1
+
+            group["placement"] = placement
+            group["remaining"] = remaining
+            next_col = placement[-1][0] + 1 if placement else start_col
+        return groups
+
+    def _group_rows(self, rows):
+        groups = []
+        for row in rows:
+            key = tuple(row[field] for field in GROUP_KEY)
+            if groups and groups[-1]["key"] == key:
+                groups[-1]["rows"].append(row)
+            else:
+                groups.append({"key": key, "rows": [row]})
+
+        for group in groups:
+            group["quantity"] = sum(cint(row.quantity) for row in group["rows"])
+            reference = next((row for row in group["rows"] if cint(row.quantity) > 0), group["rows"][0])
+            group["minutes_per_unit"] = (
+                flt(reference.allocated_minutes) / cint(reference.quantity) if cint(reference.quantity) else 0
+            )
+        return groups
+
+    def _queue_group(self, machine, group, changes):
+        rows = group["rows"]
+        for idx, (col, qty) in enumerate(group["placement"]):
+            date_str = self.after.dates[col]
+            if idx < len(rows):
+                existing = rows[idx]
+                row = {field: existing[field] for field in WRITE_FIELDS}
+            else:
+                existing = None
+                row = {field: rows[0][field] for field in WRITE_FIELDS}
+                row["operator"] = frappe.session.user
+
+            if not existing or existing.operation_date != date_str:
+                row["operation_date"] = date_str
+                row["shift"] = self._get_shift(date_str, machine)
+            if not existing or cint(existing.quantity) != qty:
+                row["quantity"] = qty
+                row["allocated_minutes"] = qty * group["minutes_per_unit"]
+
+            if existing is None:
+                changes.insert(row)
+            elif is_changed(existing, row):
+                changes.update(existing.name, row)
+
+        for existing in rows[len(group["placement"]):]:
+            changes.delete(existing.name)
+
+    def _get_shift(self, date_str, machine):
+        if not self.after.resolver:
+            return None
+        cal, _source = self.after.resolver.resolve(date_str, machine)
+        if cal and cal["shifts"]:
+            return cal["shifts"][0]["shift"]
+        return None
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    def _grid(self):
+        return CapacityGrid(self.from_date, self.end_date, machines=self.machines)
+
+    def _load_operations(self, machines):
+        rows = frappe.db.sql(
+            f"""
+            SELECT name, {", ".join(f"`{f}`" for f in WRITE_FIELDS)}
+            FROM `tabMachine Operation`
+            WHERE operation_date >= %(from_date)s AND machine IN %(machines)s
+            ORDER BY machine, operation_date, creation
+            """,
+            {"from_date": self.from_date, "machines": tuple(machines)},
+            as_dict=True,
+        )
+        for row in rows:
+            row.operation_date = str(row.operation_date)
+        return self._group_by_machine(rows)
+
+    def _group_by_machine(self, rows, machines=None):
+        operations = {}
+        from_date = str(self.from_date)
+        for row in rows:
+            if row.operation_date < from_date or (machines and row.machine not in machines):
+                continue
+            operations.setdefault(row.machine, []).append(row)
+        return operations
@@ -0,0 +1,292 @@
+# Copyright (c) 2026, Essdee and contributors
+# For license information, please see license.txt
+
+import frappe
+import numpy as np
+from frappe.utils import add_days, cint, flt, getdate, nowdate
+
+from albion.albion.page.capacity_planning.capacity_grid import CapacityGrid
+from albion.albion.page.capacity_planning.scheduler import DEFAULT_HORIZON_DAYS, MIN_BATCH_SIZE
+
+
+class GlobalReplanner:
+    """Propose placements for the unallocated quantity of every open order.
+
+    A line is one Order Detail row (style, colour, size) for one of its
+    style's processes; its open quantity is the detail quantity minus what
+    Machine Operations already hold. Existing allocations are never moved.
+
+    Lines are placed earliest due date first, and a detail's processes in
+    Order Process order: a process starts no earlier than the day the
+    previous one finishes, whether that is an existing allocation or a line
+    placed just before it. Each line goes to the compatible machine that
+    would finish it soonest on its free days, which spreads the load across
+    a frame's machines. Machines of one frame only ever take styles of that
+    frame, so every frame is solved on its own. Machines without a frame are
+    kept for styles without one, which is a subset of what the board allows
+    but keeps the frames independent.
+    """
+
+    def __init__(self, start_date=None, horizon_days=None, orders=None):
+        self.start_date = getdate(start_date or nowdate())
+        self.horizon_days = cint(horizon_days) or DEFAULT_HORIZON_DAYS
+        self.orders = orders
+        self.lines = self._load_lines()
+
+    def plan(self):
+        """Return {allocations, lines, orders, unplaced} for the proposed additions.
+        orders compares each order's finish date in the current plan with the proposed one.
+        """
+        result = {"allocations": [], "lines": [], "orders": [], "unplaced": []}
+        if not self.lines:
+            return result
+
+        machines = frappe.get_all("Machine", fields=["name", "machine_frame"], order_by="machine_id")
+        end_date = add_days(self.start_date, self.horizon_days - 1)
+        grid = CapacityGrid(self.start_date, end_date, machines=[m.name for m in machines])
+        occupied = grid.allocations > 0
+
+        for frame in sorted({m.machine_frame or "" for m in machines} | {l["machine_frame"] for l in self.lines}):
+            rows = [grid.machine_index[m.name] for m in machines if (m.machine_frame or "") == frame]
+            lines = [l for l in self.lines if l["machine_frame"] == frame]
+            if not lines:
+                continue
+            if not rows:
+                for line in lines:
+                    result["unplaced"].append({**self._line_info(line), "quantity": line["quantity"]})
+                continue
+            # A detail's processes share its style, so they are always in the same frame
+            local = {id(line): i for i, line in enumerate(lines)}
+            args = [
+                (
+                    line["quantity"],
+                    line["minutes_per_unit"],
+                    line["due_col"],
+                    line["start_col"],
+                    local[id(line["after"])] if line["after"] else None,
+                )
+                for line in lines
+            ]
+            placements = solve_frame(args, grid.capacity[rows], occupied[rows])
+            for line, (local_row, days, remaining) in zip(lines, placements, strict=True):
+                self._collect(result, grid, line, rows[local_row] if local_row is not None else None, days, remaining)
+
+        result["orders"] = self._order_diff(result["allocations"])
+        return result
+
+    def _order_diff(self, allocations):
+        orders = {line["order"]: line["due_date"] for line in self.lines}
+        current = {
+            r.order: str(r.finish_date)
+            for r in frappe.db.sql(
+                """
+                SELECT `order`, MAX(operation_date) AS finish_date
+                FROM `tabMachine Operation`
+                WHERE `order` IN %(orders)s
+                GROUP BY `order`
+                """,
+                {"orders": tuple(orders)},
+                as_dict=True,
+            )
+        }
+        proposed = dict(current)
+        for alloc in allocations:
+            if alloc["operation_date"] > proposed.get(alloc["order"], ""):
+                proposed[alloc["order"]] = alloc["operation_date"]
+
+        return [
+            {
+                "order": order,
+                "delivery_date": due,
+                "current_finish": current.get(order),
+                "proposed_finish": proposed.get(order),
+                "added_quantity": sum(a["quantity"] for a in allocations if a["order"] == order),
+            }
+            for order, due in sorted(orders.items(), key=lambda item: (item[1] or "", item[0]))
+        ]
+
+    def _collect(self, result, grid, line, row, days, remaining):
+        info = self._line_info(line)
+        machine = grid.machines[row] if row is not None else None
+        for col, qty in days:
+            result["allocations"].append({
+                "machine_id": machine,
+                "operation_date": grid.dates[col],
+                "shift": self._get_shift(grid, grid.dates[col], machine),
+                "order": line["order"],
+                "style": line["style"],
+                "process": line["process"],
+                "colour": line["colour"],
+                "size": line["size"],
+                "quantity": qty,
+                "allocated_minutes": qty * line["minutes_per_unit"],
+            })
+
+        end_date = grid.dates[days[-1][0]] if days else None
+        result["lines"].append({
+            **info,
+            "quantity": line["quantity"],
+            "machine_id": machine,
+            "start_date": grid.dates[days[0][0]] if days else None,
+            "end_date": end_date,
+            "due_date": line["due_date"],
+            "days_late": max(0, (getdate(end_date) - getdate(line["due_date"])).days)
+            if end_date and line["due_date"] else 0,
+            "remaining_qty": remaining,
+        })
+        if remaining:
+            result["unplaced"].append({**info, "quantity": remaining})
+
+    @staticmethod
+    def _line_info(line):
+        return {f: line[f] for f in ("order", "style", "colour", "size", "process")}
+
+    @staticmethod
+    def _get_shift(grid, date_str, machine):
+        cal, _source = grid.resolver.resolve(date_str, machine)
+        if cal and cal["shifts"]:
+            return cal["shifts"][0]["shift"]
+        return None
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    def _load_lines(self):
+        filters = {"docstatus": 1, "status": ["!=", "Closed"]}
+        if self.orders:
+            filters["name"] = ["in", list(self.orders)]
+        orders = {
+            o.name: o
+            for o in frappe.get_all("Order", filters=filters, fields=["name", "delivery_date"])
+        }
+        if not orders:
+            return []
+
+        child_filters = {"parenttype": "Order", "parent": ["in", list(orders)]}
+        details = frappe.get_all(
+            "Order Detail",
+            filters=child_filters,
+            fields=["parent", "style", "colour", "size", "quantity", "delivery_date"],
+            order_by="idx",
+        )
+        processes = frappe.get_all(
+            "Order Process",
+            filters=child_filters,
+            fields=["parent", "style", "process_name", "minutes"],
+            order_by="idx",
+        )
+        frames = {
+            s.name: s.machine_frame
+            for s in frappe.get_all(
+                "Style",
+                filters={"name": ["in", list({d.style for d in details if d.style})]},
+                fields=["name", "machine_frame"],
+            )
+        } if details else {}
+        allocated, finished = {}, {}
+        for r in frappe.db.sql(
+            """
+            SELECT `order`, style, colour, size, process_name,
+                SUM(quantity) AS quantity, MAX(operation_date) AS finish_date
+            FROM `tabMachine Operation`
+            WHERE `order` IN %(orders)s
+            GROUP BY `order`, style, colour, size, process_name
+            """,
+            {"orders": tuple(orders)},
+            as_dict=True,
+        ):
+            key = (r.order, r.style, r.colour or None, r.size or None, r.process_name)
+            allocated[key] = cint(r.quantity)
+            finished[key] = getdate(r.finish_date)
+
+        process_map = {}
+        for p in processes:
+            if flt(p.minutes) > 0:
+                process_map.setdefault((p.parent, p.style), []).append(p)
+
+        lines = []
+        for d in details:
+            due = getdate(d.delivery_date or orders[d.parent].delivery_date) if (
+                d.delivery_date or orders[d.parent].delivery_date
+            ) else None
+            # The previous process of this detail: its open line, if any, and its last planned day
+            previous_line, previous_finish = None, None
+            for p in process_map.get((d.parent, d.style), []):
+                key = (d.parent, d.style, d.colour or None, d.size or None, p.process_name)
+                open_qty = cint(d.quantity) - allocated.get(key, 0)
+                after, start = previous_line, previous_finish
+                previous_line, previous_finish = None, finished.get(key)
+                if open_qty < MIN_BATCH_SIZE:
+                    continue
+                line = {
+                    "order": d.parent,
+                    "style": d.style,
+                    "colour": d.colour or None,
+                    "size": d.size or None,
+                    "process": p.process_name,
+                    "quantity": open_qty,
+                    "minutes_per_unit": flt(p.minutes),
+                    "machine_frame": frames.get(d.style) or "",
+                    "due_date": str(due) if due else None,
+                    # Lines without a due date go last
+                    "due_col": (due - self.start_date).days if due else self.horizon_days * 10,
+                    "start_col": max(0, (start - self.start_date).days) if start else 0,
+                    "after": after,
+                }
+                lines.append(line)
+                previous_line = line
+        return lines
+
+
+def solve_frame(lines, capacity, occupied):
+    """Place one frame's lines; only touches arrays.
+
+    lines: [(quantity, minutes_per_unit, due_col, start_col, after)] where after
+    is the index of the line for the previous process (or None); a line after
+    another shares its due_col and comes later in `lines`
+    capacity / occupied: machine x day arrays for the frame's machines
+    Returns [(machine_row or None, [(col, qty)], remaining)] in the order of `lines`.
+    """
+    occupied = occupied.copy()
+    results = [None] * len(lines)
+    order = sorted(range(len(lines)), key=lambda i: (lines[i][2], i))
+
+    for i in order:
+        quantity, minutes_per_unit, _due, start_col, after = lines[i]
+        if after is not None:
+            _row, previous_days, previous_remaining = results[after]
+            if previous_remaining or not previous_days:
+                # The previous process does not finish inside the horizon
+                results[i] = (None, [], quantity)
+                continue
+            start_col = max(start_col, previous_days[-1][0])
+
+        units = np.floor(np.where(occupied, 0, capacity) / minutes_per_unit).astype(np.int64)
+        units[:, :start_col] = 0
+        units[units < MIN_BATCH_SIZE] = 0
+        finished = np.cumsum(units, axis=1)
+
+        done = finished >= quantity
+        can_finish = done.any(axis=1)
+        if can_finish.any():
+            completion = np.where(can_finish, done.argmax(axis=1), np.iinfo(np.int64).max)
+            row = int(completion.argmin())
+        else:
+            # Nobody finishes in the horizon: take the machine that gets furthest
+            row = int(finished[:, -1].argmax())
+            if not finished[row, -1]:
+                results[i] = (None, [], quantity)
+                continue
+
+        days = []
+        remaining = quantity
+        for col in np.flatnonzero(units[row]).tolist():
+            qty = min(int(units[row, col]), remaining)
+            days.append((col, qty))
+            occupied[row, col] = True
+            remaining -= qty
+            if remaining < MIN_BATCH_SIZE:
+                break
+        results[i] = (row, days, remaining)
+    return results
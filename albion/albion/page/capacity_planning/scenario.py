@@ -0,0 +1,242 @@
+# Copyright (c) 2026, Essdee and contributors
+# For license information, please see license.txt
+
+import frappe
+import numpy as np
+from frappe import _
+from frappe.utils import cint, date_diff, getdate
+
+from albion.albion.page.capacity_planning.allocation_store import load_existing
+from albion.albion.page.capacity_planning.capacity_grid import CapacityGrid
+from albion.albion.page.capacity_planning.reflow import TimelineReflow
+
+SCENARIO_CACHE_PREFIX = "albion:scenario:"
+# Scenarios are scratch work; unused ones expire after a day
+SCENARIO_TTL_SECONDS = 24 * 60 * 60
+
+
+class Scenario:
+    """A what-if copy of the plan and capacity for a window.
+
+    The Machine Operation rows and the capacity grid of the window are copied
+    once and kept in the cache in compact form (plain rows plus one capacity
+    array). Changes are applied to the copy only, so the live Machine
+    Operations and Shift Allocations are never written.
+
+    Supported changes (dicts with a "type"):
+      alteration  {date, minutes, alteration_type: Add/Reduce, machine?, reflow?}
+      downtime    {machine, start_date, end_date, reflow?}
+      move        {name, machine?, operation_date?}
+      reflow      {from_date, machines?}
+
+    Alterations change a day's minutes directly, on working and off days
+    alike, the way the board adds overtime to a Saturday.
+    """
+
+    def __init__(self, start_date, end_date, label=None, machines=None):
+        self.name = frappe.generate_hash(length=10)
+        self.label = label or self.name
+
+        grid = CapacityGrid(start_date, end_date, machines=machines)
+        self.start_date = str(grid.start_date)
+        self.end_date = str(grid.end_date)
+        self.machines = grid.machines
+        self.capacity = grid.capacity
+        self.rows = [dict(row) for row in load_existing(
+            start_date=grid.start_date, end_date=grid.end_date, machines=grid.machines
+        ).values()]
+        self.changes = []
+        self.unplaced = []
+
+    # ------------------------------------------------------------------
+    # Storage
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def load(cls, name):
+        scenario = frappe.cache.get_value(SCENARIO_CACHE_PREFIX + name)
+        if not scenario:
+            frappe.throw(_("Scenario {0} not found or expired").format(name), frappe.DoesNotExistError)
+        return scenario
+
+    def save(self):
+        frappe.cache.set_value(SCENARIO_CACHE_PREFIX + self.name, self, expires_in_sec=SCENARIO_TTL_SECONDS)
+
+    def delete(self):
+        frappe.cache.delete_value(SCENARIO_CACHE_PREFIX + self.name)
+
+    # ------------------------------------------------------------------
+    # Changes
+    # ------------------------------------------------------------------
+
+    def apply_changes(self, changes):
+        handlers = {
+            "alteration": self._apply_alteration,
+            "downtime": self._apply_downtime,
+            "move": self._apply_move,
+            "reflow": self._apply_reflow,
+        }
+        for change in changes:
+            handler = handlers.get(change.get("type"))
+            if not handler:
+                frappe.throw(_("Unknown scenario change: {0}").format(change.get("type")))
+            handler(change)
+            self.changes.append(change)
+
+    def _apply_alteration(self, change):
+        grid = self.grid()
+        before = grid.capacity.copy()
+        col = self._col(grid, change.get("date"))
+        rows = self._rows(grid, [change["machine"]] if change.get("machine") else None)
+        minutes = cint(change.get("minutes"))
+        if change.get("alteration_type") != "Add":
+            minutes = -minutes
+        grid.capacity[rows, col] = np.maximum(0, grid.capacity[rows, col] + minutes)
+        self._after_capacity_change(change, grid, before, change.get("date"))
+
+    def _apply_downtime(self, change):
+        grid = self.grid()
+        before = grid.capacity.copy()
+        cols = slice(self._col(grid, change.get("start_date")), self._col(grid, change.get("end_date")) + 1)
+        grid.capacity[self._rows(grid, [change.get("machine")]), cols] = 0
+        self._after_capacity_change(change, grid, before, change.get("start_date"))
+
+    def _apply_move(self, change):
+        row = next((r for r in self.rows if r["name"] == change.get("name")), None)
+        if not row:
+            frappe.throw(_("Allocation {0} is not in this scenario").format(change.get("name")))
+        if change.get("machine"):
+            self._rows(self.grid(), [change["machine"]])
+            row["machine"] = change["machine"]
+        if change.get("operation_date"):
+            self._col(self.grid(), change["operation_date"])
+            row["operation_date"] = str(getdate(change["operation_date"]))
+
+    def _apply_reflow(self, change, grid=None, before=None):
+        grid = grid or self.grid()
+        timeline = TimelineReflow(
+            change.get("from_date") or self.start_date,
+            machines=change.get("machines"),
+            operations=self._sorted_rows(),
+            before=before or grid,
+        )
+        changes, unplaced = timeline.plan(after=grid)
+
+        by_name = {row["name"]: row for row in self.rows}
+        for name, values in changes.updates.items():
+            by_name[name].update(values)
+        deleted = set(changes.deletes)
+        self.rows = [row for row in self.rows if row["name"] not in deleted]
+        for idx, values in enumerate(changes.inserts, 1):
+            self.rows.append({"name": f"{self.name}-{len(self.changes)}-{idx}", **values})
+        self.unplaced.extend(unplaced)
+
+    def _after_capacity_change(self, change, grid, before, from_date):
+        self.capacity = grid.capacity
+        if cint(change.get("reflow")):
+            machines = [change["machine"]] if change.get("machine") else None
+            before_grid = self.grid()
+            before_grid.capacity = before
+            self._apply_reflow({"from_date": from_date, "machines": machines}, grid=grid, before=before_grid)
+
+    # ------------------------------------------------------------------
+    # Evaluation
+    # ------------------------------------------------------------------
+
+    def evaluate(self):
+        """Utilisation per machine, overloaded days and late orders for the scenario."""
+        grid = self.grid()
+        used = np.zeros_like(grid.capacity, dtype=np.float64)
+        for row in self.rows:
+            r = grid.machine_index.get(row["machine"])
+            c = grid.date_index.get(row["operation_date"])
+            if r is not None and c is not None:
+                used[r, c] += row["allocated_minutes"] or 0
+
+        capacity = grid.capacity.sum(axis=1)
+        utilisation = np.divide(used.sum(axis=1) * 100, capacity, out=np.zeros(len(grid.machines)), where=capacity > 0)
+        total_capacity = int(capacity.sum())
+
+        return {
+            "scenario": self.name,
+            "label": self.label,
+            "start_date": self.start_date,
+            "end_date": self.end_date,
+            "changes": len(self.changes),
+            "utilisation": round(float(used.sum() * 100 / total_capacity), 1) if total_capacity else 0,
+            "machines": {m: round(float(u), 1) for m, u in zip(grid.machines, utilisation.tolist(), strict=True)},
+            "overloaded_days": int((used > grid.capacity).sum()),
+            "late_orders": self._late_orders(),
+            "unplaced": self.unplaced,
+        }
+
+    def _late_orders(self):
+        finish = {}
+        for row in self.rows:
+            if row["order"] and row["operation_date"] > finish.get(row["order"], ""):
+                finish[row["order"]] = row["operation_date"]
+        unplaced_orders = {row["order"] for row in self.unplaced}
+        orders = set(finish) | unplaced_orders
+        if not orders:
+            return []
+
+        delivery = {
+            row.name: row.delivery_date
+            for row in frappe.get_all("Order", filters={"name": ["in", list(orders)]}, fields=["name", "delivery_date"])
+        }
+        late = []
+        for order in sorted(orders):
+            due = delivery.get(order)
+            if not due:
+                continue
+            days_late = date_diff(finish[order], due) if order in finish else 0
+            if days_late > 0 or order in unplaced_orders:
+                late.append({
+                    "order": order,
+                    "delivery_date": str(due),
+                    "finish_date": finish.get(order),
+                    "days_late": max(days_late, 0),
+                    "unplaced": order in unplaced_orders,
+                })
+        return late
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+
+    def grid(self):
+        """The scenario's capacity as a CapacityGrid (no database reads)."""
+        grid = CapacityGrid(self.start_date, self.end_date, machines=self.machines, fill=False)
+        grid.capacity = self.capacity.copy()
+        return grid
+
+    def _sorted_rows(self):
+        return sorted(
+            (frappe._dict(row) for row in self.rows),
+            key=lambda row: (row.machine, row.operation_date, row.name),
+        )
+
+    def _col(self, grid, date):
+        col = grid.date_index.get(str(getdate(date))) if date else None
+        if col is None:
+            frappe.throw(_("Date {0} is outside the scenario window").format(date))
+        return col
+
+    def _rows(self, grid, machines=None):
+        if not machines:
+            return slice(None)
+        rows = [grid.machine_index.get(m) for m in machines]
+        if None in rows:
+            frappe.throw(_("Machine {0} is not in this scenario").format(", ".join(machines)))
+        return rows
+
+
+def compare_scenarios(names, include_live=True):
+    """Evaluate scenarios side by side, optionally next to the live plan for the first window."""
+    scenarios = [Scenario.load(name) for name in names]
+    results = [scenario.evaluate() for scenario in scenarios]
+    if include_live and scenarios:
+        live = Scenario(scenarios[0].start_date, scenarios[0].end_date, label=_("Live plan"),
+                        machines=scenarios[0].machines)
+        results.insert(0, {**live.evaluate(), "scenario": None})
+    return results
@@ -0,0 +1,145 @@
+# Copyright (c) 2026, Essdee and contributors
+# For license information, please see license.txt
+
+import frappe
+import numpy as np
+from frappe import _
+from frappe.utils import add_days, cint, flt, getdate
+
+from albion.albion.page.capacity_planning.allocation_store import resolve_machines
+from albion.albion.page.capacity_planning.capacity_grid import CapacityGrid
+
+# Same rule as the board: never place fewer units than this on a day
+MIN_BATCH_SIZE = 1
+DEFAULT_HORIZON_DAYS = 180
+
+
+class AutoScheduler:
+    """Finite-capacity placement of workload lines onto machines.
+
+    Mirrors the board's auto split: the start day takes as many units as
+    its minutes have left after the allocations it already holds; after it,
+    days that hold an allocation are skipped and every free machine-day takes
+    as many units as its effective minutes allow. Lines are placed in the
+    order given, so each placement uses up its minutes and occupies its days
+    for the lines after it.
+
+    A line is a dict with order, style, colour, size, process, qty,
+    machine_id and start_date. minutes_per_unit is optional and otherwise
+    read from the Order's process snapshot.
+    """
+
+    def __init__(self, lines, horizon_days=None):
+        self.lines = lines
+        self.horizon_days = cint(horizon_days) or DEFAULT_HORIZON_DAYS
+        self.machine_map = resolve_machines(line.get("machine_id") for line in lines)
+        self.process_minutes = self._load_process_minutes()
+
+        start_dates = [getdate(line.get("start_date")) for line in lines]
+        start = min(start_dates)
+        end = add_days(max(start_dates), self.horizon_days - 1)
+        self.grid = CapacityGrid(start, end, machines=sorted(set(self.machine_map.values())))
+        self.occupied = self.grid.allocations > 0
+        self.used = self.grid.used.copy()
+        self.groups = self._load_start_groups()
+
+    def plan(self):
+        """Return one plan per line: {line, machine_id, allocations, remaining_qty, error}."""
+        return [self._plan_line(idx, line) for idx, line in enumerate(self.lines, 1)]
+
+    def _plan_line(self, idx, line):
+        qty = cint(line.get("qty") or line.get("quantity"))
+        result = {"line": idx, "machine_id": line.get("machine_id"), "allocations": [], "remaining_qty": qty}
+
+        machine = self.machine_map.get(line.get("machine_id"))
+        if not machine:
+            result["error"] = _("Machine not found")
+            return result
+
+        minutes_per_unit = flt(line.get("minutes_per_unit")) or self.process_minutes.get(
+            (line.get("order"), line.get("style"), line.get("process"))
+        )
+        if not minutes_per_unit:
+            result["error"] = _("No process minutes for {0} / {1}").format(line.get("style"), line.get("process"))
+            return result
+
+        group = (
+            line.get("order"), line.get("style"), line.get("process"),
+            line.get("colour") or None, line.get("size") or None,
+        )
+        row = self.grid.machine_index[machine]
+        start_col = (getdate(line.get("start_date")) - self.grid.start_date).days
+        end_col = start_col + self.horizon_days
+
+        # Units each free day can take, and the running total across them. As on the
+        # board, only the start day is shared with the allocations already on it.
+        left = np.maximum(0, self.grid.capacity[row, start_col:end_col] - self.used[row, start_col:end_col])
+        fit = np.floor(left / minutes_per_unit).astype(np.int64)
+        free = ~self.occupied[row, start_col:end_col]
+        # A save merges rows of one group on one day, so the start day is never shared with it
+        free[0] = (machine, self.grid.dates[start_col], *group) not in self.groups
+        free &= fit >= MIN_BATCH_SIZE
+        cols = np.flatnonzero(free)
+        if not len(cols):
+            return result
+
+        day_qty = fit[cols]
+        placed_before = np.cumsum(day_qty) - day_qty
+        day_qty = np.minimum(day_qty, qty - placed_before)
+        keep = day_qty >= MIN_BATCH_SIZE
+        cols, day_qty = cols[keep], day_qty[keep]
+
+        for col, alloc_qty in zip((cols + start_col).tolist(), day_qty.tolist(), strict=True):
+            date_str = self.grid.dates[col]
+            self.occupied[row, col] = True
+            self.used[row, col] += alloc_qty * minutes_per_unit
+            self.groups.add((machine, date_str, *group))
+            result["allocations"].append({
+                "machine_id": line.get("machine_id"),
+                "operation_date": date_str,
+                "shift": self._get_shift(date_str, machine),
+                "order": line.get("order"),
+                "style": line.get("style"),
+                "process": line.get("process"),
+                "colour": line.get("colour"),
+                "size": line.get("size"),
+                "quantity": alloc_qty,
+                "allocated_minutes": alloc_qty * minutes_per_unit,
+            })
+        result["remaining_qty"] = qty - int(day_qty.sum())
+        return result
+
+    def _get_shift(self, date_str, machine):
+        cal, _source = self.grid.resolver.resolve(date_str, machine)
+        if cal and cal["shifts"]:
+            return cal["shifts"][0]["shift"]
+        return None
+
+    def _load_start_groups(self):
+        """(machine, date, order, style, process, colour, size) of allocations on the lines' start days."""
+        machines = {self.machine_map.get(line.get("machine_id")) for line in self.lines} - {None}
+        if not machines:
+            return set()
+        rows = frappe.get_all(
+            "Machine Operation",
+            filters={
+                "machine": ["in", list(machines)],
+                "operation_date": ["in", list({getdate(line.get("start_date")) for line in self.lines})],
+            },
+            fields=["machine", "operation_date", "order", "style", "process_name", "colour", "size"],
+        )
+        return {
+            (r.machine, str(r.operation_date), r.order, r.style, r.process_name, r.colour or None, r.size or None)
+            for r in rows
+        }
+
+    def _load_process_minutes(self):
+        orders = {line.get("order") for line in self.lines if line.get("order")}
+        if not orders:
+            return {}
+        rows = frappe.get_all(
+            "Order Process",
+            filters={"parenttype": "Order", "parent": ["in", list(orders)]},
+            fields=["parent", "style", "process_name", "minutes"],
+        )
+        return {(r.parent, r.style, r.process_name): flt(r.minutes) for r in rows}
@@ -0,0 +1,145 @@
+# Copyright (c) 2026, Essdee and Contributors
+# See license.txt
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from albion.albion.page.capacity_planning.allocation_store import (
+	clear_machine_frame_cache,
+	save_changes,
+	save_full,
+)
+from albion.albion.page.capacity_planning.test_calendar_resolver import make_calendars
+
+
+def allocation(date, minutes, quantity=1, machine_id="CR-M2", style="AS-S", **extra):
+	return {
+		"machine_id": machine_id,
+		"order": "AS-O1",
+		"style": style,
+		"process": "AS-P",
+		"quantity": quantity,
+		"operation_date": date,
+		"allocated_minutes": minutes,
+		**extra,
+	}
+
+
+def operations(date):
+	return frappe.get_all(
+		"Machine Operation",
+		filters={"operation_date": date, "order": "AS-O1"},
+		fields=["name", "machine", "quantity", "allocated_minutes"],
+		order_by="name",
+	)
+
+
+class TestAllocationStore(FrappeTestCase):
+	"""CR-M2 has 420 minutes a day from Monday to Saturday in March 2032 (see make_calendars)."""
+
+	@classmethod
+	def setUpClass(cls):
+		super().setUpClass()
+		make_calendars()
+		frappe.get_doc({"doctype": "Machine", "machine_id": "AS-F1", "machine_frame": "AS-F1"}).insert(
+			ignore_links=True
+		)
+		frappe.get_doc({
+			"doctype": "Style",
+			"style_code": "AS-F2-S",
+			"style_name": "AS-F2-S",
+			"machine_frame": "AS-F2",
+			"gg": "12",
+		}).insert(ignore_links=True)
+
+	def setUp(self):
+		clear_machine_frame_cache()
+
+	def test_full_save_matches_existing_rows(self):
+		payload = [allocation("2032-03-15", 100), allocation("2032-03-15", 50, machine_id="CR-M1")]
+		names = save_full(payload)
+		modified = frappe.db.get_value("Machine Operation", names[0], "modified")
+
+		# Same rows without names match by key and are left alone
+		self.assertEqual(save_full(payload), names)
+		self.assertEqual(len(operations("2032-03-15")), 2)
+		self.assertEqual(frappe.db.get_value("Machine Operation", names[0], "modified"), modified)
+
+	def test_full_save_updates_and_deletes_in_range(self):
+		kept, dropped = save_full([allocation("2032-03-16", 100), allocation("2032-03-17", 100)])
+
+		names = save_full(
+			[allocation("2032-03-16", 200, quantity=2)], start_date="2032-03-16", end_date="2032-03-17"
+		)
+		self.assertEqual(names, [kept])
+		self.assertEqual(frappe.db.get_value("Machine Operation", kept, "quantity"), 2)
+		self.assertFalse(frappe.db.exists("Machine Operation", dropped))
+
+	def test_change_set_only_touches_given_rows(self):
+		first, second = save_full([allocation("2032-03-18", 100), allocation("2032-03-18", 100, machine_id="CR-M1")])
+
+		result = save_changes(
+			upserts=[allocation("2032-03-18", 60, process="AS-P2")],
+			deletes=[first, "MO-missing"],
+		)
+		self.assertEqual(result["deleted"], [first])
+		self.assertTrue(frappe.db.exists("Machine Operation", second))
+		self.assertEqual(len(operations("2032-03-18")), 2)
+
+	def test_moved_row_frees_its_old_key(self):
+		# A named row moving away and a new row at the key it left, in either payload order
+		for day, moved_first in ((24, True), (25, False)):
+			(name,) = save_changes(upserts=[allocation(f"2032-03-{day}", 100)])["saved"]
+			moved = allocation("2032-04-05", 100, name=name)
+			added = allocation(f"2032-03-{day}", 50)
+			saved = save_changes(upserts=[moved, added] if moved_first else [added, moved])["saved"]
+
+			self.assertEqual(len(set(saved)), 2)
+			self.assertEqual(str(frappe.db.get_value("Machine Operation", name, "operation_date")), "2032-04-05")
+			self.assertEqual([row.allocated_minutes for row in operations(f"2032-03-{day}")], [50])
+
+	def test_overload(self):
+		self.assertRaises(
+			frappe.ValidationError, save_changes, upserts=[allocation("2032-03-19", 500)], overload="reject"
+		)
+		self.assertEqual(operations("2032-03-19"), [])
+
+		# Flagged overloads are saved with a warning
+		frappe.clear_messages()
+		save_changes(upserts=[allocation("2032-03-19", 500)])
+		self.assertEqual(len(operations("2032-03-19")), 1)
+		self.assertTrue(frappe.get_message_log())
+
+	def test_overload_counts_existing_minutes(self):
+		save_changes(upserts=[allocation("2032-03-22", 300, machine_id="CR-M2")])
+		self.assertRaises(
+			frappe.ValidationError,
+			save_changes,
+			upserts=[allocation("2032-03-22", 200, process="AS-P2")],
+			overload="reject",
+		)
+		# Moving minutes off the day in the same change set makes room
+		existing = operations("2032-03-22")[0].name
+		save_changes(
+			upserts=[allocation("2032-03-22", 200, process="AS-P2")], deletes=[existing], overload="reject"
+		)
+
+	def test_off_day_uses_calendar_minutes(self):
+		# 2032-03-21 is a Sunday: the general range is off but its 420 minutes still bound the day
+		save_changes(upserts=[allocation("2032-03-21", 300)], overload="reject")
+		self.assertRaises(
+			frappe.ValidationError,
+			save_changes,
+			upserts=[allocation("2032-03-21", 200, process="AS-P2")],
+			overload="reject",
+		)
+
+	def test_frame_mismatch(self):
+		self.assertRaises(
+			frappe.ValidationError,
+			save_changes,
+			upserts=[allocation("2032-03-23", 10, machine_id="AS-F1", style="AS-F2-S")],
+		)
+		# Machines without a frame take any style
+		save_changes(upserts=[allocation("2032-03-23", 10, style="AS-F2-S")])
+		self.assertEqual(len(operations("2032-03-23")), 1)
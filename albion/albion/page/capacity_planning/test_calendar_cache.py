@@ -0,0 +1,56 @@
+# Copyright (c) 2026, Essdee and Contributors
+# See license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from albion.albion.page.capacity_planning import calendar_cache
+from albion.albion.page.capacity_planning.calendar_cache import drop_calendar_cache, get_window_calendars
+from albion.albion.page.capacity_planning.test_calendar_resolver import make_calendar, make_calendars
+
+START, END = "2032-03-01", "2032-03-31"
+
+
+def window():
+	calendars, default_calendar = get_window_calendars(START, END)
+	return {calendar["name"]: calendar for calendar in calendars}, default_calendar
+
+
+class TestCalendarCache(FrappeTestCase):
+	@classmethod
+	def setUpClass(cls):
+		super().setUpClass()
+		make_calendars()
+		cls.general = frappe.db.get_value("Shift Allocation", {"start_date": START, "end_date": END})
+
+	def setUp(self):
+		frappe.db.after_commit.run()
+		drop_calendar_cache()
+
+	def test_second_read_is_served_from_cache(self):
+		calendars, default_calendar = window()
+		self.assertIn(self.general, calendars)
+		self.assertEqual(default_calendar["is_default"], 1)
+
+		with patch.object(calendar_cache, "load_calendars", wraps=calendar_cache.load_calendars) as load:
+			self.assertEqual(window(), (calendars, default_calendar))
+		load.assert_not_called()
+
+	def test_calendar_save_clears_after_commit(self):
+		window()
+		doc = frappe.get_doc("Shift Allocation", self.general)
+		doc.append("alterations", {"date": "2032-03-04", "alteration_type": "Reduce", "minutes": 20})
+		doc.save()
+
+		# The cache is only cleared once the save commits
+		self.assertEqual(len(window()[0][self.general]["alterations"]), 2)
+		frappe.db.after_commit.run()
+		self.assertEqual(len(window()[0][self.general]["alterations"]), 3)
+
+	def test_new_calendar_joins_the_window(self):
+		window()
+		added = make_calendar("2032-03-12", "2032-03-12", 250).name
+		frappe.db.after_commit.run()
+		self.assertIn(added, window()[0])
@@ -0,0 +1,56 @@
+# Copyright (c) 2026, Essdee and Contributors
+# See license.txt
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from albion.albion.page.capacity_planning.calendar_pattern import ShiftPattern
+from albion.albion.page.capacity_planning.capacity_grid import CapacityGrid
+from albion.albion.page.capacity_planning.test_calendar_resolver import make_calendars, make_shift
+
+
+def machine_calendars():
+	return frappe.db.count("Shift Allocation", {"machine": "CR-M1"})
+
+
+class TestShiftPattern(FrappeTestCase):
+	"""Only the 480 minute default calendar covers May 2032; the 3rd is a Monday."""
+
+	@classmethod
+	def setUpClass(cls):
+		super().setUpClass()
+		make_calendars()
+
+	def test_weekday_mask(self):
+		weekdays = ["Monday", "Wednesday"]
+		result = ShiftPattern(
+			"2032-05-03", "2032-05-09", [make_shift(300)], machines=["CR-M1"], weekdays=weekdays
+		).apply()
+
+		(name,) = result["calendars"]
+		calendar = frappe.get_doc("Shift Allocation", name)
+		self.assertEqual((calendar.machine, calendar.total_duration_minutes), ("CR-M1", 300))
+		self.assertEqual(
+			[calendar.monday, calendar.tuesday, calendar.wednesday, calendar.sunday], [1, 0, 1, 0]
+		)
+
+		grid = CapacityGrid("2032-05-03", "2032-05-09", machines=["CR-M1"])
+		self.assertEqual(grid.capacity[0].tolist(), [300, 0, 300, 0, 0, 0, 0])
+		self.assertEqual(list(result["deltas"]), ["CR-M1"])
+		self.assertEqual(sum(result["deltas"]["CR-M1"].values()), 2 * (300 - 480) - 5 * 480)
+
+	def test_machine_overlap_is_rejected(self):
+		# CR-M1 already has a range calendar from March 1st to 8th
+		before = machine_calendars()
+		pattern = ShiftPattern("2032-03-05", "2032-03-12", [make_shift(300)], machines=["CR-M1"])
+		self.assertRaises(frappe.ValidationError, pattern.apply)
+		self.assertEqual(machine_calendars(), before)
+
+	def test_invalid_patterns(self):
+		for shifts, weekdays in (
+			([make_shift(300), make_shift(200)], None),  # both shifts start at midnight
+			([make_shift(300)], ["funday"]),
+			([], None),
+		):
+			pattern = ShiftPattern("2032-05-10", "2032-05-16", shifts, machines=["CR-M2"], weekdays=weekdays)
+			self.assertRaises(frappe.ValidationError, pattern.apply)
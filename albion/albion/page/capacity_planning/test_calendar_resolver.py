@@ -0,0 +1,113 @@
+# Copyright (c) 2026, Essdee and Contributors
+# See license.txt
+
+from datetime import datetime, timedelta
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from albion.albion.page.capacity_planning.calendar_resolver import DAY_NAMES, CalendarResolver
+
+MACHINES = ("CR-M1", "CR-M2")
+WORKING_WEEK = DAY_NAMES[:6]
+
+
+def make_machine(machine_id):
+	if not frappe.db.exists("Machine", machine_id):
+		frappe.get_doc({"doctype": "Machine", "machine_id": machine_id}).insert(ignore_mandatory=True)
+	return machine_id
+
+
+def make_shift(minutes):
+	"""A Shift of `minutes` from midnight; calendars fetch their minutes from it."""
+	name = f"CR {minutes}"
+	if not frappe.db.exists("Shift", name):
+		end = datetime(2000, 1, 1) + timedelta(minutes=minutes)
+		frappe.get_doc({
+			"doctype": "Shift", "shift_name": name, "start_time": "00:00:00", "end_time": end.strftime("%H:%M:%S"),
+		}).insert()
+	return name
+
+
+def make_calendar(start_date, end_date, minutes, machine=None, is_default=0, weekdays=DAY_NAMES, alterations=()):
+	"""Insert a Shift Allocation with one shift of `minutes`.
+	alterations: (date, alteration_type, minutes, machine) tuples
+	"""
+	return frappe.get_doc({
+		"doctype": "Shift Allocation",
+		"start_date": start_date,
+		"end_date": end_date,
+		"machine": machine,
+		"is_default": is_default,
+		**{day: 1 for day in weekdays},
+		"shifts": [{"shift": make_shift(minutes)}],
+		"alterations": [
+			{"date": date, "alteration_type": kind, "minutes": mins, "machine": alt_machine}
+			for date, kind, mins, alt_machine in alterations
+		],
+	}).insert()
+
+
+def make_calendars():
+	"""Calendars of every kind around March 2032, one per priority level:
+	  default            480 every day
+	  general range      420 Mon-Sat in March, +60 for all and -30 for CR-M1 on the 3rd
+	  machine range      400 for CR-M1 from the 1st to the 8th
+	  general singles    350 on the 6th, 300 on the 10th
+	  machine single     200 for CR-M1 on the 10th
+	"""
+	for machine in MACHINES:
+		make_machine(machine)
+	frappe.db.set_value("Shift Allocation", {"is_default": 1}, "is_default", 0)
+	make_calendar(None, None, 480, is_default=1)
+	make_calendar(
+		"2032-03-01", "2032-03-31", 420, weekdays=WORKING_WEEK,
+		alterations=[("2032-03-03", "Add", 60, None), ("2032-03-03", "Reduce", 30, "CR-M1")],
+	)
+	make_calendar("2032-03-01", "2032-03-08", 400, machine="CR-M1")
+	make_calendar("2032-03-06", "2032-03-06", 350)
+	make_calendar("2032-03-10", "2032-03-10", 300)
+	make_calendar("2032-03-10", "2032-03-10", 200, machine="CR-M1")
+
+
+class TestCalendarResolver(FrappeTestCase):
+	@classmethod
+	def setUpClass(cls):
+		super().setUpClass()
+		make_calendars()
+
+	def setUp(self):
+		self.resolver = CalendarResolver("2032-03-01", "2032-04-30")
+
+	def test_priority(self):
+		expected = {
+			("2032-03-10", "CR-M1"): (200, "single"),  # machine single over general single
+			("2032-03-10", "CR-M2"): (300, "single"),
+			("2032-03-06", "CR-M1"): (350, "single"),  # general single over machine range
+			("2032-03-05", "CR-M1"): (400, "range"),  # machine range over general range
+			("2032-03-05", "CR-M2"): (420, "range"),
+			("2032-04-15", "CR-M1"): (480, "default"),
+		}
+		for (date, machine), (minutes, source) in expected.items():
+			cal, resolved = self.resolver.resolve(date, machine)
+			self.assertEqual((cal["total_duration_minutes"], resolved), (minutes, source), (date, machine))
+
+	def test_weekday_flags(self):
+		# 2032-03-07 is a Sunday, which the general range does not work
+		self.assertEqual(self.resolver.get_capacity("2032-03-07", "CR-M2"), 0)
+		self.assertEqual(self.resolver.get_capacity("2032-03-07", "CR-M2", skip_weekday_check=True), 420)
+		self.assertEqual(self.resolver.get_capacity("2032-03-07", "CR-M1"), 400)
+
+	def test_alterations(self):
+		# Day-level rows apply to every machine, machine rows to their machine,
+		# and both come from the general calendar even under a machine calendar
+		self.assertEqual(self.resolver.get_alteration_delta("2032-03-03"), 60)
+		self.assertEqual(self.resolver.get_capacity("2032-03-03", "CR-M2"), 480)
+		self.assertEqual(self.resolver.get_capacity("2032-03-03", "CR-M1"), 430)
+		self.assertEqual(self.resolver.get_capacity("2032-03-04", "CR-M2"), 420)
+
+	def test_newest_calendar_wins(self):
+		make_calendar("2032-03-20", "2032-03-20", 250)
+		make_calendar("2032-03-20", "2032-03-20", 260)
+		resolver = CalendarResolver("2032-03-20")
+		self.assertEqual(resolver.get_capacity("2032-03-20", "CR-M2"), 260)
@@ -0,0 +1,72 @@
+# Copyright (c) 2026, Essdee and Contributors
+# See license.txt
+
+import frappe
+import numpy as np
+from frappe.tests.utils import FrappeTestCase
+
+from albion.albion.doctype.machine_day.machine_day import refresh_machine_days
+from albion.albion.page.capacity_planning.calendar_resolver import CalendarResolver
+from albion.albion.page.capacity_planning.capacity_grid import CapacityGrid
+from albion.albion.page.capacity_planning.test_calendar_resolver import MACHINES, make_calendars
+
+START, END = "2032-02-25", "2032-04-05"
+
+
+def make_operation(machine, date, minutes, quantity=1):
+	return frappe.get_doc({
+		"doctype": "Machine Operation",
+		"machine": machine,
+		"operation_date": date,
+		"order": "CG-O1",
+		"style": "CG-S",
+		"process_name": "CG-P",
+		"quantity": quantity,
+		"allocated_minutes": minutes,
+	}).insert(ignore_links=True)
+
+
+class TestCapacityGrid(FrappeTestCase):
+	@classmethod
+	def setUpClass(cls):
+		super().setUpClass()
+		make_calendars()
+		make_operation("CR-M1", "2032-03-05", 100)
+		make_operation("CR-M1", "2032-03-05", 50)
+		# Sunday, an off day on the general range
+		make_operation("CR-M2", "2032-03-07", 30)
+
+	def setUp(self):
+		self.grid = CapacityGrid(START, END, machines=MACHINES)
+
+	def test_matches_resolver(self):
+		resolver = CalendarResolver(START, END)
+		for row, machine in enumerate(self.grid.machines):
+			for col, date in enumerate(self.grid.dates):
+				self.assertEqual(self.grid.capacity[row, col], resolver.get_capacity(date, machine), (machine, date))
+				self.assertEqual(
+					self.grid.raw_capacity[row, col],
+					resolver.get_capacity(date, machine, skip_weekday_check=True),
+					(machine, date),
+				)
+
+	def test_usage(self):
+		m1, m2 = (self.grid.machine_index[m] for m in MACHINES)
+		col = self.grid.date_index["2032-03-05"]
+		self.assertEqual(self.grid.used[m1, col], 150)
+		self.assertEqual(self.grid.allocations[m1, col], 2)
+		self.assertEqual(self.grid.available[m1, col], 250)
+
+		# Off days with work are reported at the calendar's minutes
+		sunday = self.grid.date_index["2032-03-07"]
+		self.assertEqual(self.grid.capacity[m2, sunday], 0)
+		self.assertEqual(self.grid.report_capacity[m2, sunday], 420)
+
+	def test_from_ledger(self):
+		frappe.db.delete("Machine Day", {"machine": ["in", MACHINES]})
+		self.assertIsNone(CapacityGrid.from_ledger(START, END, machines=MACHINES))
+
+		refresh_machine_days(START, END, machines=MACHINES)
+		ledger = CapacityGrid.from_ledger(START, END, machines=MACHINES)
+		for field in ("capacity", "raw_capacity", "working", "used"):
+			np.testing.assert_array_equal(getattr(ledger, field), getattr(self.grid, field), field)
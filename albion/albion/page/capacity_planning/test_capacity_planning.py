@@ -0,0 +1,134 @@
+# Copyright (c) 2026, Essdee and Contributors
+# See license.txt
+
+import json
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import add_to_date, get_datetime
+
+from albion.albion.page.capacity_planning.capacity_planning import (
+	get_all_allocations,
+	get_allocation_changes,
+	get_existing_allocations,
+	save_allocations,
+)
+from albion.albion.page.capacity_planning.test_calendar_resolver import make_calendars
+from albion.albion.page.capacity_planning.test_capacity_grid import make_operation
+
+START, END = "2032-03-01", "2032-03-31"
+
+
+def make_allocation(machine, date, process="GA-P", colour=None):
+	return frappe.get_doc({
+		"doctype": "Machine Operation",
+		"machine": machine,
+		"operation_date": date,
+		"order": "GA-O1",
+		"style": "GA-S",
+		"process_name": process,
+		"colour": colour,
+		"quantity": 2,
+		"allocated_minutes": 60,
+	}).insert(ignore_links=True)
+
+
+def poll(since_cursor=None):
+	return get_allocation_changes(since_cursor, START, END, orders=["CG-O1"])
+
+
+class TestAllocationQueries(FrappeTestCase):
+	@classmethod
+	def setUpClass(cls):
+		super().setUpClass()
+		for machine, frame in (("GA-M1", "GA-F1"), ("GA-M2", "GA-F2")):
+			frappe.get_doc({"doctype": "Machine", "machine_id": machine, "machine_frame": frame}).insert(
+				ignore_links=True
+			)
+		cls.first = make_allocation("GA-M2", "2032-03-10", colour="GA-C1").name
+		cls.second = make_allocation("GA-M1", "2032-03-09").name
+		make_allocation("GA-M1", "2032-04-09")
+
+	def test_rows_carry_machine_fields(self):
+		rows = get_all_allocations(START, END, orders=["GA-O1"])
+		self.assertEqual(
+			sorted((row.machine_id, row.operation_date, row.process, row.colour) for row in rows),
+			[("GA-M1", "2032-03-09", "GA-P", None), ("GA-M2", "2032-03-10", "GA-P", "GA-C1")],
+		)
+
+	def test_lane_filters_and_fields(self):
+		rows = get_all_allocations(START, END, machine_frames='["GA-F1"]', fields='["quantity"]')
+		self.assertEqual(rows, [{"name": self.second, "quantity": 2}])
+		(row,) = get_all_allocations(START, END, machines="GA-M2", orders=["GA-O1"])
+		self.assertEqual(row.name, self.first)
+		self.assertRaises(frappe.ValidationError, get_all_allocations, START, END, fields='["machine"]')
+
+	def test_existing_allocations_in_creation_order(self):
+		rows = get_existing_allocations("GA-O1", "GA-P", machines=["GA-M1", "GA-M2"])
+		self.assertEqual([row.machine_id for row in rows], ["GA-M2", "GA-M1", "GA-M1"])
+		self.assertEqual(get_existing_allocations("GA-O1", "GA-P2"), [])
+
+
+class TestAllocationChanges(FrappeTestCase):
+	@classmethod
+	def setUpClass(cls):
+		super().setUpClass()
+		make_calendars()
+
+	def test_delta_after_full_sync(self):
+		kept = make_operation("CR-M1", "2032-03-24", 100)
+		dropped = make_operation("CR-M1", "2032-03-25", 100)
+		moved = make_operation("CR-M2", "2032-03-26", 100)
+
+		first = poll()
+		self.assertEqual(first["full"], 1)
+		self.assertTrue({kept.name, dropped.name, moved.name} <= {row.name for row in first["upserts"]})
+
+		dropped.delete()
+		frappe.db.set_value("Machine Operation", moved.name, "operation_date", "2032-04-02")
+		second = poll(first["cursor"])
+		self.assertEqual(second["full"], 0)
+		self.assertTrue({dropped.name, moved.name} <= set(second["deleted"]))
+		self.assertNotIn(moved.name, [row.name for row in second["upserts"]])
+
+	def test_row_written_between_polls(self):
+		first = poll()
+		# A transaction that started before the first poll but committed after it
+		late = make_operation("CR-M2", "2032-03-27", 100)
+		modified = add_to_date(get_datetime(first["cursor"]), seconds=1)
+		frappe.db.set_value("Machine Operation", late.name, "modified", modified, update_modified=False)
+
+		second = poll(first["cursor"])
+		self.assertIn(late.name, [row.name for row in second["upserts"]])
+
+
+class TestSaveAllocations(FrappeTestCase):
+	@classmethod
+	def setUpClass(cls):
+		super().setUpClass()
+		make_calendars()
+
+	def test_change_set_mode(self):
+		updated = make_operation("CR-M2", "2032-03-29", 100)
+		dropped = make_operation("CR-M2", "2032-03-30", 100)
+		untouched = make_operation("CR-M2", "2032-03-31", 100)
+		upserts = [{
+			"name": updated.name,
+			"machine_id": "CR-M2",
+			"order": "CG-O1",
+			"style": "CG-S",
+			"process": "CG-P",
+			"quantity": 3,
+			"operation_date": "2032-03-29",
+			"allocated_minutes": 150,
+		}]
+
+		result = save_allocations(upserts=json.dumps(upserts), deletes=json.dumps([dropped.name]))
+		self.assertEqual(result, {"saved": [updated.name], "deleted": [dropped.name]})
+		self.assertEqual(frappe.db.get_value("Machine Operation", updated.name, "allocated_minutes"), 150)
+		self.assertFalse(frappe.db.exists("Machine Operation", dropped.name))
+		self.assertTrue(frappe.db.exists("Machine Operation", untouched.name))
+
+		# Deletes alone are a change set too, and nothing outside them changes
+		self.assertEqual(save_allocations(deletes=[untouched.name])["saved"], [])
+		self.assertEqual(frappe.db.get_value("Machine Operation", updated.name, "quantity"), 3)
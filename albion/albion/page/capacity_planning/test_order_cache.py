@@ -0,0 +1,68 @@
+# Copyright (c) 2026, Essdee and Contributors
+# See license.txt
+
+import json
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from albion.albion.page.capacity_planning import order_cache
+from albion.albion.page.capacity_planning.capacity_planning import get_orders_data
+from albion.albion.page.capacity_planning.order_cache import clear_order_payload_cache
+
+
+def make_order(quantity, submitted=False):
+	"""An Order of OP-S with one colour/size row; submitted orders are marked without the submit checks."""
+	order = frappe.get_doc({
+		"doctype": "Order",
+		"order_date": "2032-03-01",
+		"styles": [{"style": "OP-S"}],
+		"order_details": [{"style": "OP-S", "colour": "OP-C", "size": "OP-L", "quantity": quantity}],
+		"order_processes": [{"style": "OP-S", "process_name": "OP-P", "minutes": 30}],
+	}).insert(ignore_links=True, ignore_mandatory=True)
+	if submitted:
+		frappe.db.set_value("Order", order.name, "docstatus", 1)
+	return order.name
+
+
+def quantities(payloads):
+	return [(p["name"], p["order_details"][0]["quantity"]) for p in payloads]
+
+
+class TestOrderPayloads(FrappeTestCase):
+	@classmethod
+	def setUpClass(cls):
+		super().setUpClass()
+		frappe.get_doc({
+			"doctype": "Style", "style_code": "OP-S", "style_name": "OP-S", "machine_frame": "OP-F", "gg": "12",
+		}).insert(ignore_links=True)
+		cls.submitted = make_order(10, submitted=True)
+		cls.draft = make_order(20)
+
+	def setUp(self):
+		clear_order_payload_cache()
+
+	def test_payloads_follow_the_requested_order(self):
+		payloads = get_orders_data(json.dumps([self.draft, "OP-missing", self.submitted, self.draft]))
+		self.assertEqual(quantities(payloads), [(self.draft, 20), (self.submitted, 10)])
+		(item,) = payloads[1]["items"]
+		self.assertEqual(item["style_doc"]["machine_frame"], "OP-F")
+		self.assertEqual(item["style_doc"]["processes"], [{"process_name": "OP-P", "minutes": 30}])
+
+	def test_submitted_orders_are_cached(self):
+		get_orders_data([self.submitted, self.draft])
+		with patch.object(order_cache, "_build_payloads", wraps=order_cache._build_payloads) as build:
+			get_orders_data([self.submitted, self.draft])
+		# Drafts can still change, so only they are built again
+		((orders,), _kwargs) = build.call_args
+		self.assertEqual([order.name for order in orders], [self.draft])
+
+	def test_changed_order_is_built_again(self):
+		get_orders_data([self.submitted])
+		frappe.db.set_value("Order Detail", {"parent": self.submitted}, "quantity", 15)
+		# The cached payload is kept while the order's modified is unchanged
+		self.assertEqual(quantities(get_orders_data([self.submitted])), [(self.submitted, 10)])
+
+		frappe.db.set_value("Order", self.submitted, "delivery_date", "2032-04-01")
+		self.assertEqual(quantities(get_orders_data([self.submitted])), [(self.submitted, 15)])
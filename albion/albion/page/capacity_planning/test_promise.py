@@ -0,0 +1,66 @@
+# Copyright (c) 2026, Essdee and Contributors
+# See license.txt
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from albion.albion.page.capacity_planning.promise import quote_completion
+from albion.albion.page.capacity_planning.test_calendar_resolver import make_calendar
+from albion.albion.page.capacity_planning.test_capacity_grid import make_operation
+
+MACHINES = ("PR-M1", "PR-M2")
+
+
+def split(quote):
+	return {m["machine_id"]: [(d["date"], d["quantity"]) for d in m["days"]] for m in quote["machines"]}
+
+
+class TestQuoteCompletion(FrappeTestCase):
+	"""Two PR-F machines with 480 minutes every day of January 2033 and a 60 minute process,
+	so each free machine-day takes 8 units. PR-M1 is busy on the 4th."""
+
+	@classmethod
+	def setUpClass(cls):
+		super().setUpClass()
+		# Without a default calendar, machines of other tests have no capacity here
+		frappe.db.set_value("Shift Allocation", {"is_default": 1}, "is_default", 0)
+		for machine in MACHINES:
+			frappe.get_doc({"doctype": "Machine", "machine_id": machine, "machine_frame": "PR-F"}).insert(
+				ignore_links=True
+			)
+			make_calendar("2033-01-03", "2033-01-31", 480, machine=machine)
+		frappe.get_doc({
+			"doctype": "Style",
+			"style_code": "PR-S",
+			"style_name": "PR-S",
+			"machine_frame": "PR-F",
+			"gg": "12",
+			"processes": [{"process_name": "PR-P", "minutes": 60}],
+		}).insert(ignore_links=True)
+		make_operation("PR-M1", "2033-01-04", 10)
+
+	def test_machines_work_in_parallel(self):
+		quote = quote_completion("PR-S", "PR-P", 40, "2033-01-03")
+		self.assertEqual(quote["completion_date"], "2033-01-05")
+		self.assertEqual(quote["remaining_qty"], 0)
+		self.assertEqual(
+			split(quote),
+			{
+				"PR-M1": [("2033-01-03", 8), ("2033-01-05", 8)],
+				"PR-M2": [("2033-01-03", 8), ("2033-01-04", 8), ("2033-01-05", 8)],
+			},
+		)
+
+	def test_completion_day_is_trimmed(self):
+		quote = quote_completion("PR-S", "PR-P", 30, "2033-01-03")
+		self.assertEqual(quote["completion_date"], "2033-01-05")
+		self.assertEqual(sum(m["quantity"] for m in quote["machines"]), 30)
+		self.assertEqual(split(quote)["PR-M1"], [("2033-01-03", 8), ("2033-01-05", 6)])
+
+	def test_horizon_too_short(self):
+		quote = quote_completion("PR-S", "PR-P", 100, "2033-01-03", horizon_days=2)
+		self.assertIsNone(quote["completion_date"])
+		self.assertEqual(quote["remaining_qty"], 76)
+
+	def test_unknown_process(self):
+		self.assertRaises(frappe.ValidationError, quote_completion, "PR-S", "PR-missing", 10, "2033-01-03")
@@ -0,0 +1,197 @@
+# Copyright (c) 2026, Essdee and Contributors
+# See license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import add_days, getdate, now
+
+from albion.albion.api import reports
+from albion.albion.page.capacity_planning import capacity_planning
+from albion.albion.page.capacity_planning.allocation_store import clear_machine_frame_cache
+from albion.albion.page.capacity_planning.calendar_cache import drop_calendar_cache
+from albion.patches.v1_0.add_planning_indexes import execute as add_planning_indexes
+
+PREFIX = "QP-"
+SEED_MACHINES = 50
+SEED_DAYS = 400
+SEED_ORDERS = 200
+SEED_START = getdate("2030-01-01")
+# A plan step reading more rows than this with type ALL is a full table scan
+FULL_SCAN_ROWS = 1000
+EXPLAINABLE = ("select", "update", "delete")
+
+
+class TestQueryPlans(FrappeTestCase):
+	"""EXPLAIN every statement the planning and report endpoints run on a seeded dataset."""
+
+	@classmethod
+	def setUpClass(cls):
+		super().setUpClass()
+		add_planning_indexes()
+		cls.machines = [f"{PREFIX}M{i:03}" for i in range(SEED_MACHINES)]
+		seed_dataset(cls.machines)
+		# ANALYZE commits, so the seed is removed by hand in tearDownClass
+		for table in (
+			"Machine Operation", "Daily Production", "Machine Day", "Shift Allocation", "Order Completion",
+			"Order", "Order Process", "Order Tracking",
+		):
+			frappe.db.sql(f"ANALYZE TABLE `tab{table}`")
+		clear_caches()
+
+	@classmethod
+	def tearDownClass(cls):
+		remove_dataset()
+		clear_caches()
+		super().tearDownClass()
+
+	def setUp(self):
+		clear_caches()
+		self.start = str(add_days(SEED_START, 100))
+		self.end = str(add_days(SEED_START, 106))
+
+	def test_allocation_queries(self):
+		self.assertNoFullScans(capacity_planning.get_all_allocations, self.start, self.end)
+		self.assertNoFullScans(
+			capacity_planning.get_all_allocations, self.start, self.end, machines=self.machines[:3]
+		)
+		self.assertNoFullScans(capacity_planning.get_existing_allocations, f"{PREFIX}O010", f"{PREFIX}P1")
+		self.assertNoFullScans(
+			capacity_planning.get_allocation_changes, start_date=self.start, end_date=self.end
+		)
+
+	def test_save_allocations(self):
+		upsert = {
+			"machine_id": self.machines[0],
+			"order": f"{PREFIX}O010",
+			"style": f"{PREFIX}S",
+			"process": f"{PREFIX}P1",
+			"quantity": 5,
+			"operation_date": self.start,
+			"allocated_minutes": 50,
+		}
+		self.assertNoFullScans(capacity_planning.save_allocations, upserts=[upsert], deletes=[])
+
+	def test_calendar_queries(self):
+		self.assertNoFullScans(capacity_planning.get_shift_allocations, self.start, self.end)
+
+	def test_report_queries(self):
+		for group_by in (None, "style", "machine"):
+			self.assertNoFullScans(reports.get_production_report, self.start, self.end, group_by=group_by)
+		self.assertNoFullScans(reports.get_machine_availability, self.start, self.end)
+		self.assertNoFullScans(capacity_planning.get_order_tracking_summary, [f"{PREFIX}O010"])
+		for bucket in ("day", "week"):
+			self.assertNoFullScans(reports.get_variance_report, self.start, self.end, bucket=bucket, as_of=self.end)
+
+	def assertNoFullScans(self, fn, *args, **kwargs):
+		statements = capture_statements(fn, *args, **kwargs)
+		self.assertTrue(statements, f"{fn.__name__} ran no SQL")
+		for query, values in statements:
+			for step in frappe.db.sql(f"EXPLAIN {query}", values, as_dict=True):
+				if step.type == "ALL" and (step.rows or 0) > FULL_SCAN_ROWS:
+					self.fail(f"{fn.__name__} scans all of {step.table} ({step.rows} rows):\n{query}")
+
+
+def capture_statements(fn, *args, **kwargs):
+	"""Run fn and return the (query, values) of every SELECT/UPDATE/DELETE it sent."""
+	statements = []
+	sql = frappe.db.sql
+
+	def record(query, values=(), *a, **k):
+		if query.lstrip().lower().startswith(EXPLAINABLE):
+			statements.append((query, values))
+		return sql(query, values, *a, **k)
+
+	with patch.object(frappe.db, "sql", record):
+		fn(*args, **kwargs)
+	return statements
+
+
+def seed_dataset(machines):
+	timestamp = now()
+	user = frappe.session.user
+	common = ["name", "creation", "modified", "modified_by", "owner", "docstatus", "idx"]
+
+	def rows(*values):
+		return (values[0], timestamp, timestamp, user, user, 0, 0, *values[1:])
+
+	frappe.db.bulk_insert(
+		"Machine", [*common, "machine_id"], [rows(m, m) for m in machines]
+	)
+
+	operations, production, days, calendars = [], [], [], []
+	for i, machine in enumerate(machines):
+		for d in range(SEED_DAYS):
+			date = add_days(SEED_START, d)
+			work = (machine, f"{PREFIX}O{(i * 7 + d) % SEED_ORDERS:03}", f"{PREFIX}S", f"{PREFIX}P{d % 3}", 10, date, 100)
+			operations.append(rows(f"{PREFIX}MO-{i}-{d}", *work))
+			production.append(rows(f"{PREFIX}DP-{i}-{d}", *work))
+			days.append(rows(f"{PREFIX}MD-{i}-{d}", machine, date, 480, 100, 0))
+			if d % 5 == 0:
+				calendars.append(rows(f"{PREFIX}SA-{i}-{d}", 0, machine, date, date, 480))
+
+	frappe.db.bulk_insert(
+		"Machine Operation",
+		[*common, "machine", "order", "style", "process_name", "quantity", "operation_date", "allocated_minutes"],
+		operations,
+	)
+	frappe.db.bulk_insert(
+		"Daily Production",
+		[*common, "machine", "order", "style", "process_name", "quantity", "operation_date", "allocated_minutes"],
+		production,
+	)
+	frappe.db.bulk_insert(
+		"Machine Day", [*common, "machine", "date", "capacity_minutes", "used_minutes", "is_off_day"], days
+	)
+	frappe.db.bulk_insert(
+		"Shift Allocation",
+		[*common, "is_default", "machine", "start_date", "end_date", "total_duration_minutes"],
+		calendars,
+	)
+	orders = [f"{PREFIX}O{n:03}" for n in range(SEED_ORDERS)]
+	frappe.db.bulk_insert(
+		"Order", [*common, "status"], [(o, timestamp, timestamp, user, user, 1, 0, "Open") for o in orders]
+	)
+	frappe.db.bulk_insert(
+		"Order Process",
+		[*common, "parent", "parenttype", "parentfield", "style", "process_name"],
+		[
+			(
+				f"{o}-P{p}", timestamp, timestamp, user, user, 1, p + 1,
+				o, "Order", "order_processes", f"{PREFIX}S", f"{PREFIX}P{p}",
+			)
+			for o in orders
+			for p in range(3)
+		],
+	)
+	frappe.db.bulk_insert(
+		"Order Tracking",
+		[*common, "order", "style", "colour", "size", "quantity", "completion_date"],
+		[
+			rows(f"{PREFIX}OT-{n}", orders[n % SEED_ORDERS], f"{PREFIX}S", None, None, 5, add_days(SEED_START, n % SEED_DAYS))
+			for n in range(SEED_ORDERS * 25)
+		],
+	)
+	frappe.db.bulk_insert(
+		"Order Completion",
+		[*common, "order", "style", "colour", "size", "completed_qty"],
+		[
+			rows(f"{PREFIX}OC-{n}", f"{PREFIX}O{n % SEED_ORDERS:03}", f"{PREFIX}S", f"{PREFIX}C{n}", None, 1)
+			for n in range(SEED_ORDERS * 25)
+		],
+	)
+	frappe.db.commit()
+
+
+def remove_dataset():
+	for doctype in ("Machine Operation", "Daily Production", "Machine Day", "Machine Operation Tombstone"):
+		frappe.db.delete(doctype, {"machine": ["like", f"{PREFIX}%"]})
+	for doctype in ("Shift Allocation", "Order Completion", "Order Tracking", "Order Process", "Order", "Machine"):
+		frappe.db.delete(doctype, {"name": ["like", f"{PREFIX}%"]})
+	frappe.db.commit()
+
+
+def clear_caches():
+	drop_calendar_cache()
+	clear_machine_frame_cache()
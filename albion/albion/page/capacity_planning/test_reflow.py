@@ -0,0 +1,111 @@
+# Copyright (c) 2026, Essdee and Contributors
+# See license.txt
+
+import frappe
+import numpy as np
+from frappe.tests.utils import FrappeTestCase
+
+from albion.albion.page.capacity_planning.capacity_grid import CapacityGrid
+from albion.albion.page.capacity_planning.capacity_planning import add_shift_alteration
+from albion.albion.page.capacity_planning.reflow import TimelineReflow
+from albion.albion.page.capacity_planning.test_calendar_resolver import make_calendars
+from albion.albion.page.capacity_planning.test_capacity_grid import make_operation
+
+START = "2032-01-01"
+
+
+def grid(capacity):
+	"""A one-machine grid from START with the given minutes per day."""
+	result = CapacityGrid(START, f"2032-01-{len(capacity):02}", machines=["RF-M1"], fill=False)
+	result.capacity = np.array([capacity], dtype=np.int64)
+	return result
+
+
+def row(name, day, quantity, minutes, order="RF-O1"):
+	return frappe._dict(
+		name=name,
+		machine="RF-M1",
+		order=order,
+		style="RF-S",
+		process_name="RF-P",
+		colour=None,
+		size=None,
+		quantity=quantity,
+		operation_date=f"2032-01-{day:02}",
+		shift=None,
+		allocated_minutes=minutes,
+		operator=None,
+	)
+
+
+def reflow(operations, before, after):
+	changes, unplaced = TimelineReflow(START, operations=operations, before=grid(before)).plan(after=grid(after))
+	dates = {op.name: op.operation_date for op in operations}
+	dates.update({name: values["operation_date"] for name, values in changes.updates.items()})
+	for name in changes.deletes:
+		dates.pop(name)
+	return dates, changes, unplaced
+
+
+class TestTimelineReflow(FrappeTestCase):
+	def test_lost_day_spills_forward(self):
+		dates, changes, unplaced = reflow(
+			[row("a", 1, 10, 100), row("b", 2, 10, 100, order="RF-O2")],
+			before=[100] * 5,
+			after=[0, 100, 100, 100, 100],
+		)
+		self.assertEqual(dates, {"a": "2032-01-02", "b": "2032-01-03"})
+		self.assertEqual(unplaced, [])
+
+	def test_chained_group_closes_up(self):
+		# b followed a across an off day, so it takes the day when it starts working;
+		# c started after a working gap and keeps its date
+		dates, _changes, _unplaced = reflow(
+			[row("a", 1, 10, 100), row("b", 3, 10, 100, order="RF-O2"), row("c", 6, 10, 100, order="RF-O3")],
+			before=[100, 0, 100, 100, 100, 100],
+			after=[100] * 6,
+		)
+		self.assertEqual(dates, {"a": "2032-01-01", "b": "2032-01-02", "c": "2032-01-06"})
+
+	def test_split_and_unplaced(self):
+		# Half a day of capacity left: the group is split and what does not fit is reported
+		dates, changes, unplaced = reflow([row("a", 1, 10, 100)], before=[100] * 3, after=[50, 50, 0])
+		self.assertEqual(dates, {"a": "2032-01-01"})
+		self.assertEqual(changes.updates["a"]["quantity"], 5)
+		self.assertEqual([(r["operation_date"], r["quantity"]) for r in changes.inserts], [("2032-01-02", 5)])
+		self.assertEqual(unplaced, [])
+
+		_dates, _changes, unplaced = reflow([row("a", 1, 10, 100)], before=[100] * 2, after=[50, 0])
+		self.assertEqual([r["quantity"] for r in unplaced], [5])
+
+	def test_rows_without_minutes_keep_their_days(self):
+		dates, changes, _unplaced = reflow(
+			[row("a", 1, 10, 100), row("b", 2, 0, 0, order="RF-O2"), row("c", 3, 10, 100, order="RF-O3")],
+			before=[100] * 5,
+			after=[0, 100, 100, 100, 100],
+		)
+		self.assertEqual(dates, {"a": "2032-01-03", "b": "2032-01-02", "c": "2032-01-04"})
+		self.assertNotIn("b", changes.updates)
+
+	def test_database_reflow_needs_machines(self):
+		self.assertRaises(frappe.ValidationError, TimelineReflow, START)
+
+
+class TestAlterationReflow(FrappeTestCase):
+	"""CR-M2 has 420 minutes Monday to Saturday in March 2032 (see make_calendars)."""
+
+	@classmethod
+	def setUpClass(cls):
+		super().setUpClass()
+		make_calendars()
+		cls.first = make_operation("CR-M2", "2032-03-15", 420, quantity=7).name
+		cls.second = make_operation("CR-M2", "2032-03-16", 420, quantity=7).name
+
+	def test_reduce_pushes_work_forward(self):
+		response = add_shift_alteration("2032-03-15", "Reduce", 420, reflow=1)
+		self.assertEqual(response["reflow"]["unplaced"], [])
+		dates = [
+			str(frappe.db.get_value("Machine Operation", name, "operation_date"))
+			for name in (self.first, self.second)
+		]
+		self.assertEqual(dates, ["2032-03-16", "2032-03-17"])
@@ -0,0 +1,48 @@
+# Copyright (c) 2026, Essdee and Contributors
+# See license.txt
+
+import numpy as np
+from frappe.tests.utils import FrappeTestCase
+
+from albion.albion.page.capacity_planning.replan import solve_frame
+
+
+def frame(machines=2, days=10, minutes=100):
+	return np.full((machines, days), minutes, dtype=np.int64), np.zeros((machines, days), dtype=bool)
+
+
+class TestSolveFrame(FrappeTestCase):
+	"""Lines are (quantity, minutes_per_unit, due_col, start_col, after); 10 units fit a 100 minute day."""
+
+	def test_fills_consecutive_days(self):
+		((row, days, remaining),) = solve_frame([(30, 10, 5, 0, None)], *frame())
+		self.assertEqual((row, days, remaining), (0, [(0, 10), (1, 10), (2, 10)], 0))
+
+	def test_earliest_due_date_goes_first(self):
+		late, early = solve_frame([(10, 10, 9, 0, None), (10, 10, 1, 0, None)], *frame(machines=1))
+		self.assertEqual(early[1], [(0, 10)])
+		self.assertEqual(late[1], [(1, 10)])
+
+	def test_machine_that_finishes_first(self):
+		capacity, occupied = frame()
+		occupied[0, 0] = True
+		((row, days, _remaining),) = solve_frame([(10, 10, 5, 0, None)], capacity, occupied)
+		self.assertEqual((row, days), (1, [(0, 10)]))
+
+	def test_start_col(self):
+		((_row, days, _remaining),) = solve_frame([(20, 10, 5, 4, None)], *frame())
+		self.assertEqual(days, [(4, 10), (5, 10)])
+
+	def test_process_starts_after_previous_one(self):
+		first, second = solve_frame([(30, 10, 5, 0, None), (20, 10, 5, 0, 0)], *frame())
+		self.assertGreaterEqual(second[1][0][0], first[1][-1][0])
+		self.assertEqual(second[2], 0)
+
+	def test_process_after_unfinished_one_is_unplaced(self):
+		first, second = solve_frame([(3000, 10, 5, 0, None), (5, 10, 5, 0, 0)], *frame())
+		self.assertEqual(first[2], 3000 - 100)
+		self.assertEqual(second, (None, [], 5))
+
+	def test_no_capacity(self):
+		capacity, occupied = frame(minutes=0)
+		self.assertEqual(solve_frame([(5, 10, 5, 0, None)], capacity, occupied), [(None, [], 5)])
@@ -0,0 +1,76 @@
+# Copyright (c) 2026, Essdee and Contributors
+# See license.txt
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from albion.albion.page.capacity_planning.scenario import Scenario
+from albion.albion.page.capacity_planning.test_calendar_resolver import make_calendars
+from albion.albion.page.capacity_planning.test_capacity_grid import make_operation
+
+
+class TestScenario(FrappeTestCase):
+	"""A week of CR-M2 (420 minutes Monday to Saturday) with one full day of work on Monday."""
+
+	@classmethod
+	def setUpClass(cls):
+		super().setUpClass()
+		make_calendars()
+		cls.operation = make_operation("CR-M2", "2032-03-15", 420, quantity=7).name
+
+	def setUp(self):
+		self.scenario = Scenario("2032-03-15", "2032-03-21", machines=["CR-M2"])
+
+	def tearDown(self):
+		self.scenario.delete()
+
+	def dates(self):
+		return [row["operation_date"] for row in self.scenario.rows]
+
+	def test_evaluate(self):
+		result = self.scenario.evaluate()
+		self.assertEqual(result["utilisation"], round(420 * 100 / (6 * 420), 1))
+		self.assertEqual(result["overloaded_days"], 0)
+		self.assertEqual(result["unplaced"], [])
+
+	def test_alteration_without_reflow_overloads(self):
+		self.scenario.apply_changes([
+			{"type": "alteration", "date": "2032-03-15", "alteration_type": "Reduce", "minutes": 120}
+		])
+		self.assertEqual(self.scenario.evaluate()["overloaded_days"], 1)
+		self.assertEqual(self.dates(), ["2032-03-15"])
+
+	def test_downtime_with_reflow_moves_the_copy_only(self):
+		self.scenario.apply_changes([
+			{"type": "downtime", "machine": "CR-M2", "start_date": "2032-03-15", "end_date": "2032-03-16", "reflow": 1}
+		])
+		self.assertEqual(self.dates(), ["2032-03-17"])
+		self.assertEqual(self.scenario.evaluate()["overloaded_days"], 0)
+		self.assertEqual(str(frappe.db.get_value("Machine Operation", self.operation, "operation_date")), "2032-03-15")
+
+	def test_overtime_on_an_off_day(self):
+		# Sunday the 21st is off; an Add alteration opens it like board overtime
+		self.scenario.apply_changes([
+			{"type": "alteration", "date": "2032-03-21", "alteration_type": "Add", "minutes": 120, "machine": "CR-M2"},
+			{"type": "move", "name": self.operation, "operation_date": "2032-03-21"},
+		])
+		self.assertEqual(self.dates(), ["2032-03-21"])
+		self.assertEqual(self.scenario.evaluate()["overloaded_days"], 1)
+
+	def test_stored_in_cache(self):
+		self.scenario.apply_changes([{"type": "move", "name": self.operation, "operation_date": "2032-03-16"}])
+		self.scenario.save()
+		loaded = Scenario.load(self.scenario.name)
+		self.assertEqual(loaded.rows, self.scenario.rows)
+		self.assertEqual(len(loaded.changes), 1)
+
+		loaded.delete()
+		self.assertRaises(frappe.DoesNotExistError, Scenario.load, self.scenario.name)
+
+	def test_invalid_changes(self):
+		self.assertRaises(frappe.ValidationError, self.scenario.apply_changes, [{"type": "rename"}])
+		self.assertRaises(
+			frappe.ValidationError,
+			self.scenario.apply_changes,
+			[{"type": "move", "name": self.operation, "operation_date": "2032-04-01"}],
+		)
@@ -0,0 +1,102 @@
+# Copyright (c) 2026, Essdee and Contributors
+# See license.txt
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from albion.albion.page.capacity_planning.capacity_planning import plan_workload
+from albion.albion.page.capacity_planning.scheduler import AutoScheduler
+from albion.albion.page.capacity_planning.test_calendar_resolver import make_calendars
+from albion.albion.page.capacity_planning.test_capacity_grid import make_operation
+
+
+def line(start_date, qty, minutes_per_unit=60, machine_id="CR-M2", **extra):
+	return {
+		"order": "SC-O1",
+		"style": "SC-S",
+		"process": "SC-P",
+		"qty": qty,
+		"machine_id": machine_id,
+		"start_date": start_date,
+		"minutes_per_unit": minutes_per_unit,
+		**extra,
+	}
+
+
+def placed(plan):
+	return [(a["operation_date"], a["quantity"]) for a in plan["allocations"]]
+
+
+class TestAutoScheduler(FrappeTestCase):
+	"""CR-M2 has 420 minutes Monday to Saturday in March 2032 and 480 on the 3rd."""
+
+	@classmethod
+	def setUpClass(cls):
+		super().setUpClass()
+		make_calendars()
+		make_operation("CR-M2", "2032-03-17", 10)
+		frappe.get_doc({"doctype": "Machine", "machine_id": "SC-F1", "machine_frame": "SC-F1"}).insert(
+			ignore_links=True
+		)
+		frappe.get_doc({
+			"doctype": "Style", "style_code": "SC-F2-S", "style_name": "SC-F2-S", "machine_frame": "SC-F2", "gg": "12",
+		}).insert(ignore_links=True)
+
+	def test_fills_days_in_order(self):
+		(plan,) = AutoScheduler([line("2032-03-01", 30)]).plan()
+		self.assertEqual(
+			placed(plan),
+			[("2032-03-01", 7), ("2032-03-02", 7), ("2032-03-03", 8), ("2032-03-04", 7), ("2032-03-05", 1)],
+		)
+		self.assertEqual(plan["remaining_qty"], 0)
+		self.assertEqual(plan["allocations"][0]["allocated_minutes"], 420)
+
+	def test_skips_off_and_occupied_days(self):
+		# The 7th is a Sunday, the 17th already holds an allocation
+		plans = AutoScheduler([line("2032-03-06", 14), line("2032-03-16", 14)]).plan()
+		self.assertEqual(placed(plans[0]), [("2032-03-06", 7), ("2032-03-08", 7)])
+		self.assertEqual(placed(plans[1]), [("2032-03-16", 7), ("2032-03-18", 7)])
+
+	def test_start_day_uses_minutes_left(self):
+		# The 17th holds 10 minutes of other work, which leaves room for 6 units
+		(plan,) = AutoScheduler([line("2032-03-17", 14)]).plan()
+		self.assertEqual(placed(plan), [("2032-03-17", 6), ("2032-03-18", 7), ("2032-03-19", 1)])
+
+	def test_start_day_is_not_shared_with_its_own_group(self):
+		# A save would merge the two rows of one group on the 17th into one
+		(plan,) = AutoScheduler([line("2032-03-17", 7, order="CG-O1", style="CG-S", process="CG-P")]).plan()
+		self.assertEqual(placed(plan), [("2032-03-18", 7)])
+
+	def test_later_lines_take_the_days_left(self):
+		plans = AutoScheduler([line("2032-03-22", 7), line("2032-03-22", 7, process="SC-P2")]).plan()
+		self.assertEqual(placed(plans[0]), [("2032-03-22", 7)])
+		self.assertEqual(placed(plans[1]), [("2032-03-23", 7)])
+
+	def test_horizon_leaves_remaining(self):
+		(plan,) = AutoScheduler([line("2032-03-22", 30)], horizon_days=2).plan()
+		self.assertEqual(placed(plan), [("2032-03-22", 7), ("2032-03-23", 7)])
+		self.assertEqual(plan["remaining_qty"], 16)
+
+	def test_line_errors(self):
+		unknown, no_minutes = AutoScheduler(
+			[line("2032-03-22", 5, machine_id="SC-missing"), line("2032-03-22", 5, minutes_per_unit=0)]
+		).plan()
+		self.assertIn("error", unknown)
+		self.assertIn("error", no_minutes)
+		self.assertEqual(no_minutes["remaining_qty"], 5)
+
+	def test_apply_saves_through_allocation_checks(self):
+		(plan,) = plan_workload([line("2032-03-29", 10)], apply=1)
+		names = [alloc["name"] for alloc in plan["allocations"]]
+		self.assertEqual(
+			[str(frappe.db.get_value("Machine Operation", name, "operation_date")) for name in names],
+			["2032-03-29", "2032-03-30"],
+		)
+
+		# A style on a machine of another frame is rejected like a board save
+		self.assertRaises(
+			frappe.ValidationError,
+			plan_workload,
+			[line("2032-03-29", 5, machine_id="SC-F1", style="SC-F2-S")],
+			apply=1,
+		)
@@ -25,7 +25,7 @@ def get_dashboard_stats():
 
 	production_qty = frappe.db.sql("""
 		SELECT COALESCE(SUM(quantity), 0)
-		FROM `tabMachine Operation`
+		FROM `tabDaily Production`
 		WHERE operation_date BETWEEN %s AND %s
 	""", (range_start, range_end))[0][0]
 
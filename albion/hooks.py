@@ -194,6 +194,7 @@ website_route_rules = [
 # -----------------------------------------------------------
 
 # ignore_links_on_delete = ["Communication", "ToDo"]
+ignore_links_on_delete = ["Daily Production", "Machine Day", "Machine Operation Tombstone", "Order Completion"]
 
 # Request Events
 # ----------------
@@ -242,6 +243,9 @@ after_request = ["albion.overrides.override_home_page"]
 # default_log_clearing_doctypes = {
 # 	"Logging DocType Name": 30  # days to retain logs
 # }
+default_log_clearing_doctypes = {
+	"Machine Operation Tombstone": 7,
+}
 
 # Translation
 # ------------
@@ -0,0 +1,13 @@
+from albion.albion.doctype.machine_operation.machine_operation import (
+    on_doctype_update as index_machine_operation,
+)
+from albion.albion.doctype.order_tracking.order_tracking import on_doctype_update as index_order_tracking
+from albion.albion.doctype.shift_allocation.shift_allocation import (
+    on_doctype_update as index_shift_allocation,
+)
+
+
+def execute():
+    """Create the composite indexes the planning and report queries filter on."""
+    for add_indexes in (index_machine_operation, index_shift_allocation, index_order_tracking):
+        add_indexes()
@@ -0,0 +1,8 @@
+from albion.albion.doctype.daily_production.daily_production import (
+    on_doctype_update as index_daily_production,
+)
+
+
+def execute():
+    """Index Daily Production by order, for the planned-vs-actual report."""
+    index_daily_production()
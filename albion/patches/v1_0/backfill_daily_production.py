@@ -0,0 +1,6 @@
+from albion.albion.doctype.daily_production.daily_production import rebuild_daily_production
+
+
+def execute():
+    """Fill the Daily Production rollup from existing Machine Operation rows."""
+    rebuild_daily_production()
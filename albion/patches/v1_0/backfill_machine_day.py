@@ -0,0 +1,6 @@
+from albion.albion.doctype.machine_day.machine_day import rebuild_machine_days
+
+
+def execute():
+    """Fill the Machine Day ledger for the default window around today."""
+    rebuild_machine_days()
@@ -0,0 +1,6 @@
+from albion.albion.doctype.order_completion.order_completion import rebuild_order_completion
+
+
+def execute():
+    """Fill the Order Completion rollup from existing Order Tracking rows."""
+    rebuild_order_completion()
@@ -4,6 +4,7 @@
  */
 
 import { callMethod } from './client'
+import { decodeColumns } from '@/utils/columnar'
 
 const BASE = 'albion.albion.page.capacity_planning.capacity_planning'
 
@@ -15,12 +16,57 @@ export function getOrderData(orderName) {
   return callMethod(`${BASE}.get_order_data`, { order_name: orderName })
 }
 
-export function getExistingAllocations(order, process) {
-  return callMethod(`${BASE}.get_existing_allocations`, { order, process })
+export function getOrdersData(orderNames) {
+  return callMethod(`${BASE}.get_orders_data`, { order_names: orderNames })
 }
 
-export function getAllAllocations(startDate, endDate) {
-  return callMethod(`${BASE}.get_all_allocations`, { start_date: startDate, end_date: endDate })
+export function getExistingAllocations(order, process, { machines, machineFrames, fields } = {}) {
+  return callMethod(`${BASE}.get_existing_allocations`, {
+    order,
+    process,
+    machines: machines || null,
+    machine_frames: machineFrames || null,
+    fields: fields || null,
+  })
+}
+
+/**
+ * Allocations in a date range as a list of row objects. The rows travel in
+ * the compact columnar format and are expanded here.
+ */
+export async function getAllAllocations(startDate, endDate, { machines, machineFrames, orders, fields } = {}) {
+  const data = await callMethod(`${BASE}.get_all_allocations`, {
+    start_date: startDate,
+    end_date: endDate,
+    machines: machines || null,
+    machine_frames: machineFrames || null,
+    orders: orders || null,
+    fields: fields || null,
+    columnar: 1,
+  })
+  return data ? decodeColumns(data, ['operation_date']) : []
+}
+
+export function getAllocationChanges(sinceCursor, startDate, endDate, { machines, machineFrames, orders } = {}) {
+  return callMethod(`${BASE}.get_allocation_changes`, {
+    since_cursor: sinceCursor || null,
+    start_date: startDate,
+    end_date: endDate,
+    machines: machines || null,
+    machine_frames: machineFrames || null,
+    orders: orders || null,
+  })
+}
+
+/**
+ * Merge a getAllocationChanges response into the allocations held by the client.
+ * Rows are keyed by name, so upserts and deletes repeated across polls apply once.
+ */
+export function applyAllocationChanges(allocations, { full, upserts, deleted }) {
+  const byName = new Map(full ? [] : allocations.map((row) => [row.name, row]))
+  for (const name of deleted) byName.delete(name)
+  for (const row of upserts) byName.set(row.name, row)
+  return [...byName.values()]
 }
 
 export function saveAllocations(allocations, startDate = null, endDate = null) {
@@ -31,6 +77,64 @@ export function saveAllocations(allocations, startDate = null, endDate = null) {
   })
 }
 
+export function planWorkload(lines, { horizonDays = null, apply = false } = {}) {
+  return callMethod(`${BASE}.plan_workload`, {
+    lines: JSON.stringify(lines),
+    horizon_days: horizonDays,
+    apply: apply ? 1 : 0,
+  })
+}
+
+export function replanOpenOrders({ startDate = null, horizonDays = null, orders = null, apply = false } = {}) {
+  return callMethod(`${BASE}.replan_open_orders`, {
+    start_date: startDate,
+    horizon_days: horizonDays,
+    orders: orders ? JSON.stringify(orders) : null,
+    apply: apply ? 1 : 0,
+  })
+}
+
+export function availableToPromise(style, process, quantity, startDate, { horizonDays = null } = {}) {
+  return callMethod(`${BASE}.available_to_promise`, {
+    style,
+    process,
+    quantity,
+    start_date: startDate,
+    horizon_days: horizonDays,
+  })
+}
+
+export function createScenario(startDate, endDate, { label = null, machines = null } = {}) {
+  return callMethod(`${BASE}.create_scenario`, {
+    start_date: startDate,
+    end_date: endDate,
+    label,
+    machines: machines ? JSON.stringify(machines) : null,
+  })
+}
+
+export function updateScenario(scenario, changes) {
+  return callMethod(`${BASE}.update_scenario`, { scenario, changes: JSON.stringify(changes) })
+}
+
+export function compareWhatIf(scenarios, { includeLive = true } = {}) {
+  return callMethod(`${BASE}.compare_what_if`, {
+    scenarios: JSON.stringify(scenarios),
+    include_live: includeLive ? 1 : 0,
+  })
+}
+
+export function deleteScenario(scenario) {
+  return callMethod(`${BASE}.delete_scenario`, { scenario })
+}
+
+export function saveAllocationChanges({ upserts = [], deletes = [] } = {}) {
+  return callMethod(`${BASE}.save_allocations`, {
+    upserts: JSON.stringify(upserts),
+    deletes: JSON.stringify(deletes),
+  })
+}
+
 export function deleteAllocation(allocationName) {
   return callMethod(`${BASE}.delete_allocation`, { allocation_name: allocationName })
 }
@@ -55,26 +159,38 @@ export function updateDateShift(date, shifts, machine = null) {
   })
 }
 
+export function applyShiftPattern(startDate, endDate, shifts, { machines, weekdays } = {}) {
+  return callMethod(`${BASE}.apply_shift_pattern`, {
+    start_date: startDate,
+    end_date: endDate,
+    shifts: JSON.stringify(shifts),
+    machines: machines ? JSON.stringify(machines) : null,
+    weekdays: weekdays ? JSON.stringify(weekdays) : null,
+  })
+}
+
 // ---------------------------------------------------------------------------
 // Shift alterations (overtime / under-time)
 // ---------------------------------------------------------------------------
 
-export function addShiftAlteration(date, alterationType, minutes, machine = null, reason = null) {
+export function addShiftAlteration(date, alterationType, minutes, machine = null, reason = null, { reflow = false } = {}) {
   return callMethod(`${BASE}.add_shift_alteration`, {
     date,
     alteration_type: alterationType,
     minutes,
     machine,
     reason,
+    reflow: reflow ? 1 : 0,
   })
 }
 
-export function updateShiftAlteration(alterationName, alterationType, minutes, reason = null) {
+export function updateShiftAlteration(alterationName, alterationType, minutes, reason = null, { reflow = false } = {}) {
   return callMethod(`${BASE}.update_shift_alteration`, {
     alteration_name: alterationName,
     alteration_type: alterationType,
     minutes,
     reason,
+    reflow: reflow ? 1 : 0,
   })
 }
 
@@ -85,6 +201,13 @@ export function deleteShiftAlteration(alterationName, parentCalendar) {
   })
 }
 
+export function reflowAllocations(fromDate, machines = null) {
+  return callMethod(`${BASE}.reflow_allocations`, {
+    from_date: fromDate,
+    machines: machines ? JSON.stringify(machines) : null,
+  })
+}
+
 // ---------------------------------------------------------------------------
 // Master data lookups
 // ---------------------------------------------------------------------------
@@ -101,6 +224,6 @@ export function getCapOrders() {
   return callMethod(`${BASE}.get_orders`)
 }
 
-export function getOrderTrackingSummary() {
-  return callMethod(`${BASE}.get_order_tracking_summary`)
+export function getOrderTrackingSummary(orders = null) {
+  return callMethod(`${BASE}.get_order_tracking_summary`, { orders })
 }
@@ -4,11 +4,12 @@
  */
 
 import { callMethod } from './client'
+import { offsetDate } from '@/utils/columnar'
 
 const BASE = 'albion.albion.api.reports'
 
-export function getProductionReport({ startDate, endDate, machine, style, process, order, groupBy }) {
-  return callMethod(`${BASE}.get_production_report`, {
+function productionFilters({ startDate, endDate, machine, style, process, order, groupBy }) {
+  return {
     start_date: startDate,
     end_date: endDate,
     machine: machine || null,
@@ -16,12 +17,106 @@ export function getProductionReport({ startDate, endDate, machine, style, proces
     process: process || null,
     order: order || null,
     group_by: groupBy || null,
+  }
+}
+
+/**
+ * Production report rows. With pageLength, resolves to one page
+ * { rows, next_cursor }; pass next_cursor as `after` for the next page.
+ */
+export function getProductionReport({ pageLength = null, after = null, ...filters }) {
+  return callMethod(`${BASE}.get_production_report`, {
+    ...productionFilters(filters),
+    page_length: pageLength,
+    after: after ? JSON.stringify(after) : null,
   })
 }
 
-export function getMachineAvailability(startDate, endDate) {
-  return callMethod(`${BASE}.get_machine_availability`, {
+export function getProductionTotals(filters) {
+  return callMethod(`${BASE}.get_production_totals`, productionFilters(filters))
+}
+
+/**
+ * URL that downloads the production report as CSV or Excel.
+ */
+export function productionExportUrl(filters, fileFormat = 'CSV') {
+  const params = new URLSearchParams()
+  for (const [key, value] of Object.entries({ ...productionFilters(filters), file_format: fileFormat })) {
+    if (value !== null && value !== undefined) params.append(key, value)
+  }
+  return `/api/method/${BASE}.export_production_report?${params.toString()}`
+}
+
+/**
+ * Machine availability. With bucket ('day' | 'week' | 'month') or group
+ * ('machine' | 'machine_frame' | 'plant'), resolves to summed arrays
+ * { buckets, groups, capacity, used, available } instead of per-day cells.
+ */
+export async function getMachineAvailability(startDate, endDate, { bucket = null, group = null } = {}) {
+  const data = await callMethod(`${BASE}.get_machine_availability`, {
     start_date: startDate,
     end_date: endDate,
+    bucket,
+    group,
+    columnar: bucket || group ? 0 : 1,
+  })
+  return data && data.columnar ? expandAvailability(data) : data
+}
+
+// Per-day matrices -> { machines, dates, availability: { machine_id: { date: cell } } }
+function expandAvailability({ base_date: baseDate, days, machines, capacity, used, available }) {
+  const dates = Array.from({ length: days }, (_, j) => offsetDate(baseDate, j))
+  const availability = {}
+  machines.forEach((m, i) => {
+    const cells = {}
+    dates.forEach((date, j) => {
+      cells[date] = { capacity: capacity[i][j], used: used[i][j], available: available[i][j] }
+    })
+    availability[m.machine_id] = cells
+  })
+  return { machines, dates, availability }
+}
+
+/**
+ * Queue a report on the server instead of waiting for it.
+ * method: 'get_production_report' | 'get_machine_availability' | 'export_production_report'
+ * params: the same params the method takes. Resolves to { job }.
+ */
+export function startReportJob(method, params) {
+  return callMethod(`${BASE}.${method}`, { ...params, run_async: 1 })
+}
+
+export function getReportJob(job) {
+  return callMethod('albion.albion.api.report_jobs.get_report_job', { job })
+}
+
+/**
+ * Poll a report job until it completes or fails. onProgress(state) is called
+ * with every state read. Resolves to the final state ({ result } or { file_url }).
+ */
+export async function waitForReportJob(job, onProgress = null, interval = 2000) {
+  for (;;) {
+    const state = await getReportJob(job)
+    if (onProgress) onProgress(state)
+    if (state.status === 'Completed') return state
+    if (state.status === 'Failed') throw new Error(state.error || 'Report job failed')
+    await new Promise((resolve) => setTimeout(resolve, interval))
+  }
+}
+
+/**
+ * Planned vs actual quantity per order line and bucket ('day' | 'week' | 'month').
+ * Resolves to { buckets, lines, totals }; lines behind plan have behind: true.
+ */
+export function getVarianceReport({ startDate, endDate, bucket, order, style, process, asOf, behindOnly }) {
+  return callMethod(`${BASE}.get_variance_report`, {
+    start_date: startDate,
+    end_date: endDate,
+    bucket: bucket || null,
+    order: order || null,
+    style: style || null,
+    process: process || null,
+    as_of: asOf || null,
+    behind_only: behindOnly ? 1 : 0,
   })
 }
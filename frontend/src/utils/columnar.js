@@ -0,0 +1,43 @@
+/**
+ * Decoders for columnar API responses (albion.albion.api.columnar).
+ * Pure JS — zero Vue dependencies.
+ */
+
+/**
+ * 'YYYY-MM-DD' of baseDate + offset days. Computed in UTC so DST never shifts the day.
+ */
+export function offsetDate(baseDate, offset) {
+  const [y, m, d] = baseDate.split('-').map(Number)
+  return new Date(Date.UTC(y, m - 1, d + offset)).toISOString().slice(0, 10)
+}
+
+/**
+ * Expand { count, base_date, columns, dictionaries } back into row objects.
+ * dateFields are turned from day offsets back into 'YYYY-MM-DD' strings.
+ */
+export function decodeColumns(payload, dateFields = []) {
+  const { count, base_date: baseDate, columns, dictionaries } = payload
+  const fields = Object.keys(columns)
+  const decoded = fields.map((field) => {
+    const values = columns[field]
+    const dictionary = dictionaries[field]
+    if (dictionary) return values.map((code) => dictionary[code])
+    if (dateFields.includes(field)) {
+      const dates = new Map()
+      return values.map((offset) => {
+        if (offset === null) return null
+        if (!dates.has(offset)) dates.set(offset, offsetDate(baseDate, offset))
+        return dates.get(offset)
+      })
+    }
+    return values
+  })
+
+  const rows = new Array(count)
+  for (let i = 0; i < count; i++) {
+    const row = {}
+    for (let f = 0; f < fields.length; f++) row[fields[f]] = decoded[f][i]
+    rows[i] = row
+  }
+  return rows
+}